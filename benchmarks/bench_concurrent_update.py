@@ -0,0 +1,104 @@
+"""Push throughput of concurrent ``agents update`` runs, with and without
+the structural JSON merge driver.
+
+Each of N clones of one bare remote appends a task to the same module
+``tasks.json`` and runs ``agents update`` at the same moment, for several
+rounds. Without the driver, the rebase after a rejected push conflicts on
+the JSON file and the update exits; with it, the rebase merges the task
+lists and the push goes through on a retry.
+
+Usage:
+    python benchmarks/bench_concurrent_update.py [--agents 4] [--rounds 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+ENV = dict(os.environ, PYTHONPATH=str(SRC), AGENTS_NO_DAEMON="1",
+           GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+           GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com")
+TASKS_FILE = ".agents/modules/api/tasks.json"
+
+
+def run(cwd, *cmd, check=True):
+    return subprocess.run(list(cmd), cwd=cwd, env=ENV, check=check, capture_output=True, text=True)
+
+
+def agents(cwd, *args, check=True):
+    return run(cwd, sys.executable, "-m", "agents_core.cli", *args, check=check)
+
+
+def setup(root: Path, n_agents: int, driver: bool):
+    remote = root / "remote.git"
+    run(root, "git", "init", "-q", "--bare", "-b", "main", str(remote))
+    seed = root / "seed"
+    run(root, "git", "clone", "-q", str(remote), "seed")
+    run(seed, "git", "checkout", "-q", "-B", "main")
+    (seed / "src" / "api").mkdir(parents=True)
+    (seed / "src" / "api" / "main.py").write_text("pass\n")
+    agents(seed, "init")
+    run(seed, "git", "add", "-A")
+    run(seed, "git", "commit", "-q", "-m", "bootstrap")
+    run(seed, "git", "push", "-q", "-u", "origin", "main")
+
+    clones = []
+    for i in range(n_agents):
+        name = f"agent{i}"
+        run(root, "git", "clone", "-q", str(remote), name)
+        clone = root / name
+        if driver:
+            agents(clone, "init")
+        clones.append(clone)
+    return clones
+
+
+def one_update(clone: Path, task_id: str) -> bool:
+    path = clone / TASKS_FILE
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    doc["tasks"].append({"id": task_id, "title": task_id, "status": "todo",
+                         "acceptance": [], "impl": {"steps": []}, "refs": []})
+    path.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+    return agents(clone, "update", check=False).returncode == 0
+
+
+def bench(n_agents: int, rounds: int, driver: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        clones = setup(Path(tmp), n_agents, driver)
+        pushed = 0
+        start = time.perf_counter()
+        for r in range(rounds):
+            for clone in clones:
+                # Start each round from a clean, current tree.
+                run(clone, "git", "rebase", "--abort", check=False)
+                run(clone, "git", "reset", "-q", "--hard", "@{upstream}", check=False)
+                run(clone, "git", "pull", "-q", "--rebase", check=False)
+            with ThreadPoolExecutor(max_workers=n_agents) as pool:
+                results = pool.map(one_update, clones, [f"agent{i}:{r}" for i in range(n_agents)])
+                pushed += sum(results)
+        elapsed = time.perf_counter() - start
+    return pushed, n_agents * rounds, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=4, help="Concurrent clones")
+    parser.add_argument("--rounds", type=int, default=3, help="Simultaneous update rounds")
+    args = parser.parse_args()
+
+    print(f"{'merge':<12} {'pushed':>8} {'pushes/s':>9} {'seconds':>8}")
+    for driver in (False, True):
+        pushed, attempted, elapsed = bench(args.agents, args.rounds, driver)
+        print(f"{'agents-json' if driver else 'text':<12} {pushed:>4}/{attempted:<3} "
+              f"{pushed / elapsed:>9.2f} {elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Scheduling latency over a large ``priorities.json`` queue.
+
+Builds a random ``blocked_by`` DAG (each entry depends on up to three
+earlier ones), then reports the time to build the ``Scheduler``, to take
+the first ten ready entries, and the mean time of ``set_status`` while
+repeatedly completing the best ready entry, compared with rebuilding the
+scheduler after every change.
+
+Usage:
+    python benchmarks/bench_schedule.py [--entries 20000] [--steps 200]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.schedule import Scheduler  # noqa: E402
+
+POLICY = {"strategy": "critical_path_first", "tie_breakers": ["dependency_depth", "risk", "value"]}
+
+
+def make_queue(n: int, rng):
+    queue = []
+    for i in range(n):
+        deps = {f"t{rng.randrange(i)}" for _ in range(rng.randint(0, 3))} if i else set()
+        queue.append({"task_id": f"t{i}", "title": f"task {i}", "file": "x", "priority": 1,
+                      "status": "done" if rng.random() < 0.3 else "todo", "blocked_by": sorted(deps),
+                      "risk": rng.randint(0, 5), "value": rng.randint(0, 5)})
+    return queue
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000, help="Queue entries")
+    parser.add_argument("--steps", type=int, default=200, help="Entries to complete one by one")
+    args = parser.parse_args()
+
+    queue = make_queue(args.entries, random.Random(42))
+    scheduler, build_ms = timed(lambda: Scheduler(queue, POLICY))
+    _, ready_ms = timed(lambda: scheduler.ready(10))
+    print(f"entries {args.entries}, edges {sum(map(len, scheduler.deps))}, ready {len(scheduler.ready())}")
+    print(f"build          {build_ms:9.1f}ms")
+    print(f"ready(10)      {ready_ms:9.1f}ms")
+
+    update_ms = 0.0
+    for _ in range(args.steps):
+        best = scheduler.ready(1)
+        if not best:
+            break
+        _, ms = timed(lambda: scheduler.set_status(best[0]["task_id"], "done"))
+        update_ms += ms
+    print(f"set_status     {update_ms / args.steps:9.3f}ms per change (incremental)")
+    print(f"rebuild        {timed(lambda: Scheduler(queue, POLICY))[1]:9.1f}ms per change (from scratch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Cold-start latency of each ``agents`` subcommand.
+
+Every sample is a fresh interpreter running ``python -X importtime -m
+agents_core.cli ...`` against a throwaway project, with
+``AGENTS_NO_DAEMON`` set so nothing is forwarded to a running daemon. For
+each command the report gives the median wall clock, the cumulative import
+time of ``agents_core.cli`` and everything it pulled in, the number of
+modules imported and whether ``jsonschema`` was among them.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 7] [--top 0]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+
+# (label, argv after "agents"); "init" runs last since it rewrites the project.
+COMMANDS = [
+    ("--help", ["--help"]),
+    ("scan --help", ["scan", "--help"]),
+    ("scan", ["scan"]),
+    ("scan --refresh-index", ["scan", "--refresh-index"]),
+    ("validate", ["validate"]),
+    ("task list", ["task", "list"]),
+    ("init", ["init"]),
+]
+
+
+def make_project(root: Path, modules: int = 20):
+    for i in range(modules):
+        pkg = root / "src" / f"mod{i}"
+        pkg.mkdir(parents=True)
+        (pkg / "main.py").write_text("pass\n")
+    (root / ".agents").mkdir()
+
+
+def parse_importtime(stderr: str):
+    """Returns (imported module names, cumulative us per top-level import)."""
+    names, top = [], {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if not parts[1].isdigit():
+            continue  # header line
+        raw = line.split("|")[2]
+        name = raw.strip()
+        names.append(name)
+        depth = (len(raw) - len(raw.lstrip()) - 1) // 2
+        if depth == 0:
+            top[name] = int(parts[1])
+    return names, top
+
+
+def run_once(argv, cwd: Path):
+    env = dict(os.environ, PYTHONPATH=str(SRC), AGENTS_NO_DAEMON="1")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "agents_core.cli", *argv],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    return wall, proc.returncode, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="Samples per command (median is reported)")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest top-level imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_project(root)
+        # Leave a valid index behind for scan/validate/task list to read.
+        subprocess.run([sys.executable, "-m", "agents_core.cli", "scan", "--refresh-index"], cwd=root,
+                       env=dict(os.environ, PYTHONPATH=str(SRC), AGENTS_NO_DAEMON="1"),
+                       capture_output=True, check=True)
+
+        print(f"{'command':<22} {'wall ms':>8} {'import ms':>10} {'modules':>8} {'jsonschema':>11} {'exit':>5}")
+        for label, argv in COMMANDS:
+            walls, imports = [], []
+            for _ in range(args.runs):
+                wall, code, (names, top) = run_once(argv, root)
+                walls.append(wall)
+                imports.append(sum(top.values()))
+            print(f"{label:<22} {statistics.median(walls) * 1000:>8.1f} "
+                  f"{statistics.median(imports) / 1000:>10.1f} {len(names):>8} "
+                  f"{'yes' if 'jsonschema' in names else 'no':>11} {code:>5}")
+            for name, us in sorted(top.items(), key=lambda kv: -kv[1])[:args.top]:
+                print(f"    {us / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""End-to-end timings of ``init``, ``scan``, ``validate`` and ``update`` on
+synthetic monorepos of several sizes.
+
+For each size a repository is generated with ``synthrepo`` (source tree,
+ignored vendor trees, filled task files, local bare remote), then every
+step runs as a fresh ``python -m agents_core.cli`` process with
+``AGENTS_NO_DAEMON`` set. Each step reports the median wall time over
+``--runs`` and the peak RSS of the process. ``update`` steps first touch one
+task file so there is something to commit and push.
+
+Results are written as JSON (with the agents-core commit they were taken
+at) so runs from different commits can be compared.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes small,medium] [--runs 3] [--output results.json]
+    python benchmarks/bench_suite.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from synthrepo import GIT_ENV, Shape, fill_tasks, generate, init_git  # noqa: E402
+
+REPO = Path(__file__).parent.parent
+ENV = dict(GIT_ENV, PYTHONPATH=str(REPO / "src"), AGENTS_NO_DAEMON="1")
+
+SIZES = {
+    "small": Shape(depth=3, fanout=3, vendor_trees=2, vendor_files=100, tasks_per_module=5),
+    "medium": Shape(depth=4, fanout=4, vendor_trees=4, vendor_files=500, tasks_per_module=10),
+    "large": Shape(depth=5, fanout=5, vendor_trees=8, vendor_files=2000, tasks_per_module=20),
+}
+
+# (label, argv after "agents"); run in this order, each --runs times.
+STEPS = [
+    ("scan (cold)", ["scan", "--refresh-index", "--no-cache"]),
+    ("scan (warm)", ["scan", "--refresh-index"]),
+    ("scan --lines (cold)", ["scan", "--lines", "--no-cache"]),
+    ("scan --lines (warm)", ["scan", "--lines"]),
+    ("validate (cold)", ["validate", "--no-cache"]),
+    ("validate (warm)", ["validate"]),
+    ("validate --refs", ["validate", "--refs"]),
+    ("update", ["update"]),
+]
+
+
+def run_cli(cwd: Path, args):
+    """Runs one CLI process; returns ``(seconds, peak RSS in KiB)``."""
+    with tempfile.TemporaryFile() as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "agents_core.cli", *args], cwd=cwd, env=ENV,
+                                stdout=subprocess.DEVNULL, stderr=err)
+        # wait4 gives this child's own rusage; RUSAGE_CHILDREN would be the max over all of them.
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            err.seek(0)
+            raise RuntimeError(f"agents {' '.join(args)} failed ({proc.returncode}):\n"
+                               f"{err.read().decode('utf-8', 'replace')}")
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    return elapsed, usage.ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+
+
+def touch_task(root: Path, n: int):
+    with open(root / ".agents" / "index.json", "r", encoding="utf-8") as f:
+        path = root / json.load(f)["modules"][0]["tasks_file"]
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    doc["tasks"][0]["title"] = f"touched {n}"
+    path.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+
+
+def bench_size(name: str, shape: Shape, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        root.mkdir()
+        stats = generate(root, shape)
+        init_seconds, init_rss = run_cli(root, ["init"])
+        stats["modules"] = fill_tasks(root, shape)
+        stats["task_bytes"] = sum(p.stat().st_size for p in (root / ".agents" / "modules").rglob("tasks.json"))
+        init_git(root, Path(tmp) / "remote.git")
+
+        steps = {"init": {"median_s": round(init_seconds, 4), "max_rss_kib": init_rss, "runs": 1}}
+        for label, args in STEPS:
+            samples = []
+            for n in range(runs):
+                if args[0] == "update":
+                    touch_task(root, n)
+                samples.append(run_cli(root, args))
+            steps[label] = {"median_s": round(statistics.median(s for s, _ in samples), 4),
+                            "max_rss_kib": max(rss for _, rss in samples), "runs": runs}
+    return {"size": name, "shape": shape.as_dict(), "repo": stats, "steps": steps}
+
+
+def commit_of(path: Path) -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=path, capture_output=True, text=True)
+    return result.stdout.strip() or "unknown"
+
+
+def print_results(results):
+    print(f"{'size':<8} {'step':<19} {'median s':>9} {'peak MiB':>9}")
+    for result in results["sizes"]:
+        for label, step in result["steps"].items():
+            print(f"{result['size']:<8} {label:<19} {step['median_s']:>9.3f} {step['max_rss_kib'] / 1024:>9.1f}")
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, "r", encoding="utf-8") as f:
+        after = json.load(f)
+    old = {(r["size"], label): step for r in before["sizes"] for label, step in r["steps"].items()}
+    print(f"{before['commit']} -> {after['commit']}")
+    print(f"{'size':<8} {'step':<19} {'before s':>9} {'after s':>9} {'ratio':>7}")
+    for result in after["sizes"]:
+        for label, step in result["steps"].items():
+            prev = old.get((result["size"], label))
+            if prev is None:
+                continue
+            ratio = step["median_s"] / prev["median_s"] if prev["median_s"] else float("nan")
+            print(f"{result['size']:<8} {label:<19} {prev['median_s']:>9.3f} {step['median_s']:>9.3f} {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--runs", type=int, default=3, help="Samples per step")
+    parser.add_argument("--output", default=None, help="Write the JSON results here")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = {"commit": commit_of(REPO), "python": platform.python_version(), "platform": platform.platform(),
+               "sizes": [bench_size(name, SIZES[name], args.runs) for name in args.sizes.split(",")]}
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Per-file schema validation cost: validator caching and generated validators.
+
+"before" reproduces the original per-instance path: read the schema from
+package resources, rebuild the registry and call ``jsonschema.validate``
+(which re-checks the schema and builds a fresh validator). "after" uses
+``agents_core.scan.validate_against_schema`` with its cached validators.
+"iter_errors" collects every error with the cached ``jsonschema``
+validator, as ``agents validate`` did before the bundled schemas were
+compiled, and "generated" does the same with the ``schemagen`` validator.
+
+Usage:
+    python benchmarks/bench_validate.py [--files 2000] [--tasks 5]
+"""
+
+import argparse
+import json
+import sys
+import time
+from importlib.resources import files
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from jsonschema import validate
+from referencing import Registry, Resource
+
+from agents_core.scan import get_registry, get_validator, validate_against_schema
+from agents_core.schemagen import bundled_validator
+
+
+def make_tasks_doc(module: str, n_tasks: int) -> dict:
+    return {
+        "$schema": "schemas/tasks.schema.json",
+        "module": module,
+        "updated_at": "scan",
+        "tasks": [
+            {
+                "id": f"{module}:{i}",
+                "title": f"Task {i}",
+                "status": "todo",
+                "acceptance": ["works"],
+                "impl": {"steps": [{"type": "modify", "file": "src/x.py", "desc": "change"}]},
+                "refs": [{"file": "src/x.py", "line": 1, "end_line": 2}],
+                "notes": [],
+            }
+            for i in range(n_tasks)
+        ],
+    }
+
+
+def uncached_registry():
+    registry = Registry()
+    for item in files("agents_core.resources.schemas").iterdir():
+        if item.is_file() and item.name.endswith(".json"):
+            data = json.loads(item.read_text(encoding="utf-8"))
+            if "$id" in data:
+                registry = registry.with_resource(uri=data["$id"], resource=Resource.from_contents(data))
+    return registry
+
+
+def before(docs):
+    registry = uncached_registry()
+    for doc in docs:
+        schema = json.loads((files("agents_core.resources.schemas") / "tasks.schema.json").read_text(encoding="utf-8"))
+        validate(instance=doc, schema=schema, registry=registry)
+
+
+def after(docs):
+    for doc in docs:
+        validate_against_schema(doc, "tasks.schema.json")
+
+
+def iter_errors(docs):
+    validator = get_validator("tasks.schema.json")
+    for doc in docs:
+        list(validator.iter_errors(doc))
+
+
+def generated(docs):
+    check = bundled_validator("tasks.schema.json")
+    for doc in docs:
+        check(doc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="Number of tasks.json documents")
+    parser.add_argument("--tasks", type=int, default=5, help="Tasks per document")
+    args = parser.parse_args()
+
+    docs = [make_tasks_doc(f"mod{i}", args.tasks) for i in range(args.files)]
+    get_registry.cache_clear()
+    get_validator.cache_clear()
+
+    results = {}
+    for label, fn in (("before", before), ("after", after), ("iter_errors", iter_errors), ("generated", generated)):
+        start = time.perf_counter()
+        fn(docs)
+        elapsed = time.perf_counter() - start
+        results[label] = elapsed
+        print(f"{label:>11}: {elapsed:8.3f}s total  {elapsed / args.files * 1e6:9.1f}us/file")
+    print(f"speedup (caching): {results['before'] / results['after']:.1f}x")
+    print(f"speedup (generated vs iter_errors): {results['iter_errors'] / results['generated']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
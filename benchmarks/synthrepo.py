@@ -0,0 +1,149 @@
+"""Synthetic monorepo generator for the benchmark suite.
+
+``generate`` lays out a deterministic tree under one discovery root: a
+directory hierarchy of configurable depth and fan-out in which a fraction
+of the directories hold code, plus vendored trees (``node_modules``,
+``vendor``) that the generated ``.gitignore`` excludes. After
+``agents init`` has created the module task files, ``fill_tasks`` gives
+every module a number of tasks of a chosen size, and ``init_git`` commits
+the tree and pushes it to a local bare remote so ``agents update`` has
+somewhere to push.
+
+Usage (standalone):
+    python benchmarks/synthrepo.py DEST [--depth 4] [--fanout 4] [--git]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+from pathlib import Path
+
+GITIGNORE = "node_modules/\nvendor/\n*.log\n"
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com")
+
+
+class Shape:
+    """Parameters of a synthetic repository.
+
+    Attributes:
+        depth: Levels of directories below the discovery root.
+        fanout: Subdirectories per directory.
+        code_ratio: Fraction of directories that hold a code file.
+        files_per_dir: Files written into each directory.
+        vendor_trees: Ignored ``node_modules``/``vendor`` trees, spread
+            over the top-level directories.
+        vendor_files: Files in each vendored tree (all code, all ignored).
+        tasks_per_module: Tasks written into each module's ``tasks.json``.
+        task_bytes: Approximate size of each task's notes.
+        seed: Seed for the random choices, so equal shapes give equal trees.
+    """
+
+    def __init__(self, depth=3, fanout=3, code_ratio=0.6, files_per_dir=3, vendor_trees=2, vendor_files=200,
+                 tasks_per_module=5, task_bytes=200, seed=0):
+        self.depth = depth
+        self.fanout = fanout
+        self.code_ratio = code_ratio
+        self.files_per_dir = files_per_dir
+        self.vendor_trees = vendor_trees
+        self.vendor_files = vendor_files
+        self.tasks_per_module = tasks_per_module
+        self.task_bytes = task_bytes
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def generate(root: Path, shape: Shape, discovery_root: str = "packages") -> dict:
+    """Writes the source tree; returns counts of what was generated."""
+    rng = random.Random(shape.seed)
+    _write(root / ".gitignore", GITIGNORE)
+    stats = {"dirs": 0, "code_dirs": 0, "files": 0, "vendor_files": 0}
+
+    level = [root / discovery_root]
+    for _ in range(shape.depth):
+        level = [parent / f"d{i}" for parent in level for i in range(shape.fanout)]
+        for directory in level:
+            stats["dirs"] += 1
+            code = rng.random() < shape.code_ratio
+            stats["code_dirs"] += code
+            for n in range(shape.files_per_dir):
+                name = f"f{n}.py" if code and n == 0 else f"f{n}.{rng.choice(['md', 'txt', 'json'])}"
+                _write(directory / name, f"# {directory.name}/{name}\n" + "x = 1\n" * rng.randint(1, 20))
+                stats["files"] += 1
+
+    tops = sorted((root / discovery_root).iterdir())
+    for i in range(shape.vendor_trees):
+        vendor = tops[i % len(tops)] / ("node_modules" if i % 2 == 0 else "vendor") / f"pkg{i}"
+        for n in range(shape.vendor_files):
+            _write(vendor / f"lib{n // 20}" / f"m{n}.js", "module.exports = {};\n")
+            stats["vendor_files"] += 1
+    return stats
+
+
+def fill_tasks(root: Path, shape: Shape) -> int:
+    """Writes ``tasks_per_module`` tasks into every module listed in the index."""
+    rng = random.Random(shape.seed)
+    with open(root / ".agents" / "index.json", "r", encoding="utf-8") as f:
+        modules = json.load(f)["modules"]
+    for mod in modules:
+        path = root / mod["tasks_file"]
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        doc["tasks"] = [{
+            "id": f"{mod['name']}:{i}",
+            "title": f"Task {i} of {mod['name']}",
+            "status": rng.choice(["todo", "todo", "doing", "done", "blocked"]),
+            "acceptance": ["tests pass"],
+            "impl": {"steps": [{"type": "modify", "file": f"{mod['path']}/f0.py", "desc": "change it"}]},
+            "refs": [{"file": f"{mod['path']}/f0.py", "line": 1}],
+            "notes": ["n" * shape.task_bytes],
+        } for i in range(shape.tasks_per_module)]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+            f.write("\n")
+    return len(modules)
+
+
+def git(cwd: Path, *args):
+    return subprocess.run(["git", *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True)
+
+
+def init_git(root: Path, remote: Path):
+    """Commits the tree and pushes it to a new bare repository at ``remote``."""
+    git(root.parent, "init", "-q", "--bare", "-b", "main", str(remote))
+    git(root, "init", "-q", "-b", "main")
+    git(root, "remote", "add", "origin", str(remote))
+    git(root, "add", "-A")
+    git(root, "commit", "-q", "-m", "synthetic repository")
+    git(root, "push", "-q", "-u", "origin", "main")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dest", help="Directory to create")
+    defaults = Shape()
+    for name, value in defaults.as_dict().items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    parser.add_argument("--git", action="store_true", help="Also commit and push to DEST.remote.git")
+    args = parser.parse_args()
+
+    root = Path(args.dest).resolve()
+    root.mkdir(parents=True)
+    shape = Shape(**{name: getattr(args, name) for name in defaults.as_dict()})
+    print(json.dumps(generate(root, shape)))
+    if args.git:
+        init_git(root, root.with_name(root.name + ".remote.git"))
+
+
+if __name__ == "__main__":
+    main()
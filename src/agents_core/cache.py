@@ -0,0 +1,56 @@
+"""Persisted caches under ``.agents/cache/``.
+
+Caches are derived data: they are never committed (the directory carries
+its own ``.gitignore``), are discarded when the agents-core version or the
+caller's key changes, and any unreadable cache is treated as empty.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from agents_core import __version__
+
+CACHE_DIR = Path(".agents") / "cache"
+
+
+def cache_dir(project_root: Path) -> Path:
+    """Returns the cache directory, creating it (git-ignored) if needed."""
+    path = project_root / CACHE_DIR
+    if not path.is_dir():
+        path.mkdir(parents=True, exist_ok=True)
+        (path / ".gitignore").write_text("*\n", encoding="utf-8")
+    return path
+
+
+def load_cache(project_root: Path, name: str, key: str):
+    """Loads the payload of cache ``name`` if it was written for ``key``.
+
+    Returns:
+        The cached payload, or None when the cache is missing, corrupt, or
+        was written by another agents-core version or for another key.
+    """
+    path = project_root / CACHE_DIR / name
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    if data.get("version") != __version__ or data.get("key") != key:
+        return None
+    return data.get("data")
+
+
+def save_cache(project_root: Path, name: str, key: str, payload):
+    """Atomically writes cache ``name``; failures are not fatal."""
+    try:
+        path = cache_dir(project_root) / name
+        tmp = path.with_name(f"{name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": __version__, "key": key, "data": payload}, f,
+                      separators=(",", ":"))
+        tmp.replace(path)
+    except OSError as e:
+        print(f"[cache][WARN] Could not write {name}: {e}")
@@ -1,9 +1,42 @@
 import argparse
+import json
 import sys
 from pathlib import Path
-from agents_core.install import install
-from agents_core.scan import scan
-from agents_core.update import update
+
+# Subcommand handlers are imported inside their branch of main() so that
+# `--help`, `init` and daemon-forwarded commands never load jsonschema or the
+# modules they do not use. See benchmarks/bench_startup.py.
+
+def run_via_daemon(root_dir, op, args):
+    """Forwards a command to a running daemon; returns False if there is none.
+
+    Instrumented runs (``--timings``/``--profile``) always work in-process,
+    since their report is about this process.
+    """
+    from agents_core.client import request
+    from agents_core.timing import active
+
+    if active() is not None:
+        return False
+
+    resp = request(root_dir, op, args)
+    if resp is None:
+        return False
+    sys.stdout.write(resp["stdout"])
+    sys.stderr.write(resp["stderr"])
+    if resp["result"] is not None and op == "tasks":
+        print(json.dumps(resp["result"], indent=2, ensure_ascii=False))
+    if resp["exit"]:
+        sys.exit(resp["exit"])
+    return True
+
+def _add_instrumentation_args(parser):
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--timings", nargs="?", const="-", default=None, metavar="FILE",
+                       help="Write a JSON report of stage times, counters and git time to FILE (default: stderr)")
+    group.add_argument("--trace-memory", action="store_true",
+                       help="Include the tracemalloc peak in the report (slower)")
+    group.add_argument("--profile", default=None, metavar="FILE", help="Write cProfile stats to FILE")
 
 def main():
     parser = argparse.ArgumentParser(description="Agents Core Tooling")
@@ -17,32 +50,180 @@ def main():
     parser_scan = subparsers.add_parser("scan", help="Scan for modules and update index")
     parser_scan.add_argument("--root", default=None, help="Project root directory (default: current)")
     parser_scan.add_argument("--refresh-index", action="store_true", help="Regenerate index.json")
+    parser_scan.add_argument("--no-cache", action="store_true", help="Ignore and rebuild the directory cache")
+    parser_scan.add_argument("--source", choices=["fs", "git"], default="fs",
+                             help="Discover modules by walking the filesystem or from 'git ls-files'")
+    parser_scan.add_argument("--untracked", action="store_true",
+                             help="With --source=git, also include untracked files that are not ignored")
+    parser_scan.add_argument("--watch", action="store_true",
+                             help="Keep running and update the index whenever the module set changes")
+    parser_scan.add_argument("--interval", type=float, default=1.0,
+                             help="With --watch, polling period in seconds when inotify is unavailable")
+    parser_scan.add_argument("--metrics", action="store_true",
+                             help="Record file counts and bytes per language for each module in index.json")
+    parser_scan.add_argument("--lines", action="store_true",
+                             help="Also count lines of code per language (implies --metrics)")
+    parser_scan.add_argument("--sample-bytes", type=int, default=None,
+                             help="Estimate the line counts of modules with more code than this from a sample "
+                                  "(default: 8 MiB)")
 
     # validate
     parser_val = subparsers.add_parser("validate", help="Validate all schemas and task files")
     parser_val.add_argument("--root", default=None, help="Project root directory (default: current)")
+    parser_val.add_argument("--format", choices=["text", "json"], default="text", help="Report format")
+    parser_val.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser_val.add_argument("--no-cache", action="store_true", help="Re-validate files even if they passed before")
+    parser_val.add_argument("--stream", action="store_true",
+                            help="Validate every task file task by task from a stream, not only very large ones")
+    parser_val.add_argument("--refs", action="store_true",
+                            help="Also check that refs, step files, queue files and blocked_by ids resolve")
 
     # update
     parser_upd = subparsers.add_parser("update", help="Run post-session update (scan, validate, commit, push)")
     parser_upd.add_argument("--root", default=None, help="Project root directory (default: current)")
+    parser_upd.add_argument("--no-cache", action="store_true", help="Ignore and rebuild the directory cache")
+    parser_upd.add_argument("--path", dest="paths", action="append", default=None,
+                            help="Stage only .agents/ and this path (repeatable; default: every changed path)")
+
+    # task
+    parser_task = subparsers.add_parser("task", help="Query and manage tasks")
+    task_sub = parser_task.add_subparsers(dest="task_command", help="Task command to run")
+    parser_task_list = task_sub.add_parser("list", help="List tasks as JSON")
+    parser_task_list.add_argument("--root", default=None, help="Project root directory (default: current)")
+    parser_task_list.add_argument("--module", default=None, help="Only tasks of this module")
+    parser_task_list.add_argument("--status", choices=["todo", "doing", "done", "blocked"], default=None,
+                                  help="Only tasks with this status")
+    parser_task_list.add_argument("--id", dest="task_id", default=None, help="Only the task with this id")
+    parser_task_ready = task_sub.add_parser("ready", help="List claimable queue entries in scheduling order")
+    parser_task_ready.add_argument("--root", default=None, help="Project root directory (default: current)")
+    parser_task_ready.add_argument("--limit", type=int, default=None, help="Only the first N entries")
+    parser_task_claim = task_sub.add_parser("claim", help="Move the next todo task to doing and print it")
+    parser_task_claim.add_argument("--root", default=None, help="Project root directory (default: current)")
+    parser_task_claim.add_argument("--module", default=None, help="Only claim tasks of this module")
+    parser_task_claim.add_argument("--agent", default=None, help="Name recorded as the task's claimed_by")
+
+    # query
+    parser_query = subparsers.add_parser("query", help="Look up tasks or queue entries in the derived task database")
+    parser_query.add_argument("--root", default=None, help="Project root directory (default: current)")
+    parser_query.add_argument("--module", default=None, help="Only tasks of this module")
+    parser_query.add_argument("--status", choices=["todo", "doing", "done", "blocked"], default=None,
+                              help="Only tasks with this status")
+    parser_query.add_argument("--id", dest="task_id", default=None, help="Only the task with this id")
+    parser_query.add_argument("--ref", default=None, help="Only tasks referencing this file or directory")
+    parser_query.add_argument("--queue", action="store_true", help="Query priorities.json queue entries instead")
+
+    # migrate-slugs
+    parser_mig = subparsers.add_parser("migrate-slugs",
+                                       help="Rename index modules to path-derived names, moving their task files")
+    parser_mig.add_argument("--root", default=None, help="Project root directory (default: current)")
+    parser_mig.add_argument("--dry-run", action="store_true", help="Only print the renames")
+
+    # merge-driver (invoked by git, see 'agents init')
+    parser_merge = subparsers.add_parser("merge-driver", help="Three-way merge of a .agents JSON file (git merge driver)")
+    parser_merge.add_argument("base", help="Common ancestor version (%%O)")
+    parser_merge.add_argument("ours", help="Current version; receives the result (%%A)")
+    parser_merge.add_argument("theirs", help="Other branch's version (%%B)")
+    parser_merge.add_argument("name", nargs="?", default=None, help="Path of the file being merged (%%P)")
+
+    # serve
+    parser_serve = subparsers.add_parser("serve", help="Run a daemon that answers scan/validate/task queries")
+    parser_serve.add_argument("--root", default=None, help="Project root directory (default: current)")
+
+    for sub in [*subparsers.choices.values(), *task_sub.choices.values()]:
+        if sub is not parser_task:
+            _add_instrumentation_args(sub)
 
     args = parser.parse_args()
 
     # Determine Root
     root_dir = Path.cwd()
-    if args.root:
+    if getattr(args, "root", None):
         root_dir = Path(args.root).resolve()
 
+    if getattr(args, "timings", None) is None and getattr(args, "profile", None) is None \
+            and not getattr(args, "trace_memory", False):
+        run_command(args, parser, root_dir)
+        return
+    from agents_core.timing import instrument
+    command = " ".join(filter(None, [args.command, getattr(args, "task_command", None)]))
+    report_path = args.timings or ("-" if args.trace_memory else None)
+    with instrument(command, report_path, args.profile, args.trace_memory):
+        run_command(args, parser, root_dir)
+
+def run_command(args, parser, root_dir):
+    """Runs the parsed subcommand."""
     if args.command == "init":
-        install(root_dir)
+        from agents_core.install import install
+        from agents_core.scan import scan
+        from agents_core.timing import stage
+        with stage("install"):
+            install(root_dir)
         # Auto-scan after init
         scan(root_dir, refresh_index=True)
+    elif args.command == "scan" and args.watch:
+        from agents_core.watch import watch
+        watch(root_dir, interval=args.interval)
     elif args.command == "scan":
-        scan(root_dir, refresh_index=args.refresh_index)
+        scan_args = {"refresh_index": args.refresh_index, "use_cache": not args.no_cache,
+                     "source": args.source, "include_untracked": args.untracked,
+                     "metrics": args.metrics, "lines": args.lines, "sample_bytes": args.sample_bytes}
+        if not run_via_daemon(root_dir, "scan", scan_args):
+            from agents_core.scan import scan
+            scan(root_dir, **scan_args)
     elif args.command == "validate":
-        scan(root_dir, validate_only=True)
+        val_args = {"jobs": args.jobs, "use_cache": not args.no_cache, "format": args.format,
+                    "stream": args.stream, "refs": args.refs}
+        if not run_via_daemon(root_dir, "validate", val_args):
+            from agents_core.timing import stage
+            from agents_core.validate import STREAM_THRESHOLD, print_report, validate_project
+            with stage("validate"):
+                report = validate_project(root_dir, jobs=args.jobs, use_cache=not args.no_cache,
+                                          stream_threshold=0 if args.stream else STREAM_THRESHOLD, refs=args.refs)
+            print_report(report, args.format)
+            if not report["ok"]:
+                sys.exit(1)
+    elif args.command == "task" and args.task_command == "list":
+        query = {"module": args.module, "status": args.status, "task_id": args.task_id}
+        if not run_via_daemon(root_dir, "tasks", query):
+            from agents_core.tasks import list_tasks
+            print(json.dumps(list_tasks(root_dir, **query), indent=2, ensure_ascii=False))
+    elif args.command == "task" and args.task_command == "ready":
+        from agents_core.tasks import ready_tasks
+        scheduler, ready = ready_tasks(root_dir, limit=args.limit)
+        if scheduler is not None:
+            for cycle in scheduler.cycles():
+                print(f"[task][WARN] dependency cycle among: {', '.join(cycle)}", file=sys.stderr)
+            for task_id, dep in scheduler.missing:
+                print(f"[task][WARN] {task_id} is blocked by unknown task {dep}", file=sys.stderr)
+        print(json.dumps(ready, indent=2, ensure_ascii=False))
+    elif args.command == "task" and args.task_command == "claim":
+        # Claims write under file locks, so they run here rather than in the daemon.
+        from agents_core.tasks import claim_next
+        task = claim_next(root_dir, agent=args.agent, module=args.module)
+        if task is None:
+            print("[task] nothing to claim", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(task, indent=2, ensure_ascii=False))
+    elif args.command == "query":
+        from agents_core.taskdb import query
+        print(json.dumps(query(root_dir, module=args.module, status=args.status, task_id=args.task_id,
+                               ref=args.ref, queue=args.queue), indent=2, ensure_ascii=False))
+    elif args.command == "migrate-slugs":
+        from agents_core.slugs import migrate
+        renamed = migrate(root_dir, dry_run=args.dry_run)
+        for old, new in renamed:
+            print(f"[migrate] {old} -> {new}")
+        verb = "would rename" if args.dry_run else "renamed"
+        print(f"[migrate] {verb} {len(renamed)} module(s)")
+    elif args.command == "merge-driver":
+        from agents_core.merge import merge_driver
+        sys.exit(merge_driver(args.base, args.ours, args.theirs, args.name))
+    elif args.command == "serve":
+        from agents_core.serve import serve
+        serve(root_dir)
     elif args.command == "update":
-        update(root_dir)
+        from agents_core.update import update
+        update(root_dir, use_cache=not args.no_cache, paths=args.paths)
     else:
         parser.print_help()
         sys.exit(1)
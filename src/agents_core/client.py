@@ -0,0 +1,66 @@
+"""Client side of the ``agents serve`` daemon.
+
+Kept free of heavy imports so the CLI can probe for a running daemon
+before deciding whether to do the work in-process.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import tempfile
+from pathlib import Path
+
+from agents_core import __version__
+
+# Set to any non-empty value to always work in-process.
+NO_DAEMON_ENV = "AGENTS_NO_DAEMON"
+
+# Seconds to wait for a response before working in-process instead, so that
+# a hung daemon cannot block the CLI.
+REQUEST_TIMEOUT = 60.0
+
+# AF_UNIX paths are limited to ~108 bytes on Linux (104 on macOS).
+_MAX_SOCKET_PATH = 100
+
+
+def socket_path(project_root: Path) -> str:
+    """Returns the daemon socket path for a project."""
+    path = str(project_root / ".agents" / "cache" / "serve.sock")
+    if len(path) <= _MAX_SOCKET_PATH:
+        return path
+    digest = hashlib.sha1(str(project_root).encode("utf-8")).hexdigest()[:16]
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(tempfile.gettempdir(), f"agents-{uid}-{digest}.sock")
+
+
+def request(project_root: Path, op: str, args=None, timeout=REQUEST_TIMEOUT):
+    """Sends one request to the project's daemon.
+
+    Returns:
+        The decoded response, or None when no compatible daemon is
+        running or it does not answer within ``timeout`` seconds, in which
+        case the caller should do the work itself.
+    """
+    if os.environ.get(NO_DAEMON_ENV) or not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path(project_root)
+    if not os.path.exists(path):
+        return None
+    payload = json.dumps({"version": __version__, "op": op, "args": args or {}}).encode("utf-8") + b"\n"
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(payload)
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    try:
+        response = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(response, dict) or not response.get("ok"):
+        return None
+    return response
@@ -0,0 +1,340 @@
+"""Module discovery engine.
+
+Walks the conventional source roots of a project with a single ``os.scandir``
+pass per directory and yields every directory that directly contains code.
+With a ``DirCache`` the walk becomes incremental: a directory whose mtime and
+inode are unchanged since the last scan is classified from the cache with a
+single ``stat`` instead of being listed again. ``iter_git_code_dirs`` derives
+the same tree from ``git ls-files`` instead of touching the filesystem.
+Given a ``metrics.MetricsCollector``, every walker also measures the code
+files of each code directory from the names it has already seen.
+"""
+
+import os
+import subprocess
+import time
+from pathlib import Path
+
+from agents_core import timing
+from agents_core.cache import load_cache, save_cache
+
+# Directories under the project root that are searched for modules.
+DISCOVERY_ROOTS = ("src", "app", "apps", "packages", "services", "modules")
+
+# File suffixes that mark a directory as holding code.
+CODE_SUFFIXES = frozenset({
+    ".py", ".ts", ".tsx", ".js", ".jsx", ".go", ".rs", ".swift", ".kt", ".java",
+})
+
+
+def _is_code_file(name: str) -> bool:
+    dot = name.rfind(".")
+    # A leading dot marks a hidden file, not a suffix (matches Path.suffix).
+    return dot > 0 and name[dot:] in CODE_SUFFIXES
+
+
+def _list_dir(path: str, rel: str, ignore):
+    """Reads a directory once and classifies it.
+
+    Returns:
+        A ``(code_files, subdirs, ignore, has_gitignore)`` tuple; see
+        ``_classify_entries``.
+    """
+    code_files = []
+    dirs = []
+    has_gitignore = False
+    timing.count("dirs_listed")
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        dirs.append((entry.name, entry.is_symlink()))
+                    elif entry.is_file():
+                        if entry.name == ".gitignore":
+                            has_gitignore = True
+                        elif _is_code_file(entry.name):
+                            code_files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    dirs.sort()
+    return _classify_entries(path, rel, ignore, code_files, dirs, has_gitignore)
+
+
+def _classify_entries(path: str, rel: str, ignore, code_files, dirs, has_gitignore):
+    """Applies ignore rules to one directory's listing.
+
+    Returns:
+        A ``(code_files, subdirs, ignore, has_gitignore)`` tuple.
+        ``code_files`` lists the code files that are not ignored, so it is
+        empty exactly when the directory has no code. ``subdirs`` holds a
+        ``(path, rel, is_link)`` triple for every child directory
+        that is not ignored, in the order of ``dirs``, and ``ignore`` is the
+        matcher that applies to those children (extended with this
+        directory's ``.gitignore``).
+    """
+    prefix = rel + "/"
+    if ignore is None:
+        subdirs = [(os.path.join(path, name), prefix + name, is_link) for name, is_link in dirs]
+        return code_files, subdirs, ignore, has_gitignore
+
+    if has_gitignore:
+        ignore = ignore.with_gitignore(rel, os.path.join(path, ".gitignore"))
+    code_files = [name for name in code_files if not ignore.is_ignored(prefix + name, False)]
+    subdirs = [
+        (os.path.join(path, name), prefix + name, is_link)
+        for name, is_link in dirs
+        if not ignore.is_ignored(prefix + name, True)
+    ]
+    return code_files, subdirs, ignore, has_gitignore
+
+
+def _file_sig(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _cached_files(entry):
+    # Entries written before metrics existed have no file records.
+    return entry[5] if len(entry) > 5 else None
+
+
+class DirCache:
+    """Per-directory classification results persisted between scans.
+
+    Entries are keyed by project-relative path and hold
+    ``[mtime_ns, inode, has_code, children, gitignore_sig, files]`` where
+    ``children`` lists the ``[name, is_link]`` pairs that survived ignore
+    filtering and ``files`` holds the code file records of the last walk
+    that collected metrics (None otherwise). A directory's mtime changes whenever an entry is added,
+    removed or renamed in it, so an unchanged ``(mtime, inode)`` means the
+    cached classification still holds.
+    """
+
+    NAME = "discovery.json"
+
+    # Directories modified this close to the scan are not trusted next time,
+    # since a later change within the same timestamp tick would go unseen.
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, entries=None, key=""):
+        self.key = key
+        self.old = entries or {}
+        self.new = {}
+        self.hits = 0
+        self.misses = 0
+        self.remeasured = False
+        self._started_ns = time.time_ns()
+
+    @classmethod
+    def load(cls, project_root: Path, ignore=None) -> "DirCache":
+        """Loads the cache written for the same version and ignore rules."""
+        key = ignore.fingerprint if ignore is not None else "no-ignore"
+        entries = load_cache(project_root, cls.NAME, key)
+        return cls(entries if isinstance(entries, dict) else None, key)
+
+    def save(self, project_root: Path):
+        """Persists the entries seen in this walk if anything changed."""
+        if self.misses or self.remeasured or len(self.new) != len(self.old):
+            save_cache(project_root, self.NAME, self.key, self.new)
+
+    def classify(self, path: str, rel: str, ignore, trusted: bool, metrics=None):
+        """Classifies a directory, listing it only when the cache is stale.
+
+        ``trusted`` is False below a directory whose ``.gitignore`` changed,
+        because cached child filtering may no longer match the rules. With
+        ``metrics``, a code directory is measured from its cached file
+        records, and listed only if the last walk collected none.
+
+        Returns:
+            ``_list_dir``'s first three values plus the ``trusted`` flag
+            for the children.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False, [], ignore, trusted
+        entry = self.old.get(rel)
+        if (trusted and entry is not None
+                and entry[0] == st.st_mtime_ns and entry[1] == st.st_ino
+                and (metrics is None or not entry[2] or _cached_files(entry) is not None)):
+            gitignore = os.path.join(path, ".gitignore")
+            if entry[4] is None or _file_sig(gitignore) == entry[4]:
+                self.hits += 1
+                timing.count("dirs_cached")
+                if metrics is not None and entry[2]:
+                    files = metrics.record(path, rel, [r[0] for r in entry[5]], entry[5])
+                    self.remeasured = self.remeasured or files != entry[5]
+                    entry = entry[:5] + [files]
+                self.new[rel] = entry
+                if entry[4] is not None and ignore is not None:
+                    ignore = ignore.with_gitignore(rel, gitignore)
+                prefix = rel + "/"
+                subdirs = [(os.path.join(path, name), prefix + name, is_link)
+                           for name, is_link in entry[3]]
+                return entry[2], subdirs, ignore, True
+
+        self.misses += 1
+        code_files, subdirs, child_ignore, has_gitignore = _list_dir(path, rel, ignore)
+        files = None
+        if metrics is not None and code_files:
+            files = metrics.record(path, rel, code_files, _cached_files(entry) if entry is not None else None)
+        sig = _file_sig(os.path.join(path, ".gitignore")) if has_gitignore else None
+        mtime = st.st_mtime_ns
+        if mtime >= self._started_ns - self.RACY_WINDOW_NS:
+            mtime = 0
+        cut = len(rel) + 1
+        self.new[rel] = [mtime, st.st_ino, bool(code_files),
+                         [[sub_rel[cut:], is_link] for _, sub_rel, is_link in subdirs], sig, files]
+        child_trusted = trusted and entry is not None and entry[4] == sig
+        return bool(code_files), subdirs, child_ignore, child_trusted
+
+
+def _fs_classifier(cache, metrics):
+    if cache is not None:
+        return lambda path, rel, ignore, trusted: cache.classify(path, rel, ignore, trusted, metrics)
+
+    def classify(path, rel, ignore, trusted):
+        code_files, subdirs, child_ignore, _ = _list_dir(path, rel, ignore)
+        if metrics is not None and code_files:
+            metrics.record(path, rel, code_files)
+        return bool(code_files), subdirs, child_ignore, trusted
+    return classify
+
+
+def _walk(subdirs, ignore, classify, trusted):
+    """Yields code directories below a parent whose children are ``subdirs``.
+
+    Children are reported in name order before any grandchild, so every
+    discovery source yields the same sequence for the same tree. Ignored
+    children never reach this point, so their subtrees are not listed at all.
+    """
+    pending = []
+    for path, rel, is_link in subdirs:
+        has_code, children, child_ignore, child_trusted = classify(path, rel, ignore, trusted)
+        if has_code:
+            yield rel
+        # Symlinked directories are classified but never descended.
+        if not is_link:
+            pending.append((children, child_ignore, child_trusted))
+    for children, child_ignore, child_trusted in pending:
+        yield from _walk(children, child_ignore, classify, child_trusted)
+
+
+def _iter_roots(project_root: Path, ignore, classify, exists):
+    root = str(project_root)
+    for rel in DISCOVERY_ROOTS:
+        if not exists(rel):
+            continue
+        if ignore is not None and ignore.is_ignored(rel, True):
+            continue
+        _, children, child_ignore, trusted = classify(os.path.join(root, rel), rel, ignore, True)
+        for path in _walk(children, child_ignore, classify, trusted):
+            yield Path(path)
+
+
+def iter_code_dirs(project_root: Path, ignore=None, cache=None, metrics=None):
+    """Yields the project-relative path of every directory containing code.
+
+    Only the directories listed in ``DISCOVERY_ROOTS`` are searched and each
+    directory is listed at most once. When an ``IgnoreMatcher`` is given,
+    ignored directories are pruned and ignored files do not count as code.
+    When a ``DirCache`` is given, unchanged directories are not listed.
+    When a ``MetricsCollector`` is given, each yielded directory has been
+    measured by the time it is yielded.
+    """
+    root = str(project_root)
+    exists = lambda rel: os.path.isdir(os.path.join(root, rel))
+    return _iter_roots(project_root, ignore, _fs_classifier(cache, metrics), exists)
+
+
+class GitListingError(Exception):
+    """Raised when ``git ls-files`` cannot produce a path list."""
+
+
+def git_ls_files(project_root: Path, include_untracked: bool = False):
+    """Returns the ``/``-separated paths git knows about below ``project_root``.
+
+    Args:
+        project_root: Directory to list; paths are relative to it.
+        include_untracked: Also list untracked files that are not excluded
+            by the standard ignore sources (``--others --exclude-standard``).
+    """
+    cmd = ["git", "ls-files", "-z", "--cached"]
+    if include_untracked:
+        cmd += ["--others", "--exclude-standard"]
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(cmd, cwd=project_root, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        raise GitListingError(stderr.decode("utf-8", "replace").strip() or str(e)) from e
+    finally:
+        timing.subprocess_call("git", time.perf_counter() - start)
+    return [p for p in result.stdout.decode("utf-8", "surrogateescape").split("\0") if p]
+
+
+class _GitTree:
+    """In-memory directory tree derived from a flat path list."""
+
+    def __init__(self, paths):
+        roots = set(DISCOVERY_ROOTS)
+        # rel dir -> [file names, child dir names]
+        self.dirs = {}
+        for path in paths:
+            if path.split("/", 1)[0] not in roots:
+                continue
+            parent, _, name = path.rpartition("/")
+            node = self.dirs.get(parent)
+            if node is None:
+                node = self.dirs[parent] = [[], set()]
+                self._link(parent)
+            node[0].append(name)
+
+    def _link(self, rel):
+        # Registers rel with each ancestor until one already knows its child.
+        while rel:
+            parent, _, name = rel.rpartition("/")
+            node = self.dirs.get(parent)
+            if node is None:
+                node = self.dirs[parent] = [[], set()]
+                node[1].add(name)
+                rel = parent
+                continue
+            node[1].add(name)
+            return
+
+    def exists(self, rel: str) -> bool:
+        return rel in self.dirs
+
+    def classify(self, path, rel, ignore, trusted, metrics=None):
+        files, children = self.dirs.get(rel, ((), ()))
+        code_files = [name for name in files if _is_code_file(name)]
+        dirs = [(name, False) for name in sorted(children)]
+        code_files, subdirs, child_ignore, _ = _classify_entries(
+            path, rel, ignore, code_files, dirs, ".gitignore" in files)
+        if metrics is not None and code_files:
+            metrics.record(path, rel, code_files)
+        return bool(code_files), subdirs, child_ignore, trusted
+
+
+def iter_git_code_dirs(project_root: Path, ignore=None, include_untracked: bool = False, metrics=None):
+    """Like ``iter_code_dirs`` but derives the tree from ``git ls-files``.
+
+    One subprocess replaces the directory listings, and untracked build
+    output is skipped automatically. Ignore rules and traversal order are
+    the same as the filesystem walker, so on a clean checkout both yield
+    the same sequence. Symlinks and submodules are seen by git as single
+    entries and are therefore never classified as module directories.
+
+    Raises:
+        GitListingError: If git is unavailable or the root is not a checkout.
+    """
+    tree = _GitTree(git_ls_files(project_root, include_untracked))
+    classify = lambda path, rel, ignore, trusted: tree.classify(path, rel, ignore, trusted, metrics)
+    return _iter_roots(project_root, ignore, classify, tree.exists)
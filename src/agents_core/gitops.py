@@ -0,0 +1,324 @@
+"""Git operations for ``agents update``.
+
+Every git invocation goes through ``GitRepo.run`` (or ``run_async`` for
+calls that overlap local work, such as ``fetch``), which records how many
+calls were made and how long they took, so the update summary can report
+the time spent in git. Work-tree state comes from a single
+``git status --porcelain=v2 -z --branch`` call, and staging is limited to
+explicit pathspecs so git never has to walk the whole checkout twice.
+"""
+
+import asyncio
+import random
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from agents_core import timing
+
+STATUS_CMD = ["status", "--porcelain=v2", "-z", "--branch", "--untracked-files=normal"]
+
+# Push retry schedule: attempt n waits about BASE * 2**(n-1) seconds, capped.
+PUSH_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+# Rebases onto a moved remote before giving up; these do not sleep.
+MAX_REBASES = 10
+
+# Markers in 'git push' stderr meaning the remote has commits we lack.
+_REJECTED_BEHIND = ("non-fast-forward", "fetch first")
+
+
+class GitError(Exception):
+    """Raised when a git command exits with a non-zero status."""
+
+    def __init__(self, cmd, returncode, stderr):
+        super().__init__(f"git {' '.join(cmd)} failed ({returncode}): {stderr.strip()}")
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class StatusEntry:
+    """One changed path from ``git status``.
+
+    Attributes:
+        xy: The two-letter staged/unstaged state (``.`` for unchanged,
+            ``??`` for untracked).
+        path: Path relative to the repository root.
+        orig_path: The source path of a rename or copy, else None.
+    """
+
+    def __init__(self, xy: str, path: str, orig_path=None):
+        self.xy = xy
+        self.path = path
+        self.orig_path = orig_path
+
+    @property
+    def staged(self) -> bool:
+        return self.xy[0] not in ".?"
+
+    @property
+    def unmerged(self) -> bool:
+        return "U" in self.xy or self.xy in ("AA", "DD")
+
+    def paths(self):
+        return [self.path] if self.orig_path is None else [self.path, self.orig_path]
+
+
+class Status:
+    """Branch and work-tree state parsed from porcelain v2 output."""
+
+    def __init__(self):
+        self.branch = None
+        self.upstream = None
+        self.ahead = 0
+        self.behind = 0
+        self.entries = []
+
+    @classmethod
+    def parse(cls, output: bytes) -> "Status":
+        status = cls()
+        records = output.decode("utf-8", "surrogateescape").split("\0")
+        i = 0
+        while i < len(records):
+            rec = records[i]
+            i += 1
+            if not rec:
+                continue
+            kind = rec[0]
+            if kind == "#":
+                key, _, value = rec[2:].partition(" ")
+                if key == "branch.head":
+                    status.branch = None if value == "(detached)" else value
+                elif key == "branch.upstream":
+                    status.upstream = value
+                elif key == "branch.ab":
+                    ahead, behind = value.split()
+                    status.ahead, status.behind = int(ahead), -int(behind)
+            elif kind == "1":
+                fields = rec.split(" ", 8)
+                status.entries.append(StatusEntry(fields[1], fields[8]))
+            elif kind == "2":
+                # A rename/copy record is followed by its source path.
+                fields = rec.split(" ", 9)
+                status.entries.append(StatusEntry(fields[1], fields[9], records[i]))
+                i += 1
+            elif kind == "u":
+                fields = rec.split(" ", 10)
+                status.entries.append(StatusEntry(fields[1], fields[10]))
+            elif kind == "?":
+                status.entries.append(StatusEntry("??", rec[2:]))
+        return status
+
+
+def in_scope(path: str, scope) -> bool:
+    """Returns True if ``path`` equals or lies below one of ``scope``."""
+    for prefix in scope:
+        prefix = prefix.rstrip("/")
+        if path == prefix or path.startswith(prefix + "/"):
+            return True
+    return False
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP, rand=random.random) -> float:
+    """Returns the wait before retry ``attempt`` (1-based), with equal jitter.
+
+    Half of the exponential delay is fixed and half is random, so concurrent
+    clients spread out without any retry firing almost immediately.
+    """
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + rand() * delay / 2
+
+
+def _find_prefix(project_root: Path) -> str:
+    """Returns ``project_root`` relative to its work-tree top, found without git."""
+    root = project_root.resolve()
+    for top in (root, *root.parents):
+        if (top / ".git").exists():
+            rel = root.relative_to(top).as_posix()
+            return "" if rel == "." else rel + "/"
+    return ""
+
+
+class GitRepo:
+    """Runs git commands in one work tree and accounts for their cost.
+
+    Paths passed to and returned from this class are relative to the top of
+    the work tree, as in ``git status --porcelain`` output; ``top_path``
+    converts paths relative to ``project_root``.
+    """
+
+    def __init__(self, project_root: Path):
+        self.project_root = project_root
+        self.prefix = _find_prefix(project_root)
+        self.calls = 0
+        self.elapsed = 0.0
+        # Calls may run on a worker thread and the event loop at once.
+        self._lock = threading.Lock()
+
+    def top_path(self, rel: str) -> str:
+        return self.prefix + rel
+
+    def run(self, *args, input=None, check=True) -> subprocess.CompletedProcess:
+        """Runs ``git <args>``, returning raw stdout/stderr bytes.
+
+        Raises:
+            GitError: If ``check`` is set and git exits non-zero.
+        """
+        cmd = list(args)
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(["git", *cmd], cwd=self.project_root, input=input, capture_output=True)
+        finally:
+            self._account(start)
+        return self._checked(cmd, result, check)
+
+    async def run_async(self, *args, check=True) -> subprocess.CompletedProcess:
+        """Like ``run``, as an asyncio subprocess so other work can overlap it.
+
+        Cancelling the call kills the git process.
+        """
+        cmd = list(args)
+        start = time.perf_counter()
+        try:
+            proc = await asyncio.create_subprocess_exec("git", *cmd, cwd=str(self.project_root),
+                                                        stdin=subprocess.DEVNULL,
+                                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            try:
+                stdout, stderr = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                raise
+        finally:
+            self._account(start)
+        return self._checked(cmd, subprocess.CompletedProcess(["git", *cmd], proc.returncode, stdout, stderr), check)
+
+    def _account(self, start):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.elapsed += elapsed
+        timing.subprocess_call("git", elapsed)
+
+    def _checked(self, cmd, result, check):
+        if check and result.returncode != 0:
+            raise GitError(cmd, result.returncode, result.stderr.decode("utf-8", "replace"))
+        return result
+
+    def status(self) -> Status:
+        """Returns branch and work-tree state; fails outside a work tree."""
+        return Status.parse(self.run(*STATUS_CMD).stdout)
+
+    def stage(self, paths):
+        """Stages additions, modifications and deletions under ``paths`` only."""
+        if not paths:
+            return
+        # Literal, top-relative pathspecs read from stdin: no glob surprises
+        # and no argv limit, wherever in the work tree the project lives.
+        spec = "\0".join(":(top,literal)" + p for p in paths).encode("utf-8", "surrogateescape")
+        self.run("add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul", input=spec)
+
+    def has_staged_changes(self) -> bool:
+        """Returns True if the index differs from HEAD."""
+        return self.run("diff", "--cached", "--quiet", check=False).returncode != 0
+
+    def commit(self, *messages):
+        args = ["commit", "--quiet"]
+        for message in messages:
+            args += ["-m", message]
+        self.run(*args)
+
+    async def fetch(self) -> subprocess.CompletedProcess:
+        """Fetches the current branch's remote; failures are returned, not raised."""
+        return await self.run_async("fetch", "--quiet", check=False)
+
+    def ahead_behind(self):
+        """Returns ``(ahead, behind)`` of HEAD against its upstream ref.
+
+        Returns None if either side does not exist yet, e.g. before the first
+        push to an empty remote.
+        """
+        result = self.run("rev-list", "--left-right", "--count", "HEAD...@{upstream}", check=False)
+        if result.returncode != 0:
+            return None
+        ahead, behind = result.stdout.split()
+        return int(ahead), int(behind)
+
+    def rebase_onto_upstream(self):
+        """Rebases local commits onto the already fetched upstream ref.
+
+        Raises:
+            GitError: If the rebase fails; it is aborted first.
+        """
+        result = self.run("rebase", "--autostash", "--quiet", "@{upstream}", check=False)
+        if result.returncode != 0:
+            self.run("rebase", "--abort", check=False)
+            self._checked(["rebase", "--autostash", "@{upstream}"], result, True)
+
+    def push(self) -> subprocess.CompletedProcess:
+        return self.run("push", check=False)
+
+    def pull_rebase(self) -> subprocess.CompletedProcess:
+        return self.run("pull", "--rebase", "--autostash", check=False)
+
+    def summary(self) -> str:
+        return f"{self.calls} call(s), {self.elapsed * 1000:.1f}ms"
+
+
+def push_with_retry(repo: GitRepo, log, retries: int = PUSH_RETRIES, sleep=None, rand=random.random,
+                    max_rebases: int = MAX_REBASES) -> bool:
+    """Pushes, rebasing onto the remote when rejected and backing off otherwise.
+
+    A rejection because the remote moved is answered with an immediate
+    ``pull --rebase`` and another push; with a merge driver installed this
+    is the normal outcome of concurrent updates, so it does not use up one
+    of the ``retries``, only one of ``max_rebases``. Any other failure
+    waits ``backoff_delay``.
+
+    Args:
+        repo: The repository to push.
+        log: A logger for progress messages.
+        retries: Push attempts that may fail for reasons other than the
+            remote having moved.
+        sleep: Called with the delay in seconds between attempts
+            (default: ``time.sleep``).
+        rand: Source of jitter in [0, 1).
+        max_rebases: Rebases allowed before giving up.
+
+    Returns:
+        True once a push succeeded, False if every attempt failed.
+
+    Raises:
+        GitError: If an automatic rebase fails.
+    """
+    sleep = sleep or time.sleep
+    attempt = rebases = 0
+    while True:
+        result = repo.push()
+        if result.returncode == 0:
+            log.info("Pushed successfully.")
+            return True
+
+        stderr = result.stderr.decode("utf-8", "replace")
+        if any(marker in stderr for marker in _REJECTED_BEHIND) and rebases < max_rebases:
+            rebases += 1
+            log.info(f"Remote has new commits (rebase {rebases}/{max_rebases}). "
+                     "Attempting 'git pull --rebase --autostash'...")
+            pull = repo.pull_rebase()
+            if pull.returncode != 0:
+                raise GitError(["pull", "--rebase", "--autostash"], pull.returncode,
+                               pull.stderr.decode("utf-8", "replace"))
+            log.info("Rebase completed. Retrying push immediately...")
+            continue
+
+        attempt += 1
+        log.warning(f"Push failed (attempt {attempt}/{retries}).")
+        if attempt >= retries:
+            return False
+        delay = backoff_delay(attempt, rand=rand)
+        log.info(f"Retrying in {delay:.1f}s...")
+        sleep(delay)
@@ -0,0 +1,236 @@
+"""Ignore rules for module discovery.
+
+Implements the subset of ``.gitignore`` semantics needed to prune subtrees
+while walking: comments, negation, directory-only patterns, anchoring and
+``*``/``?``/``[...]``/``**`` wildcards. Rules come from a built-in deny list,
+``.git/info/exclude``, every ``.gitignore`` met during the walk and an
+optional ``.agents/ignore`` file, in increasing order of precedence.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+# Build output, dependency caches and VCS metadata that never hold modules.
+BUILTIN_IGNORES = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "node_modules/",
+    ".venv/",
+    "venv/",
+    "__pycache__/",
+    ".tox/",
+    ".nox/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    "target/",
+    "dist/",
+)
+
+AGENTS_IGNORE_FILE = ".agents/ignore"
+
+
+def _translate(pat: str) -> str:
+    """Translates a gitignore glob (without anchoring) into a regex body."""
+    res = []
+    i, n = 0, len(pat)
+    while i < n:
+        c = pat[i]
+        if c == "*":
+            if pat.startswith("**", i):
+                j = i + 2
+                at_start = i == 0 or pat[i - 1] == "/"
+                at_end = j == n or pat[j] == "/"
+                if at_start and at_end:
+                    if j == n:
+                        res.append(".*")
+                    else:
+                        # "**/" matches zero or more leading directories.
+                        res.append("(?:.*/)?")
+                        j += 1
+                    i = j
+                    continue
+                i = j
+                res.append("[^/]*")
+                continue
+            res.append("[^/]*")
+        elif c == "?":
+            res.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pat[j] in "!^":
+                j += 1
+            if j < n and pat[j] == "]":
+                j += 1
+            while j < n and pat[j] != "]":
+                j += 1
+            if j >= n:
+                res.append("\\[")
+            else:
+                body = pat[i + 1:j]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                res.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            res.append(re.escape(pat[i]))
+        else:
+            res.append(re.escape(c))
+        i += 1
+    return "".join(res)
+
+
+def parse_rules(text: str):
+    """Parses gitignore text into ``(regex, negate, dir_only)`` tuples."""
+    rules = []
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        # Trailing spaces are ignored unless escaped.
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+        if not line:
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        body = _translate(line)
+        if not anchored:
+            body = "(?:.*/)?" + body
+        try:
+            rules.append((re.compile(f"^{body}$", re.DOTALL), negate, dir_only))
+        except re.error:
+            continue
+    return rules
+
+
+class _RuleSet:
+    """Rules from one source, applied to paths below ``base``."""
+
+    __slots__ = ("base", "prefix", "rules")
+
+    def __init__(self, base: str, rules):
+        self.base = base
+        self.prefix = base + "/" if base else ""
+        self.rules = rules
+
+    def match(self, path: str, is_dir: bool):
+        """Returns True/False when a rule decides ``path``, else None."""
+        if self.prefix:
+            if not path.startswith(self.prefix):
+                return None
+            path = path[len(self.prefix):]
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path):
+                return not negate
+        return None
+
+
+class IgnoreMatcher:
+    """Decides whether a project-relative path is ignored.
+
+    Matchers are immutable; entering a directory that holds a ``.gitignore``
+    yields a child matcher via ``with_gitignore`` so sibling subtrees never
+    see each other's rules. The only state a family of matchers shares is
+    the record of every ``.gitignore`` read through it, so that the root's
+    ``summary()`` lists the files the walk found.
+    """
+
+    def __init__(self, builtin, sets, override, sources, fingerprint="", seen=None):
+        self.builtin = builtin
+        self._sets = sets
+        self._override = override
+        # Files whose rules are in effect for this matcher.
+        self._sources = tuple(sources)
+        self._seen = set() if seen is None else seen
+        # Digest of the root-level rule sources, used to key caches.
+        self.fingerprint = fingerprint
+
+    def with_gitignore(self, base: str, path) -> "IgnoreMatcher":
+        try:
+            text = Path(path).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return self
+        rules = parse_rules(text)
+        name = f"{base}/.gitignore" if base else ".gitignore"
+        self._seen.add(name)
+        if not rules:
+            return self
+        return IgnoreMatcher(self.builtin, self._sets + (_RuleSet(base, rules),),
+                             self._override, self._sources + (name,), self.fingerprint, self._seen)
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """Checks a ``/``-separated path relative to the project root."""
+        if self._override is not None:
+            decision = self._override.match(path, is_dir)
+            if decision is not None:
+                return decision
+        for rule_set in reversed(self._sets):
+            decision = rule_set.match(path, is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def summary(self) -> dict:
+        """Describes the rules in effect, for recording in the index."""
+        return {
+            "builtin": list(self.builtin),
+            "files": sorted(self._seen.union(self._sources)),
+        }
+
+
+def load_ignore_rules(project_root: Path, builtin=BUILTIN_IGNORES) -> IgnoreMatcher:
+    """Builds the root matcher for a project.
+
+    Nested ``.gitignore`` files are picked up by the walker as it enters
+    each directory; the root ``.gitignore`` is loaded here.
+    """
+    sources = []
+    texts = ["\n".join(builtin)]
+    sets = (_RuleSet("", parse_rules(texts[0])),)
+
+    def read(rel):
+        path = project_root / rel
+        if not path.is_file():
+            return None
+        try:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        texts.append(f"{rel}\0{text}")
+        return text
+
+    exclude = read(".git/info/exclude")
+    if exclude is not None:
+        rules = parse_rules(exclude)
+        if rules:
+            sets += (_RuleSet("", rules),)
+            sources.append(".git/info/exclude")
+
+    override = None
+    agents_ignore = read(AGENTS_IGNORE_FILE)
+    if agents_ignore is not None:
+        override = _RuleSet("", parse_rules(agents_ignore))
+        sources.append(AGENTS_IGNORE_FILE)
+
+    root_gitignore = read(".gitignore")
+    fingerprint = hashlib.sha1("\0\0".join(texts).encode("utf-8")).hexdigest()
+    matcher = IgnoreMatcher(tuple(builtin), sets, override, sources, fingerprint)
+    if root_gitignore is not None:
+        matcher = matcher.with_gitignore("", project_root / ".gitignore")
+    return matcher
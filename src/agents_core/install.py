@@ -1,7 +1,10 @@
 import sys
-import json
 from pathlib import Path
 
+from agents_core.merge import register_merge_driver
+from agents_core.scan import dump_json
+from agents_core.writer import FileWriter
+
 def install(project_root: Path):
     """
     Bootstrap the agent environment in the given project root.
@@ -12,6 +15,8 @@ def install(project_root: Path):
     agents_dir = project_root / ".agents"
     schemas_dir = agents_dir / "schemas"
     schemas_dir.mkdir(parents=True, exist_ok=True)
+    # Re-running init leaves files that already match the package untouched.
+    writer = FileWriter()
     
     # Copy Schemas
     try:
@@ -20,8 +25,8 @@ def install(project_root: Path):
         for item in schema_pkg.iterdir():
             if item.is_file() and item.name.endswith(".json"):
                 dest = schemas_dir / item.name
-                dest.write_bytes(item.read_bytes())
-                print(f"[agents] Copied schema: {item.name}")
+                if writer.write(dest, item.read_bytes()):
+                    print(f"[agents] Copied schema: {item.name}")
     except ImportError:
         print("[agents][ERR] Python 3.9+ required for resource handling.")
         sys.exit(1)
@@ -33,7 +38,7 @@ def install(project_root: Path):
         if agents_md.is_file():
             dest = project_root / "AGENTS.md"
             if not dest.exists():
-                dest.write_bytes(agents_md.read_bytes())
+                writer.write(dest, agents_md.read_bytes(), current=None)
                 print(f"[agents] Copied AGENTS.md to {dest}")
     except Exception as e:
         print(f"[agents][WARN] Could not copy AGENTS.md: {e}")
@@ -46,7 +51,7 @@ def install(project_root: Path):
             if tpl_file.is_file():
                 dest = project_root / filename
                 if not dest.exists():
-                    dest.write_bytes(tpl_file.read_bytes())
+                    writer.write(dest, tpl_file.read_bytes(), current=None)
                     print(f"[agents] Created {filename} from template")
     except Exception as e:
         print(f"[agents][WARN] Could not copy documentation templates: {e}")
@@ -61,9 +66,7 @@ def install(project_root: Path):
             "modules": [],
             "docs": []
         }
-        with open(index_path, "w", encoding="utf-8") as f:
-            json.dump(idx_content, f, indent=2, ensure_ascii=False)
-            f.write("\n")
+        writer.write(index_path, dump_json(idx_content), current=None)
         print("[agents] Created .agents/index.json")
 
     priorities_path = agents_dir / "priorities.json"
@@ -78,9 +81,13 @@ def install(project_root: Path):
             },
             "queue": []
         }
-        with open(priorities_path, "w", encoding="utf-8") as f:
-            json.dump(prio_content, f, indent=2, ensure_ascii=False)
-            f.write("\n")
+        writer.write(priorities_path, dump_json(prio_content), current=None)
         print("[agents] Created .agents/priorities.json")
 
-    print("[agents] Bootstrap complete.")
+    # Let concurrent updates merge control-plane JSON structurally.
+    if register_merge_driver(project_root):
+        print("[agents] Registered the agents-json merge driver (.gitattributes, git config)")
+    else:
+        print("[agents][WARN] Not a git work tree; skipped merge driver registration.")
+
+    print(f"[agents] Bootstrap complete ({writer.summary()}).")
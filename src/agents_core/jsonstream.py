@@ -0,0 +1,155 @@
+"""Incremental reading of a JSON object holding one very large array.
+
+``json.load`` needs the whole document, and then the whole parsed object,
+in memory at once. ``iter_members`` instead reads a file in chunks and
+yields the members of its top-level object one at a time; the members of
+the named array (the ``tasks`` of a ``tasks.json``) are yielded item by
+item. Memory use is then bounded by the largest single item, not by the
+size of the file.
+
+Each value is still decoded by the C scanner behind ``json``, so values
+come out exactly as ``json.load`` would produce them. Syntax errors raise
+``ValueError`` with the same message and position ``json`` reports.
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9eE+\-.]*\Z")
+_decoder = json.JSONDecoder()
+
+# A value cut off by the window fails to decode at most this far before the
+# window's end ("-Infinit"); errors further back are genuine. Unterminated
+# strings are the exception: they fail where the string starts.
+_TRUNCATION_MARGIN = 8
+
+
+class _Reader:
+    """A window over a text file that tracks where the window starts."""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        # Characters, lines and the current column dropped from the window so far.
+        self.offset = 0
+        self.lines = 0
+        self.column = 0
+
+    def fill(self) -> bool:
+        """Drops the consumed text and reads more; False at end of file.
+
+        Reads at least as much as is still pending, so a value that spans
+        many chunks is re-scanned a logarithmic number of times.
+        """
+        consumed = self.buf[:self.pos]
+        newline = consumed.rfind("\n")
+        if newline >= 0:
+            self.lines += consumed.count("\n")
+            self.column = len(consumed) - newline - 1
+        else:
+            self.column += len(consumed)
+        self.offset += self.pos
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self) -> str:
+        """Skips whitespace; returns the next character, or "" at end of file."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars: str, message: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error(message, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                truncated = (e.pos >= len(self.buf) - _TRUNCATION_MARGIN
+                             or e.msg.startswith("Unterminated string"))
+                if self.eof or not truncated:
+                    raise self.error(e.msg, e.pos)
+                # Possibly just cut off by the window; retry with more text.
+                self.fill()
+                continue
+            # A number cut off by the window ("1e" of "1e5") still decodes; retry
+            # whenever the rest of the window could be part of it.
+            if not self.eof and _NUMBER_TAIL.match(self.buf, end):
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+    def error(self, message: str, pos: int) -> ValueError:
+        """Formats ``message`` with the position as ``json.JSONDecodeError`` does."""
+        newline = self.buf.rfind("\n", 0, pos)
+        line = self.lines + self.buf.count("\n", 0, pos) + 1
+        column = pos - newline if newline >= 0 else self.column + pos + 1
+        return ValueError(f"{message}: line {line} column {column} (char {self.offset + pos})")
+
+
+def iter_members(f, array_key: str, chunk_size: int = CHUNK_SIZE):
+    """Yields the top-level members of the JSON document in ``f`` as ``(path, value)``.
+
+    A member ``key`` is yielded as ``((key,), value)``. When the member
+    ``array_key`` is an array it is yielded as ``((array_key,), [])``,
+    followed by ``((array_key, i), item)`` for each of its items. A document
+    that is not an object is yielded whole, as ``((), value)``.
+
+    Args:
+        f: A file opened in text mode.
+        array_key: The member whose array is read item by item.
+        chunk_size: Characters read at a time.
+
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """
+    reader = _Reader(f, chunk_size)
+    if reader.peek() != "{":
+        yield (), reader.value()
+    else:
+        reader.pos += 1
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                if reader.peek() != '"':
+                    raise reader.error("Expecting property name enclosed in double quotes", reader.pos)
+                key = reader.value()
+                reader.expect(":", "Expecting ':' delimiter")
+                if key == array_key and reader.peek() == "[":
+                    reader.pos += 1
+                    yield (key,), []
+                    index = 0
+                    if reader.peek() == "]":
+                        reader.pos += 1
+                    else:
+                        while True:
+                            yield (key, index), reader.value()
+                            index += 1
+                            if reader.expect(",]", "Expecting ',' delimiter") == "]":
+                                break
+                else:
+                    yield (key,), reader.value()
+                if reader.expect(",}", "Expecting ',' delimiter") == "}":
+                    break
+    if reader.peek():
+        raise reader.error("Extra data", reader.pos)
@@ -0,0 +1,108 @@
+"""Locked, revision-checked updates of control-plane JSON files.
+
+Several agents sharing one checkout edit ``priorities.json`` and module
+``tasks.json`` files. ``transaction`` serializes those read-modify-write
+cycles with an exclusive ``fcntl.flock`` and bumps the file's ``revision``
+counter on every write, so callers that read a file earlier can make their
+write conditional on nobody having changed it since (compare-and-swap).
+
+The lock is taken on a sidecar file under ``.agents/cache/locks/`` rather
+than on the JSON file itself, because writes replace the JSON file with a
+new inode. Readers that do not lock still see either the old or the new
+content, never a partial write.
+"""
+
+import errno
+import json
+from contextlib import contextmanager
+from pathlib import Path
+
+from agents_core.cache import cache_dir
+from agents_core.scan import dump_json
+from agents_core.writer import FileWriter
+
+LOCK_DIR = "locks"
+
+
+class RevisionConflict(Exception):
+    """Raised when a file's revision is not the one the caller expected."""
+
+    def __init__(self, rel, expected, actual):
+        super().__init__(f"{rel}: expected revision {expected}, found {actual}")
+        self.rel = rel
+        self.expected = expected
+        self.actual = actual
+
+
+def revision(doc) -> int:
+    """Returns a document's revision counter (0 if it has none yet)."""
+    return doc.get("revision", 0) if isinstance(doc, dict) else 0
+
+
+def lock_path(project_root: Path, rel: str) -> Path:
+    """Returns the sidecar lock file guarding ``rel``."""
+    return cache_dir(project_root) / LOCK_DIR / (rel.replace("%", "%25").replace("/", "%2F") + ".lock")
+
+
+@contextmanager
+def locked(project_root: Path, rel: str):
+    """Holds the exclusive lock for ``rel`` for the duration of the block.
+
+    Raises:
+        OSError: With ``ENOTSUP`` where ``fcntl`` is unavailable (Windows).
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.ENOTSUP, "file locking is unsupported on this platform (no fcntl)") from None
+    path = lock_path(project_root, rel)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class Transaction:
+    """A document read under lock; assign or mutate ``data`` to change it."""
+
+    def __init__(self, rel: str, data):
+        self.rel = rel
+        self.data = data
+        self.revision = revision(data)
+        self.written = False
+
+
+@contextmanager
+def transaction(project_root: Path, rel: str, expected_revision=None):
+    """Reads ``rel`` under its lock and writes it back if it changed.
+
+    On a clean exit from the block, a changed ``txn.data`` is written with
+    ``revision`` incremented; an exception discards the change. Either way
+    the lock is released.
+
+    Args:
+        project_root: The root directory of the project.
+        rel: The file, relative to the project root.
+        expected_revision: If given, the write only happens if the file
+            still has this revision.
+
+    Raises:
+        RevisionConflict: If ``expected_revision`` does not match.
+        OSError, ValueError: If the file cannot be read or parsed.
+    """
+    path = project_root / rel
+    with locked(project_root, rel):
+        with open(path, "rb") as f:
+            raw = f.read()
+        txn = Transaction(rel, json.loads(raw.decode("utf-8")))
+        if expected_revision is not None and txn.revision != expected_revision:
+            raise RevisionConflict(rel, expected_revision, txn.revision)
+        yield txn
+        # Compared as data, so a file only formatted differently stays as is.
+        if txn.data != json.loads(raw.decode("utf-8")):
+            if isinstance(txn.data, dict):
+                txn.data["revision"] = txn.revision + 1
+            txn.written = FileWriter().write(path, dump_json(txn.data), current=raw)
@@ -0,0 +1,214 @@
+"""Structural three-way merge for ``.agents`` JSON files.
+
+Registered as a git merge driver by ``agents init``, so that concurrent
+``agents update`` runs touching ``index.json``, ``priorities.json`` or a
+module ``tasks.json`` rebase cleanly instead of conflicting line by line.
+
+Objects are merged key by key. Arrays of records are merged by identity:
+index modules by ``name``, docs by ``file``, the priority queue by
+``task_id`` and tasks by ``id``. Arrays of strings are merged as sets, and
+the ``updated_at``/``generated_at`` stamps and the ``revision`` counter
+keep the later value; a stamp that is not ISO-8601, such as the
+``"scan"`` placeholder, gives way to one that is. Anything else changed differently on both sides
+is a conflict, for which the driver falls back to ``git merge-file`` so
+the user sees ordinary conflict markers.
+"""
+
+import datetime
+import json
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+
+from agents_core.scan import dump_json
+from agents_core.writer import FileWriter
+
+DRIVER = "agents-json"
+
+# Arrays merged record by record: path of object keys ("*" = any array item) -> identity field.
+KEYED_ARRAYS = {
+    ("modules",): "name",
+    ("modules", "*", "docs"): "file",
+    ("docs",): "file",
+    ("queue",): "task_id",
+    ("tasks",): "id",
+}
+
+# Scalars where concurrent changes resolve to the later value (see _latest).
+LATEST_WINS = frozenset({"updated_at", "generated_at", "revision"})
+
+ATTRIBUTES = [
+    f".agents/index.json merge={DRIVER}",
+    f".agents/index.pretty.json merge={DRIVER}",
+    f".agents/priorities.json merge={DRIVER}",
+    f".agents/modules/**/tasks.json merge={DRIVER}",
+]
+
+_MISSING = object()
+
+
+class MergeConflict(Exception):
+    """Raised when both sides changed the same value differently."""
+
+    def __init__(self, path):
+        super().__init__("conflicting changes at /" + "/".join(map(str, path)))
+        self.path = path
+
+
+def _pattern(path):
+    return tuple("*" if isinstance(part, int) else part for part in path)
+
+
+def merge_values(base, ours, theirs, path=()):
+    """Returns the three-way merge of two JSON values with a common base.
+
+    ``_MISSING`` stands for an absent object member on any side; a result
+    of ``_MISSING`` means the member is deleted.
+
+    Raises:
+        MergeConflict: If the sides cannot be reconciled.
+    """
+    if ours == theirs:
+        return ours
+    if base == ours:
+        return theirs
+    if base == theirs:
+        return ours
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        return _merge_objects(base if isinstance(base, dict) else {}, ours, theirs, path)
+    if isinstance(ours, list) and isinstance(theirs, list):
+        base = base if isinstance(base, list) else []
+        key = KEYED_ARRAYS.get(_pattern(path))
+        if key is not None:
+            return _merge_keyed(base, ours, theirs, key, path)
+        if all(isinstance(v, str) for v in base + ours + theirs):
+            return _merge_string_sets(base, ours, theirs)
+    if path and path[-1] in LATEST_WINS:
+        latest = _latest(ours, theirs)
+        if latest is not _MISSING:
+            return latest
+    raise MergeConflict(path)
+
+
+def _timestamp(value):
+    """Parses an ISO-8601 stamp (naive ones taken as UTC), or returns None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        # fromisoformat() only accepts a "Z" suffix from Python 3.11 on.
+        stamp = datetime.datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return None
+    return stamp if stamp.tzinfo is not None else stamp.replace(tzinfo=datetime.timezone.utc)
+
+
+def _latest(ours, theirs):
+    """Returns the later of two counters or stamps, or ``_MISSING`` if they do not compare."""
+    if type(ours) is int and type(theirs) is int:
+        return max(ours, theirs)
+    if not (isinstance(ours, str) and isinstance(theirs, str)):
+        return _MISSING
+    ours_at, theirs_at = _timestamp(ours), _timestamp(theirs)
+    if ours_at is None and theirs_at is None:
+        return _MISSING
+    if theirs_at is None or (ours_at is not None and ours_at >= theirs_at):
+        return ours
+    return theirs
+
+
+def _merge_objects(base, ours, theirs, path):
+    merged = {}
+    for key in list(ours) + [k for k in theirs if k not in ours]:
+        value = merge_values(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING),
+                             path + (key,))
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
+
+def _index(items, key, path):
+    """Maps identity -> record, or raises if records lack unique identities."""
+    index = {}
+    for item in items:
+        ident = item.get(key) if isinstance(item, dict) else None
+        if not isinstance(ident, str) or ident in index:
+            raise MergeConflict(path)
+        index[ident] = item
+    return index
+
+
+def _merge_keyed(base, ours, theirs, key, path):
+    base_map, ours_map, theirs_map = _index(base, key, path), _index(ours, key, path), _index(theirs, key, path)
+    # Our order first, then their other records in their order; records we
+    # deleted are visited too, so an edit on their side is a conflict.
+    order = list(ours_map) + [k for k in theirs_map if k not in ours_map]
+    merged = []
+    for ident in order:
+        value = merge_values(base_map.get(ident, _MISSING), ours_map.get(ident, _MISSING),
+                             theirs_map.get(ident, _MISSING), path + (len(merged),))
+        if value is not _MISSING:
+            merged.append(value)
+    return merged
+
+
+def _merge_string_sets(base, ours, theirs):
+    removed = set(base) - set(theirs)
+    merged = [v for v in ours if v not in removed]
+    merged += [v for v in theirs if v not in base and v not in merged]
+    return merged
+
+
+def merge_documents(base, ours, theirs):
+    """Merges three parsed documents; raises ``MergeConflict`` on a conflict."""
+    merged = merge_values(base, ours, theirs)
+    if merged is _MISSING:
+        raise MergeConflict(())
+    return merged
+
+
+def _load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_driver(base_path, ours_path, theirs_path, name=None) -> int:
+    """Runs as ``merge.agents-json.driver``; writes the result over ``ours_path``.
+
+    Returns:
+        0 for a clean merge, non-zero if conflicts were left in ``ours_path``.
+    """
+    try:
+        merged = merge_documents(_load(base_path), _load(ours_path), _load(theirs_path))
+    except (ValueError, OSError, MergeConflict) as e:
+        print(f"[merge][WARN] {name or ours_path}: {e}; falling back to a text merge", file=sys.stderr)
+        return subprocess.run(["git", "merge-file", "-L", "ours", "-L", "base", "-L", "theirs",
+                               str(ours_path), str(base_path), str(theirs_path)]).returncode
+    FileWriter().write(Path(ours_path), dump_json(merged))
+    return 0
+
+
+def register_merge_driver(project_root: Path) -> bool:
+    """Configures the driver for this clone and lists the files it handles.
+
+    Returns:
+        False if ``project_root`` is not inside a git work tree.
+    """
+    command = f"{shlex.quote(sys.executable)} -m agents_core.cli merge-driver %O %A %B %P"
+    for key, value in (("name", "agents-core structural JSON merge"), ("driver", command)):
+        result = subprocess.run(["git", "config", f"merge.{DRIVER}.{key}", value],
+                                cwd=project_root, capture_output=True)
+        if result.returncode != 0:
+            return False
+
+    attributes_path = project_root / ".gitattributes"
+    existing = attributes_path.read_text(encoding="utf-8") if attributes_path.exists() else ""
+    lines = existing.splitlines()
+    missing = [line for line in ATTRIBUTES if line not in lines]
+    if missing:
+        content = existing + ("" if not existing or existing.endswith("\n") else "\n")
+        if len(missing) == len(ATTRIBUTES):
+            content += "# agents-core: structural merge of control-plane JSON\n"
+        content += "\n".join(missing) + "\n"
+        FileWriter().write(attributes_path, content.encode("utf-8"))
+    return True
@@ -0,0 +1,146 @@
+"""Per-module code metrics gathered during the discovery walk.
+
+The walker already learns the name of every code file while classifying a
+directory; a ``MetricsCollector`` handed to it turns those names into
+file counts, bytes and (optionally) line counts per language, without
+listing any directory again. Since a module is a directory that directly
+contains code, each module is measured in one piece from its own files.
+
+Every measured file is recorded as ``[name, mtime_ns, size, lines]`` in the
+directory's ``DirCache`` entry. A re-scan stats each code file and reads
+it again only when its mtime or size changed, so unchanged files cost one
+``stat`` and no read.
+
+Line counts of a module whose code exceeds ``sample_bytes`` are estimated:
+files are taken in the order of a digest of their name until the sample
+reaches ``sample_bytes``, and the lines per byte of each language's sample
+are scaled to the language's total. The sample is the same on every run,
+so cached counts keep being reused.
+"""
+
+import hashlib
+import os
+import time
+
+from agents_core import timing
+
+# Language reported for each code suffix in ``discovery.CODE_SUFFIXES``.
+LANGUAGES = {
+    ".py": "python", ".ts": "typescript", ".tsx": "typescript", ".js": "javascript", ".jsx": "javascript",
+    ".go": "go", ".rs": "rust", ".swift": "swift", ".kt": "kotlin", ".java": "java",
+}
+
+# Modules with more code than this get their line counts estimated from a sample.
+SAMPLE_BYTES = 8 << 20
+
+# Files modified this close to the scan are recounted next time (see DirCache).
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def language(name: str) -> str:
+    return LANGUAGES.get(name[name.rfind("."):], "other")
+
+
+def count_lines(path: str) -> int:
+    """Counts lines the way editors number them: a final line needs no newline."""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (last != b"\n")
+
+
+def _sample(records, sample_bytes: int):
+    """Returns the records whose lines are counted: all of them, or a stable sample."""
+    if sum(r[2] for r in records) <= sample_bytes:
+        return records
+    chosen, total = [], 0
+    for r in sorted(records, key=lambda r: hashlib.sha1(r[0].encode("utf-8", "surrogateescape")).digest()):
+        if total >= sample_bytes:
+            break
+        chosen.append(r)
+        total += r[2]
+    return chosen
+
+
+class MetricsCollector:
+    """Measures the code files of each code directory the walk classifies.
+
+    Args:
+        lines: Also count lines, reading each new or changed file once.
+        sample_bytes: Above this many bytes of code in a module, estimate its
+            line counts from a sample of its files.
+    """
+
+    def __init__(self, lines: bool = False, sample_bytes: int = SAMPLE_BYTES):
+        self.lines = lines
+        self.sample_bytes = sample_bytes
+        # rel dir -> metrics dict for the index
+        self.modules = {}
+        self._started_ns = time.time_ns()
+
+    def record(self, path: str, rel: str, names, old=None):
+        """Measures the code files ``names`` of directory ``path``.
+
+        Args:
+            path: The directory on disk.
+            rel: Its project-relative path, under which the metrics are kept.
+            names: Its code files that are not ignored.
+            old: The directory's file records from the previous scan, if any.
+
+        Returns:
+            The file records to cache for the directory.
+        """
+        previous = {r[0]: r for r in old or ()}
+        records = []
+        for name in names:
+            try:
+                st = os.stat(os.path.join(path, name))
+            except OSError:
+                continue
+            mtime = st.st_mtime_ns
+            if mtime >= self._started_ns - RACY_WINDOW_NS:
+                mtime = 0
+            r = previous.get(name)
+            lines = r[3] if r is not None and mtime and r[1] == mtime and r[2] == st.st_size else None
+            records.append([name, mtime, st.st_size, lines])
+        timing.count("metric_files_stat", len(records))
+
+        sampled = _sample(records, self.sample_bytes) if self.lines else ()
+        for r in sampled:
+            if r[3] is None:
+                try:
+                    r[3] = count_lines(os.path.join(path, r[0]))
+                except OSError:
+                    r[3] = 0
+                timing.count("metric_files_read")
+        self.modules[rel] = self._summarize(records, sampled)
+        return records
+
+    def _summarize(self, records, sampled):
+        languages = {}
+        for name, _, size, _ in records:
+            lang = languages.setdefault(language(name), {"files": 0, "bytes": 0})
+            lang["files"] += 1
+            lang["bytes"] += size
+        metrics = {"files": len(records), "bytes": sum(r[2] for r in records)}
+        if self.lines:
+            counted = {}
+            for name, _, size, lines in sampled:
+                seen = counted.setdefault(language(name), [0, 0])
+                seen[0] += size
+                seen[1] += lines
+            # Languages missing from the sample use the sample's overall density.
+            sample_bytes = sum(r[2] for r in sampled)
+            density = sum(r[3] for r in sampled) / sample_bytes if sample_bytes else 0.0
+            for lang, stats in languages.items():
+                size, lines = counted.get(lang, (0, 0))
+                stats["lines"] = lines if len(sampled) == len(records) else round(
+                    stats["bytes"] * (lines / size if size else density))
+            metrics["lines"] = sum(stats["lines"] for stats in languages.values())
+            if len(sampled) < len(records):
+                metrics["sampled"] = True
+        metrics["languages"] = dict(sorted(languages.items()))
+        return metrics
@@ -0,0 +1,201 @@
+"""Cross-reference checks behind ``agents validate --refs``.
+
+The schemas only check the shape of the control plane. This module checks
+that what it points at exists:
+
+- ``refs[].file`` of every task names an existing path, and ``line`` and
+  ``end_line`` lie within that file;
+- ``impl.steps[].file`` exists for ``modify`` and ``delete`` steps;
+- every ``priorities.json`` queue entry's ``file`` is a module tasks file
+  holding its ``task_id``, and its ``blocked_by`` ids are known tasks.
+
+Task files are read in three phases. First, task ids and references are
+extracted from every task file, across a process pool for large projects,
+streaming very large files with ``jsonstream``. Second, each distinct
+referenced path is looked up once, from a thread pool, and counted for
+lines only if a ``line`` refers into it. Third, the references are checked
+against those two shared tables. However many refs point at a file, it is
+stat'ed and read at most once per run.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from agents_core import jsonstream, timing
+from agents_core.metrics import count_lines
+from agents_core.validate import (BATCH_SIZE, PARALLEL_THRESHOLD, PRIORITIES_FILE, STREAM_THRESHOLD,
+                                  _error)
+
+# Step types whose file must exist before the step runs.
+EXISTING_FILE_STEPS = ("modify", "delete")
+
+
+def _line_number(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _iter_tasks(path: str):
+    """Yields ``(index, task)`` of a tasks file; wrong shapes yield nothing."""
+    if os.stat(path).st_size >= STREAM_THRESHOLD:
+        with open(path, "r", encoding="utf-8") as f:
+            for where, value in jsonstream.iter_members(f, "tasks"):
+                if len(where) == 2:
+                    yield where[1], value
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    tasks = doc.get("tasks") if isinstance(doc, dict) else None
+    yield from enumerate(tasks if isinstance(tasks, list) else [])
+
+
+def extract(project_root: str, rel: str):
+    """Collects the task ids and file references of one tasks file.
+
+    Returns:
+        ``(ids, refs)``: the task ids in file order, and
+        ``(pointer, file, line, end_line)`` tuples, ``pointer`` locating the
+        ref or step object. Files that cannot be read or parsed give
+        ``([], [])``; schema validation reports them.
+    """
+    ids, refs = [], []
+    try:
+        for i, task in _iter_tasks(os.path.join(project_root, rel)):
+            if not isinstance(task, dict):
+                continue
+            if isinstance(task.get("id"), str):
+                ids.append(task["id"])
+            task_refs = task.get("refs")
+            for j, ref in enumerate(task_refs if isinstance(task_refs, list) else []):
+                if isinstance(ref, dict) and isinstance(ref.get("file"), str):
+                    line, end_line = ref.get("line"), ref.get("end_line")
+                    refs.append((f"/tasks/{i}/refs/{j}", ref["file"], line if _line_number(line) else None,
+                                 end_line if _line_number(end_line) else None))
+            impl = task.get("impl")
+            steps = impl.get("steps") if isinstance(impl, dict) else None
+            for j, step in enumerate(steps if isinstance(steps, list) else []):
+                if (isinstance(step, dict) and step.get("type") in EXISTING_FILE_STEPS
+                        and isinstance(step.get("file"), str)):
+                    refs.append((f"/tasks/{i}/impl/steps/{j}", step["file"], None, None))
+    except (OSError, ValueError):
+        return [], []
+    return ids, refs
+
+
+def _extract_batch(project_root: str, rels):
+    return [extract(project_root, rel) for rel in rels]
+
+
+def _extract_all(project_root: Path, task_files, jobs):
+    root = str(project_root)
+    if jobs <= 1 or len(task_files) < PARALLEL_THRESHOLD:
+        return [extract(root, rel) for rel in task_files]
+    batches = [task_files[i:i + BATCH_SIZE] for i in range(0, len(task_files), BATCH_SIZE)]
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as pool:
+        for batch_result in pool.map(_extract_batch, [root] * len(batches), batches):
+            results.extend(batch_result)
+    return results
+
+
+def _lookup(project_root: str, rel: str, want_lines: bool):
+    """Returns ``(kind, lines)``: kind is "file", "dir" or None when missing."""
+    path = os.path.join(project_root, rel)
+    if os.path.isfile(path):
+        try:
+            return "file", count_lines(path) if want_lines else None
+        except OSError:
+            return "file", None
+    return ("dir" if os.path.isdir(path) else None), None
+
+
+def _lookup_all(project_root: Path, wanted, jobs):
+    """Looks up each path of ``{path: want_lines}`` once; returns ``{path: (kind, lines)}``."""
+    root = str(project_root)
+    paths = list(wanted)
+    # Lookups wait on the filesystem, so threads overlap them without pickling.
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs * 4, len(paths), 32))) as pool:
+        found = pool.map(lambda p: _lookup(root, p, wanted[p]), paths)
+        return dict(zip(paths, found))
+
+
+def _key(path: str) -> str:
+    return os.path.normpath(path)
+
+
+def check_refs(project_root: Path, task_files, jobs=None):
+    """Reports every dangling reference of the control plane.
+
+    Args:
+        project_root: The root directory of the project.
+        task_files: The module tasks files listed in the index.
+        jobs: Worker processes for reading task files (default: CPU count).
+
+    Returns:
+        Error dicts like those of ``validate_project``.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    extracted = dict(zip(task_files, _extract_all(project_root, task_files, jobs)))
+
+    queue = []
+    try:
+        with open(project_root / PRIORITIES_FILE, "r", encoding="utf-8") as f:
+            priorities = json.load(f)
+        if isinstance(priorities, dict) and isinstance(priorities.get("queue"), list):
+            queue = priorities["queue"]
+    except (OSError, ValueError):
+        pass
+
+    wanted = {}
+    for _, refs in extracted.values():
+        for _, file, line, end_line in refs:
+            key = _key(file)
+            wanted[key] = wanted.get(key, False) or line is not None or end_line is not None
+    for entry in queue:
+        if isinstance(entry, dict) and isinstance(entry.get("file"), str):
+            wanted.setdefault(_key(entry["file"]), False)
+    found = _lookup_all(project_root, wanted, jobs) if wanted else {}
+    timing.count("ref_paths_checked", len(found))
+    timing.count("ref_files_read", sum(1 for _, lines in found.values() if lines is not None))
+
+    errors = []
+    for rel, (_, refs) in extracted.items():
+        for pointer, file, line, end_line in refs:
+            kind, lines = found[_key(file)]
+            if kind is None:
+                errors.append(_error(rel, pointer + "/file", f"{file!r} does not exist"))
+                continue
+            if kind == "dir" and (line is not None or end_line is not None):
+                errors.append(_error(rel, pointer + "/file", f"{file!r} is a directory, not a file with lines"))
+                continue
+            for field, value in (("line", line), ("end_line", end_line)):
+                if value is not None and lines is not None and value > lines:
+                    errors.append(_error(rel, f"{pointer}/{field}",
+                                         f"{field} {value} is past the end of {file!r} ({lines} lines)"))
+            if line is not None and end_line is not None and end_line < line:
+                errors.append(_error(rel, pointer + "/end_line", f"end_line {end_line} is before line {line}"))
+
+    ids_by_file = {_key(rel): set(ids) for rel, (ids, _) in extracted.items()}
+    all_ids = set().union(*ids_by_file.values())
+    for i, entry in enumerate(queue):
+        if not isinstance(entry, dict):
+            continue
+        file = entry.get("file")
+        if isinstance(file, str):
+            if found[_key(file)][0] is None:
+                errors.append(_error(PRIORITIES_FILE, f"/queue/{i}/file", f"{file!r} does not exist"))
+            elif _key(file) not in ids_by_file:
+                errors.append(_error(PRIORITIES_FILE, f"/queue/{i}/file",
+                                     f"{file!r} is not a tasks file listed in the index"))
+            elif isinstance(entry.get("task_id"), str) and entry["task_id"] not in ids_by_file[_key(file)]:
+                errors.append(_error(PRIORITIES_FILE, f"/queue/{i}/task_id",
+                                     f"task {entry['task_id']!r} is not in {file!r}"))
+        blocked_by = entry.get("blocked_by")
+        for j, task_id in enumerate(blocked_by if isinstance(blocked_by, list) else []):
+            if isinstance(task_id, str) and task_id not in all_ids:
+                errors.append(_error(PRIORITIES_FILE, f"/queue/{i}/blocked_by/{j}",
+                                     f"{task_id!r} is not a known task"))
+    timing.count("refs_checked", sum(len(refs) for _, refs in extracted.values()) + len(queue))
+    return errors
@@ -1,26 +1,49 @@
 import json
+import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 from importlib.resources import files
-from jsonschema import validate
-from referencing import Registry, Resource
 
-def load_json(path):
+from agents_core.discovery import DirCache, GitListingError, iter_code_dirs, iter_git_code_dirs
+from agents_core.ignore import load_ignore_rules
+from agents_core.slugs import default_tasks_file, module_slugs, path_digest
+from agents_core.timing import stage
+from agents_core.writer import FileWriter
+
+def load_json(path, read=None):
+    """Loads a JSON file, exiting with an error if it cannot be read.
+
+    ``read`` replaces the file access, e.g. with the daemon's ``FileCache.load``.
+    """
     try:
+        if read is not None:
+            return read(path)
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception as e:
         print(f"[scan][ERR] Failed to read {path}: {e}", file=sys.stderr)
         sys.exit(1)
 
-def write_json(path, obj):
-    tmp = Path(str(path) + ".tmp")
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False)
-        f.write("\n")
-    tmp.replace(path)
+def dump_json(obj) -> bytes:
+    """Serializes ``obj`` exactly as ``write_json`` stores it."""
+    return (json.dumps(obj, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+
+def write_json(path, obj, writer=None) -> bool:
+    """Writes ``obj`` as JSON unless the file already holds the same bytes.
 
+    Returns:
+        True if the file was written.
+    """
+    return (writer or FileWriter()).write(path, dump_json(obj))
+
+@lru_cache(maxsize=None)
 def get_registry():
+    """Returns the registry of bundled schemas, built once per process."""
+    # jsonschema/referencing are imported on first use so that commands which
+    # never validate (init, --help, plain scans) do not pay for them.
+    from referencing import Registry, Resource
+
     registry = Registry()
     # Load all schemas from package resources
     try:
@@ -39,151 +62,217 @@ def get_registry():
         
     return registry
 
-def validate_against_schema(instance, schema_name, registry):
+@lru_cache(maxsize=None)
+def load_schema(schema_name):
+    """Reads and parses a bundled schema once per process."""
+    schema_file = files("agents_core.resources.schemas") / schema_name
+    return json.loads(schema_file.read_text(encoding="utf-8"))
+
+def _build_validator(schema_name, registry):
+    from jsonschema.validators import validator_for
+
+    schema = load_schema(schema_name)
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema, registry=registry)
+
+@lru_cache(maxsize=None)
+def get_validator(schema_name):
+    """Returns a checked validator for a bundled schema, built once per process.
+
+    The validator is bound to the shared registry from ``get_registry`` so
+    ``$ref``s into common.schema.json are resolved against one registry.
+    """
+    return _build_validator(schema_name, get_registry())
+
+def validate_against_schema(instance, schema_name, registry=None):
+    from jsonschema.exceptions import best_match
+
     try:
-        schema_pkg = files("agents_core.resources.schemas")
-        schema_file = schema_pkg / schema_name
-        schema = json.loads(schema_file.read_text(encoding="utf-8"))
-        validate(instance=instance, schema=schema, registry=registry)
+        if registry is None or registry is get_registry():
+            validator = get_validator(schema_name)
+        else:
+            validator = _build_validator(schema_name, registry)
+        # Same error selection as jsonschema.validate.
+        error = best_match(validator.iter_errors(instance))
+        if error is not None:
+            raise error
     except Exception as e:
-        print(f"[scan][ERR] Validation failed for schema {schema_name}: {e}\nInstance: {json.dumps(instance, indent=2)}", file=sys.stderr)
+        # Only the failing location: dumping the instance floods the terminal for large files.
+        where = getattr(e, "json_path", None)
+        print(f"[scan][ERR] Validation failed for schema {schema_name}: "
+              f"{where + ': ' if where else ''}{getattr(e, 'message', e)}", file=sys.stderr)
         sys.exit(1)
 
-def discover_modules(project_root: Path):
-    candidates = []
-    # Scan common directories
-    for rel in ["src", "app", "apps", "packages", "services", "modules"]:
-        p = project_root / rel
-        if p.exists():
-            for path in p.rglob("*"):
-                if path.is_dir():
-                    has_code = any(fn.suffix in {".py",".ts",".tsx",".js",".jsx",".go",".rs",".swift",".kt",".java"} 
-                                   for fn in path.iterdir() if fn.is_file())
-                    if has_code:
-                        mod_name = path.name
-                        candidates.append((mod_name, path.relative_to(project_root)))
-    
-    seen_paths, used_slugs, mods = set(), set(), []
-    for name, rel_path in candidates:
-        if rel_path in seen_paths: continue
-        seen_paths.add(rel_path)
-        
-        slug = name
-        idx = 2
-        while slug in used_slugs:
-            slug = f"{name}-{idx}"
-            idx += 1
-        used_slugs.add(slug)
-        
-        # Determine tasks file location
-        tasks_file = f".agents/modules/{slug}/tasks.json"
-        
-        mods.append({
-            "name": slug,
-            "path": str(rel_path),
-            "tasks_file": tasks_file
-        })
+def discover_modules(project_root: Path, ignore=None, cache=None, source="fs", include_untracked=False,
+                     metrics=None):
+    """Returns the index module entries for the code directories of a project.
+
+    With a ``metrics.MetricsCollector``, each entry also carries the
+    ``metrics`` the walk gathered for its directory.
+    """
+    if ignore is None:
+        ignore = load_ignore_rules(project_root)
+    if source == "git":
+        try:
+            code_dirs = list(iter_git_code_dirs(project_root, ignore, include_untracked, metrics))
+        except GitListingError as e:
+            print(f"[scan][ERR] git ls-files failed: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        code_dirs = iter_code_dirs(project_root, ignore, cache, metrics)
+    mods = assign_modules(code_dirs)
+    if metrics is not None:
+        for m in mods:
+            m["metrics"] = metrics.modules[m["path"].replace(os.sep, "/")]
     return mods
 
-def ensure_task_files(project_root: Path, mods):
-    # Load template from resources
-    template_content = None
+def assign_modules(code_dirs):
+    """Turns discovered code directories into index module entries.
+
+    Names come from ``slugs.module_slugs``, so they depend only on the set of
+    directories, not on the order they were found in.
+    """
+    paths = list(dict.fromkeys(str(rel_path) for rel_path in code_dirs))
+    slugs = module_slugs(paths)
+    return [{"name": slugs[path], "path": path, "tasks_file": default_tasks_file(slugs[path])} for path in paths]
+
+def merge_modules(mods, existing_index):
+    """Merges freshly discovered modules with the entries of an existing index.
+
+    Entries are matched by path, so a module keeps its name, tasks file and
+    docs whichever modules appear around it. Freshly measured ``metrics``
+    replace the entry's; otherwise those of the last measuring scan stay. A discovered module whose path
+    is new takes over the entry of the same name if that entry's path is
+    gone (the module moved); otherwise it is added, with its path digest
+    appended to the name should the name already belong to another entry.
+    """
+    existing = [m for m in existing_index.get("modules", []) if isinstance(m, dict)]
+    by_path = {str(m.get("path")).replace(os.sep, "/"): m for m in existing}
+    found = {m["path"].replace(os.sep, "/") for m in mods}
+    moved = {m.get("name"): m for m in existing if str(m.get("path")).replace(os.sep, "/") not in found}
+    taken = {by_path[path].get("name") for path in found if path in by_path}
+
+    final_mods = []
+    for m in mods:
+        old = by_path.get(m["path"].replace(os.sep, "/"))
+        if old is None and m["name"] not in taken and m["name"] in moved:
+            old = moved.pop(m["name"])
+        if old is not None:
+            merged = old.copy()
+            merged["path"] = m["path"]
+            if "metrics" in m:
+                merged["metrics"] = m["metrics"]
+            # Keep the old name and tasks_file location to avoid losing data
+            m["name"], m["tasks_file"] = merged["name"], merged["tasks_file"]
+        else:
+            if m["name"] in taken:
+                m["name"] = f"{m['name']}-{path_digest(m['path'])}"
+                m["tasks_file"] = default_tasks_file(m["name"])
+            merged = m
+        taken.add(merged["name"])
+        final_mods.append(merged)
+    return final_mods
+
+def build_index(final_mods, existing_index, ignore):
+    return {
+        "$schema": "schemas/index.schema.json",
+        "version": 1,
+        "generated_at": "scan",
+        "modules": final_mods,
+        "docs": existing_index.get("docs", []),
+        "ignore": ignore.summary()
+    }
+
+@lru_cache(maxsize=None)
+def _task_template():
+    """Returns the module tasks.json template, or None if it is missing."""
     try:
-        tpl_pkg = files("agents_core.resources.templates")
-        tpl_file = tpl_pkg / "module_tasks.json"
+        tpl_file = files("agents_core.resources.templates") / "module_tasks.json"
         if tpl_file.is_file():
-            template_content = tpl_file.read_text(encoding="utf-8")
+            return tpl_file.read_text(encoding="utf-8")
     except Exception:
         pass
+    return None
 
-    for m in mods:
-        path = project_root / m["tasks_file"]
+def render_task_file(module_name):
+    """Returns the initial tasks.json bytes for a new module."""
+    template_content = _task_template()
+    if template_content:
+        content = template_content.replace("__MODULE_NAME__", module_name)
+        content = content.replace("__TIMESTAMP_OR_BOOTSTRAP__", "scan")
+        return content.encode("utf-8")
+    return dump_json({
+        "$schema": "schemas/tasks.schema.json",
+        "module": module_name,
+        "updated_at": "scan",
+        "tasks": []
+    })
+
+def missing_task_files(project_root: Path, mods):
+    """Returns ``{tasks_file: initial bytes}`` for modules without a tasks file."""
+    return {m["tasks_file"]: render_task_file(m["name"])
+            for m in mods if not (project_root / m["tasks_file"]).exists()}
+
+def ensure_task_files(project_root: Path, mods, writer=None):
+    writer = writer or FileWriter()
+    for rel, content in missing_task_files(project_root, mods).items():
+        path = project_root / rel
         path.parent.mkdir(parents=True, exist_ok=True)
-        if not path.exists():
-            if template_content:
-                content = template_content.replace("__MODULE_NAME__", m["name"])
-                content = content.replace("__TIMESTAMP_OR_BOOTSTRAP__", "scan")
-                with open(path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                print(f"[scan] created {path}")
-            else:
-                write_json(path, {
-                    "$schema": "schemas/tasks.schema.json",
-                    "module": m["name"],
-                    "updated_at": "scan",
-                    "tasks": []
-                })
-                print(f"[scan] created {path} (fallback)")
-
-def scan(project_root: Path, refresh_index: bool = False, validate_only: bool = False):
+        writer.write(path, content, current=None)
+        print(f"[scan] created {path}")
+
+def scan(project_root: Path, refresh_index: bool = False, validate_only: bool = False, use_cache: bool = True,
+         source: str = "fs", include_untracked: bool = False, metrics: bool = False, lines: bool = False,
+         sample_bytes: int = None, load=load_json):
     agents_dir = project_root / ".agents"
     if not agents_dir.exists() and not validate_only:
         print("[scan][ERR] .agents directory not found. Run 'agents init' first.", file=sys.stderr)
         sys.exit(1)
 
-    registry = get_registry()
-    
     # 1. Validation Logic
     if validate_only:
-        index_path = agents_dir / "index.json"
-        priorities_path = agents_dir / "priorities.json"
-        
-        if index_path.exists():
-            idx = load_json(index_path)
-            validate_against_schema(idx, "index.schema.json", registry)
-            
-            # Validate all modules referenced in index
-            for mod in idx.get("modules", []):
-                tf = project_root / mod["tasks_file"]
-                if not tf.exists():
-                     print(f"[scan][ERR] Missing task file: {tf}", file=sys.stderr)
-                     sys.exit(1)
-                tasks = load_json(tf)
-                validate_against_schema(tasks, "tasks.schema.json", registry)
-        
-        if priorities_path.exists():
-            prio = load_json(priorities_path)
-            validate_against_schema(prio, "priorities.schema.json", registry)
-            
-        print("[scan] validation OK")
+        from agents_core.validate import print_report, validate_project
+        report = validate_project(project_root, use_cache=use_cache)
+        print_report(report)
+        if not report["ok"]:
+            sys.exit(1)
         return
 
     # 2. Scan Logic
-    existing_index = {}
-    index_path = agents_dir / "index.json"
-    if index_path.exists():
-        existing_index = load_json(index_path)
-    
-    mods = discover_modules(project_root)
-    
-    # Preserve existing docs/config
-    final_mods = []
-    # Map by name for easy lookup
-    existing_mod_map = {m["name"]: m for m in existing_index.get("modules", [])}
-    
-    for m in mods:
-        if m["name"] in existing_mod_map:
-            # Keep existing config (like docs) but update path if changed? 
-            # For simplicity, we merge info.
-            merged = existing_mod_map[m["name"]].copy()
-            merged["path"] = m["path"] # Update path in case it moved
-            # Keep the old tasks_file location to avoid losing data
-            m["tasks_file"] = merged["tasks_file"]
-            final_mods.append(merged)
-        else:
-            final_mods.append(m)
-            
-    # Write Index
-    if refresh_index or not index_path.exists():
-        idx = {
-            "$schema": "schemas/index.schema.json",
-            "version": 1,
-            "generated_at": "scan",
-            "modules": final_mods,
-            "docs": existing_index.get("docs", [])
-        }
-        write_json(index_path, idx)
-        print(f"[scan] updated {index_path}")
-        
-    # Ensure tasks files
-    ensure_task_files(project_root, final_mods)
+    with stage("load"):
+        existing_index = {}
+        index_path = agents_dir / "index.json"
+        if index_path.exists():
+            existing_index = load(index_path)
+        ignore = load_ignore_rules(project_root)
+
+    with stage("discover"):
+        # The git source never lists directories, so it has no use for the cache.
+        cache = DirCache.load(project_root, ignore) if use_cache and source == "fs" else None
+        collector = None
+        if metrics or lines:
+            from agents_core.metrics import SAMPLE_BYTES, MetricsCollector
+            collector = MetricsCollector(lines, SAMPLE_BYTES if sample_bytes is None else sample_bytes)
+        mods = discover_modules(project_root, ignore, cache, source, include_untracked, collector)
+        if cache is not None:
+            cache.save(project_root)
+
+    with stage("merge"):
+        final_mods = merge_modules(mods, existing_index)
+
+    with stage("write"):
+        # Write Index
+        writer = FileWriter()
+        # Metrics are only useful once they are in the index.
+        if refresh_index or collector is not None or not index_path.exists():
+            idx = build_index(final_mods, existing_index, ignore)
+            if write_json(index_path, idx, writer):
+                print(f"[scan] updated {index_path}")
+            else:
+                print(f"[scan] {index_path} unchanged")
+
+        # Ensure tasks files
+        ensure_task_files(project_root, final_mods, writer)
+    if writer.written or writer.skipped:
+        print(f"[scan] files: {writer.summary()}")
@@ -0,0 +1,341 @@
+"""Specialized validators generated from the bundled JSON schemas.
+
+The bundled schemas only change with a release, yet generic ``jsonschema``
+validation re-interprets them for every value: it looks each keyword up,
+resolves ``$ref``s through ``referencing`` and builds an error object per
+check. ``compile_schema`` instead generates one flat Python function per
+schema, with every ``$ref`` inlined and every check written out for the
+exact keywords the schema uses, and compiles it on first use in a process.
+
+The generated code reports the same errors as ``Draft7Validator.iter_errors``
+with the bundled registry and no format checker: the same messages at the
+same paths, produced in the same keyword order (``tests/test_schemagen.py``
+checks this differentially against ``jsonschema``). Schemas using anything
+outside the supported subset raise ``Unsupported``, and callers fall back
+to ``jsonschema``.
+
+To read the code generated for a schema:
+    python -m agents_core.schemagen tasks.schema.json
+"""
+
+import re
+import sys
+from functools import lru_cache
+from importlib.resources import files
+from urllib.parse import urljoin
+
+DRAFT7 = ("http://json-schema.org/draft-07/schema#", "http://json-schema.org/draft-07/schema")
+
+# Keywords without any effect on validation. ``format`` is only an
+# annotation because validators are built without a format checker.
+ANNOTATIONS = frozenset({"$schema", "$id", "$comment", "title", "description", "definitions", "default",
+                         "examples", "format", "readOnly", "writeOnly"})
+
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "null": "{v} is None",
+    "boolean": "isinstance({v}, bool)",
+    # bool is an int subclass but not a JSON number; draft 7 counts 1.0 as an integer.
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool) or isinstance({v}, float) and {v}.is_integer())",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+}
+
+
+class Unsupported(Exception):
+    """Raised for a schema feature the generator does not handle."""
+
+
+def _unbool(value, true=object(), false=object()):
+    if value is True:
+        return true
+    if value is False:
+        return false
+    return value
+
+
+def _equal(one, two):
+    """``jsonschema``'s equality: ``True`` is not ``1``, also inside containers."""
+    if one is two:
+        return True
+    if isinstance(one, str) or isinstance(two, str):
+        return one == two
+    if isinstance(one, list) and isinstance(two, list):
+        return len(one) == len(two) and all(_equal(a, b) for a, b in zip(one, two))
+    if isinstance(one, dict) and isinstance(two, dict):
+        return one.keys() == two.keys() and all(_equal(one[k], two[k]) for k in one)
+    return _unbool(one) == _unbool(two)
+
+
+def _extras_message(extras):
+    extras = sorted(extras, key=str)
+    verb = "was" if len(extras) == 1 else "were"
+    return f"Additional properties are not allowed ({', '.join(repr(e) for e in extras)} {verb} unexpected)"
+
+
+class _Compiler:
+    """Emits the body of one validator function; see ``compile_schema``."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.constants = {}
+        self._names = 0
+        self._refs = []
+
+    def name(self, prefix):
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def constant(self, value):
+        name = self.name("_c")
+        self.constants[name] = value
+        return name
+
+    def resolve(self, base, ref):
+        uri, _, fragment = urljoin(base, ref).partition("#")
+        if uri not in self.documents:
+            raise Unsupported(f"$ref to unknown document {ref!r}")
+        node = self.documents[uri]
+        for part in fragment.split("/")[1:] if fragment else []:
+            part = part.replace("~1", "/").replace("~0", "~")
+            try:
+                node = node[int(part)] if isinstance(node, list) else node[part]
+            except (KeyError, IndexError, ValueError):
+                raise Unsupported(f"unresolvable $ref {ref!r}")
+        return uri, fragment, node
+
+    def schema(self, schema, base, v, path, errs, indent, child=False):
+        """Returns code lines checking variable ``v`` against ``schema``.
+
+        ``path`` is the list of code expressions for the path segments and
+        ``errs`` the name of the list errors are appended to. ``child`` is
+        set when ``schema`` applies to an item or property value.
+        """
+        if schema is True or schema == {}:
+            return []
+        pad = "    " * indent
+        if schema is False:
+            # jsonschema reports a false subschema of a property or item
+            # without that property or item in the path.
+            where = "(" + "".join(p + ", " for p in (path[:-1] if child else path)) + ")"
+            return [f"{pad}{errs}.append(({where}, 'False schema does not allow ' + repr({v})))"]
+        where = "(" + "".join(p + ", " for p in path) + ")"
+        if not isinstance(schema, dict):
+            raise Unsupported(f"schema of type {type(schema).__name__}")
+        if "$id" in schema:
+            base = urljoin(base, schema["$id"])
+        if "$ref" in schema:
+            # Draft 7: a $ref replaces its sibling keywords.
+            uri, fragment, target = self.resolve(base, schema["$ref"])
+            if (uri, fragment) in self._refs:
+                raise Unsupported("recursive $ref")
+            self._refs.append((uri, fragment))
+            try:
+                return self.schema(target, uri, v, path, errs, indent)
+            finally:
+                self._refs.pop()
+
+        lines = []
+        for keyword, value in schema.items():
+            if keyword in ANNOTATIONS:
+                continue
+            emit = getattr(self, "kw_" + keyword, None)
+            if emit is None:
+                raise Unsupported(f"keyword {keyword!r}")
+            lines += emit(value, schema, base, v, path, where, errs, pad, indent)
+        return lines
+
+    def kw_type(self, types, schema, base, v, path, where, errs, pad, indent):
+        types = [types] if isinstance(types, str) else types
+        if any(t not in _TYPE_CHECKS for t in types):
+            raise Unsupported(f"type {types!r}")
+        check = " or ".join(_TYPE_CHECKS[t].format(v=v) for t in types)
+        message = " is not of type " + ", ".join(repr(t) for t in types)
+        return [f"{pad}if not ({check}):",
+                f"{pad}    {errs}.append(({where}, repr({v}) + {message!r}))"]
+
+    def kw_required(self, required, schema, base, v, path, where, errs, pad, indent):
+        if not required:
+            return []
+        lines = [f"{pad}if isinstance({v}, dict):"]
+        for prop in required:
+            lines += [f"{pad}    if {prop!r} not in {v}:",
+                      f"{pad}        {errs}.append(({where}, {repr(prop) + ' is a required property'!r}))"]
+        return lines
+
+    def kw_properties(self, properties, schema, base, v, path, where, errs, pad, indent):
+        lines = []
+        for prop, subschema in properties.items():
+            child = self.name("v")
+            body = self.schema(subschema, base, child, path + [repr(prop)], errs, indent + 2, child=True)
+            if body:
+                lines += [f"{pad}    if {prop!r} in {v}:", f"{pad}        {child} = {v}[{prop!r}]"] + body
+        return [f"{pad}if isinstance({v}, dict):"] + lines if lines else []
+
+    def kw_additionalProperties(self, additional, schema, base, v, path, where, errs, pad, indent):
+        if "patternProperties" in schema:
+            raise Unsupported("patternProperties")
+        known = self.constant(frozenset(schema.get("properties", {})))
+        if additional is False:
+            return [f"{pad}if isinstance({v}, dict):",
+                    f"{pad}    extras = [k for k in {v} if k not in {known}]",
+                    f"{pad}    if extras:",
+                    f"{pad}        {errs}.append(({where}, _extras_message(extras)))"]
+        key, child = self.name("k"), self.name("v")
+        body = self.schema(additional, base, child, path + [key], errs, indent + 3, child=True)
+        if not body:
+            return []
+        return [f"{pad}if isinstance({v}, dict):",
+                f"{pad}    for {key}, {child} in {v}.items():",
+                f"{pad}        if {key} not in {known}:"] + body
+
+    def kw_items(self, items, schema, base, v, path, where, errs, pad, indent):
+        if isinstance(items, list):
+            raise Unsupported("tuple items")
+        index, child = self.name("i"), self.name("v")
+        body = self.schema(items, base, child, path + [index], errs, indent + 2, child=True)
+        if not body:
+            return []
+        return [f"{pad}if isinstance({v}, list):",
+                f"{pad}    for {index}, {child} in enumerate({v}):"] + body
+
+    def kw_enum(self, enum, schema, base, v, path, where, errs, pad, indent):
+        message = f" is not one of {enum!r}"
+        if all(isinstance(e, str) for e in enum):
+            # A string only equals a string, so plain set membership is exact.
+            choices = self.constant(frozenset(enum))
+            check = f"isinstance({v}, str) and {v} in {choices}"
+        else:
+            choices = self.constant(list(enum))
+            check = f"any(_equal(e, {v}) for e in {choices})"
+        return [f"{pad}if not ({check}):",
+                f"{pad}    {errs}.append(({where}, repr({v}) + {message!r}))"]
+
+    def kw_const(self, const, schema, base, v, path, where, errs, pad, indent):
+        if isinstance(const, str):
+            check = f"isinstance({v}, str) and {v} == {const!r}"
+        else:
+            check = f"_equal({v}, {self.constant(const)})"
+        return [f"{pad}if not ({check}):",
+                f"{pad}    {errs}.append(({where}, {repr(const) + ' was expected'!r}))"]
+
+    def _bound(self, limit, v, where, errs, pad, op, text):
+        if not isinstance(limit, (int, float)) or isinstance(limit, bool):
+            raise Unsupported(f"bound {limit!r}")
+        number = _TYPE_CHECKS["number"].format(v=v)
+        return [f"{pad}if {number} and {v} {op} {limit!r}:",
+                f"{pad}    {errs}.append(({where}, repr({v}) + {text + repr(limit)!r}))"]
+
+    def kw_minimum(self, minimum, schema, base, v, path, where, errs, pad, indent):
+        return self._bound(minimum, v, where, errs, pad, "<", " is less than the minimum of ")
+
+    def kw_maximum(self, maximum, schema, base, v, path, where, errs, pad, indent):
+        return self._bound(maximum, v, where, errs, pad, ">", " is greater than the maximum of ")
+
+    def kw_pattern(self, pattern, schema, base, v, path, where, errs, pad, indent):
+        regex = self.constant(re.compile(pattern))
+        return [f"{pad}if isinstance({v}, str) and not {regex}.search({v}):",
+                f"{pad}    {errs}.append(({where}, repr({v}) + {' does not match ' + repr(pattern)!r}))"]
+
+    def kw_anyOf(self, branches, schema, base, v, path, where, errs, pad, indent):
+        bodies = []
+        for branch in branches:
+            branch_errs = self.name("e")
+            body = self.schema(branch, base, v, path, branch_errs, indent + len(bodies))
+            if not body:
+                # A branch that checks nothing always matches.
+                return []
+            bodies.append((branch_errs, body))
+        lines = []
+        # Like jsonschema, later branches are only tried while earlier ones fail.
+        for depth, (branch_errs, body) in enumerate(bodies):
+            inner = pad + "    " * depth
+            lines += [f"{inner}{branch_errs} = []"] + body + [f"{inner}if {branch_errs}:"]
+        message = " is not valid under any of the given schemas"
+        lines.append(f"{pad}{'    ' * len(bodies)}{errs}.append(({where}, repr({v}) + {message!r}))")
+        return lines
+
+
+def compile_schema(schema, documents=None, name="validate", base=None):
+    """Generates a validator function for ``schema``.
+
+    Args:
+        schema: A draft-07 schema.
+        documents: ``{$id: schema}`` of every document ``$ref`` may point
+            into (the schema itself is added).
+        name: Name of the generated function.
+        base: The URI ``$ref``s in ``schema`` are relative to, for a
+            subschema of one of ``documents``; by default the schema's own
+            ``$id``.
+
+    Returns:
+        A ``(function, source)`` pair. ``function(instance)`` returns the
+        errors as a list of ``(path tuple, message)`` pairs.
+
+    Raises:
+        Unsupported: If the schema uses a feature the generator lacks.
+    """
+    if isinstance(schema, dict) and schema.get("$schema", DRAFT7[0]) not in DRAFT7:
+        raise Unsupported(f"$schema {schema['$schema']!r}")
+    documents = dict(documents or {})
+    if base is None:
+        base = schema.get("$id", "") if isinstance(schema, dict) else ""
+        documents.setdefault(base, schema)
+    compiler = _Compiler(documents)
+    body = compiler.schema(schema, base, "instance", [], "errors", 1)
+    source = "\n".join([f"def {name}(instance):", "    errors = []", *body, "    return errors", ""])
+    namespace = dict(compiler.constants, _equal=_equal, _extras_message=_extras_message)
+    exec(compile(source, f"<schemagen {name}>", "exec"), namespace)
+    return namespace[name], source
+
+
+@lru_cache(maxsize=None)
+def _bundled_documents():
+    """Returns ``{file name: schema}`` and ``{$id: schema}`` of the bundled schemas."""
+    from agents_core.scan import load_schema
+
+    by_name = {item.name: load_schema(item.name) for item in files("agents_core.resources.schemas").iterdir()
+               if item.is_file() and item.name.endswith(".json")}
+    by_id = {doc["$id"]: doc for doc in by_name.values() if isinstance(doc, dict) and "$id" in doc}
+    return by_name, by_id
+
+
+@lru_cache(maxsize=None)
+def bundled_validator(schema_name, pointer=""):
+    """Returns the generated validator for a bundled schema, or None.
+
+    Args:
+        schema_name: File name of the bundled schema.
+        pointer: JSON pointer to a subschema to compile instead, e.g.
+            ``/properties/tasks/items`` to check one task at a time.
+
+    Returns:
+        The validator function, or None if the schema is not bundled or
+        uses an unsupported feature and the caller should use
+        ``jsonschema``.
+    """
+    by_name, by_id = _bundled_documents()
+    if schema_name not in by_name:
+        return None
+    schema = by_name[schema_name]
+    base = schema.get("$id", "")
+    name = re.sub(r"\W", "_", schema_name + pointer)
+    try:
+        documents = {**by_id, base: schema}
+        subschema = _Compiler(documents).resolve(base, "#" + pointer)[2] if pointer else schema
+        return compile_schema(subschema, documents, name=name, base=base)[0]
+    except Unsupported:
+        return None
+
+
+def main():
+    by_name, by_id = _bundled_documents()
+    if len(sys.argv) != 2 or sys.argv[1] not in by_name:
+        print(f"usage: python -m agents_core.schemagen {{{','.join(sorted(by_name))}}}", file=sys.stderr)
+        sys.exit(2)
+    print(compile_schema(by_name[sys.argv[1]], by_id)[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Long-running ``agents serve`` daemon.
+
+Keeps the schema registry, compiled validators and parsed control-plane
+files in memory and answers ``scan``, ``validate`` and task queries over a
+Unix socket, so repeated CLI calls skip interpreter startup, heavy imports
+and registry construction. Requests are handled one at a time; each is a
+single JSON line answered by a single JSON line carrying the captured
+stdout/stderr and exit code of the equivalent in-process command.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from agents_core import __version__
+from agents_core.cache import cache_dir
+from agents_core.client import socket_path
+from agents_core.discovery import DirCache
+from agents_core.scan import get_registry, get_validator, load_json, scan
+from agents_core.tasks import list_tasks
+from agents_core.validate import STREAM_THRESHOLD, print_report, validate_project
+
+
+class UnknownRequest(Exception):
+    """Raised for an op the daemon does not serve."""
+
+
+class FileCache:
+    """File contents and parsed JSON, reused while mtime and size are unchanged.
+
+    As in ``DirCache``, a file modified within ``RACY_WINDOW_NS`` of being
+    read is read again next time, since a same-size rewrite within the same
+    timestamp tick would otherwise go unseen. Callers must not modify the
+    returned data; it is shared between requests.
+    """
+
+    RACY_WINDOW_NS = DirCache.RACY_WINDOW_NS
+    _UNPARSED = object()
+
+    def __init__(self):
+        # path -> [(mtime_ns, size), raw bytes, parsed data or _UNPARSED]
+        self._entries = {}
+
+    def _entry(self, path):
+        key = str(path)
+        with open(key, "rb") as f:
+            st = os.fstat(f.fileno())
+            sig = (st.st_mtime_ns, st.st_size)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != sig:
+                mtime = st.st_mtime_ns
+                if mtime >= time.time_ns() - self.RACY_WINDOW_NS:
+                    mtime = 0
+                entry = self._entries[key] = [(mtime, st.st_size), f.read(), self._UNPARSED]
+        return entry
+
+    def holds(self, path) -> bool:
+        """Checks whether ``path`` is resident and unchanged on disk."""
+        entry = self._entries.get(str(path))
+        if entry is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return entry[0] == (st.st_mtime_ns, st.st_size)
+
+    def read(self, path) -> bytes:
+        """Returns the bytes of ``path``, reading it only if it changed."""
+        return self._entry(path)[1]
+
+    def load(self, path):
+        """Returns the parsed JSON of ``path``, parsing it only if it changed.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If it is not valid JSON.
+        """
+        entry = self._entry(path)
+        if entry[2] is self._UNPARSED:
+            entry[2] = json.loads(entry[1].decode("utf-8"))
+        return entry[2]
+
+
+class Daemon:
+    """Dispatches requests against one project root."""
+
+    def __init__(self, project_root: Path):
+        self.project_root = project_root
+        self.files = FileCache()
+        self.server = None
+        # Warm the per-process caches once, up front.
+        get_registry()
+        for name in ("index.schema.json", "priorities.schema.json", "tasks.schema.json"):
+            get_validator(name)
+
+    def _run(self, op, args):
+        if op == "ping":
+            return 0, {"pid": os.getpid(), "root": str(self.project_root), "version": __version__}
+        if op == "scan":
+            scan(self.project_root,
+                 refresh_index=bool(args.get("refresh_index")),
+                 use_cache=args.get("use_cache", True),
+                 source=args.get("source", "fs"),
+                 include_untracked=bool(args.get("include_untracked")),
+                 metrics=bool(args.get("metrics")),
+                 lines=bool(args.get("lines")),
+                 sample_bytes=args.get("sample_bytes"),
+                 load=lambda path: load_json(path, self.files.load))
+            return 0, None
+        if op == "validate":
+            report = validate_project(self.project_root, jobs=args.get("jobs"),
+                                      use_cache=args.get("use_cache", True),
+                                      stream_threshold=0 if args.get("stream") else STREAM_THRESHOLD,
+                                      refs=bool(args.get("refs")),
+                                      files=self.files)
+            print_report(report, args.get("format", "text"))
+            return (0 if report["ok"] else 1), None
+        if op == "tasks":
+            return 0, list_tasks(self.project_root, module=args.get("module"),
+                                 status=args.get("status"), task_id=args.get("task_id"),
+                                 load=self.files.load)
+        if op == "shutdown":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return 0, None
+        raise UnknownRequest(f"unknown op: {op}")
+
+    def dispatch(self, req) -> dict:
+        """Runs one request, capturing output and exit status."""
+        if not isinstance(req, dict) or req.get("version") != __version__:
+            return {"ok": False, "error": f"version mismatch (daemon is {__version__})"}
+        out, err = io.StringIO(), io.StringIO()
+        code, result = 0, None
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                code, result = self._run(req.get("op"), req.get("args") or {})
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except UnknownRequest as e:
+                return {"ok": False, "error": str(e)}
+            except Exception as e:
+                print(f"[serve][ERR] {req.get('op')} failed: {e}", file=sys.stderr)
+                code = 1
+        return {"ok": True, "exit": code, "stdout": out.getvalue(),
+                "stderr": err.getvalue(), "result": result}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            req = json.loads(line)
+        except ValueError:
+            resp = {"ok": False, "error": "malformed request"}
+        else:
+            resp = self.server.daemon.dispatch(req)
+        self.wfile.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.UnixStreamServer):
+
+    def __init__(self, path, daemon):
+        self.daemon = daemon
+        super().__init__(path, _Handler)
+
+
+def _claim_socket(path: str) -> bool:
+    """Removes a stale socket; returns False if a daemon is listening."""
+    if not os.path.exists(path):
+        return True
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+        return False
+    except OSError:
+        os.unlink(path)
+        return True
+
+
+def make_server(project_root: Path):
+    """Binds the daemon socket for a project.
+
+    Raises:
+        RuntimeError: If another daemon already serves this project.
+    """
+    path = socket_path(project_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not _claim_socket(path):
+        raise RuntimeError(f"a daemon is already listening on {path}")
+    daemon = Daemon(project_root)
+    server = _Server(path, daemon)
+    daemon.server = server
+    os.chmod(path, 0o600)
+    return server
+
+
+def serve(project_root: Path):
+    """Runs the daemon in the foreground until shut down or interrupted."""
+    if not (project_root / ".agents").exists():
+        print("[serve][ERR] .agents directory not found. Run 'agents init' first.", file=sys.stderr)
+        sys.exit(1)
+    # Make sure the cache directory carries its .gitignore before binding.
+    cache_dir(project_root)
+    try:
+        server = make_server(project_root)
+    except RuntimeError as e:
+        print(f"[serve][ERR] {e}", file=sys.stderr)
+        sys.exit(1)
+    path = server.server_address
+    print(f"[serve] listening on {path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        print("[serve] stopped")
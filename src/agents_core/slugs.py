@@ -0,0 +1,141 @@
+"""Module names derived from module paths, and the migration onto them.
+
+A module is named by the shortest trailing part of its path that no other
+module path ends with, joined with ``-``: ``src/app`` is ``app`` while it is
+the only ``app``, and ``web/utils`` and ``core/utils`` become ``web-utils``
+and ``core-utils``. Names therefore depend only on the set of module
+paths, never on the order the walk found them in, and are computed from
+one table of suffix counts instead of a probe loop per collision. The rare
+names that still coincide (``a-b/c`` and ``a/b-c`` both give ``a-b-c``) get
+a short digest of their path appended.
+
+Once written to the index a module keeps its name (``scan.merge_modules``
+matches entries by path), so new modules never rename existing ones.
+``migrate`` renames the modules of an index written by the earlier
+walk-order ``-2``/``-3`` scheme, moving each module directory under
+``.agents/modules/`` and rewriting every reference to its tasks file.
+"""
+
+import hashlib
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+INDEX_FILE = ".agents/index.json"
+PRIORITIES_FILE = ".agents/priorities.json"
+MODULES_DIR = ".agents/modules"
+
+
+def parts(path: str):
+    return tuple(str(path).replace(os.sep, "/").strip("/").split("/"))
+
+
+def path_digest(path: str) -> str:
+    return hashlib.sha1("/".join(parts(path)).encode("utf-8")).hexdigest()[:8]
+
+
+def default_tasks_file(name: str) -> str:
+    return f"{MODULES_DIR}/{name}/tasks.json"
+
+
+def module_slugs(paths):
+    """Returns ``{path: name}`` for a set of distinct module paths."""
+    split = {path: parts(path) for path in paths}
+    suffixes = Counter(p[-k:] for p in split.values() for k in range(1, len(p) + 1))
+    slugs = {}
+    for path, p in split.items():
+        # A path that another module path ends with has no unique suffix; it
+        # is named after the whole path, which no other path can share.
+        k = next((k for k in range(1, len(p) + 1) if suffixes[p[-k:]] == 1), len(p))
+        slugs[path] = "-".join(p[-k:])
+    names = Counter(slugs.values())
+    return {path: slug if names[slug] == 1 else f"{slug}-{path_digest(path)}" for path, slug in slugs.items()}
+
+
+def plan(index) -> list:
+    """Returns ``(entry, new name, new tasks_file)`` for each index entry to rename."""
+    modules = [m for m in index.get("modules", []) if isinstance(m, dict) and isinstance(m.get("path"), str)]
+    slugs = module_slugs({m["path"] for m in modules})
+    moves = []
+    for m in modules:
+        name = slugs[m["path"]]
+        if m.get("name") == name:
+            continue
+        # Task files kept somewhere custom stay where they are.
+        tasks_file = m.get("tasks_file")
+        if tasks_file == default_tasks_file(m.get("name")):
+            tasks_file = default_tasks_file(name)
+        moves.append((m, name, tasks_file))
+    return moves
+
+
+def migrate(project_root: Path, dry_run: bool = False) -> list:
+    """Renames index modules to their path-derived names without losing data.
+
+    Each renamed module's directory ``.agents/modules/<old>/`` moves to
+    ``.agents/modules/<new>/`` (through a temporary name, so swapped names
+    cannot clobber each other), its ``tasks.json`` gets the new ``module``
+    name, and ``priorities.json`` queue entries follow the moved tasks
+    files. Task ids are left alone. Run it while no agent is working.
+
+    Args:
+        project_root: The root directory of the project.
+        dry_run: Only report what would be renamed.
+
+    Returns:
+        ``(old name, new name)`` pairs, in index order.
+    """
+    from agents_core.locks import transaction
+    from agents_core.scan import load_json, write_json
+    from agents_core.writer import FileWriter
+
+    index_path = project_root / INDEX_FILE
+    if not index_path.exists():
+        print("[migrate][ERR] .agents/index.json not found. Run 'agents scan' first.", file=sys.stderr)
+        sys.exit(1)
+    index = load_json(index_path)
+    moves = plan(index)
+
+    # Refuse to move onto a module directory that is not itself moving away.
+    moving = [(m, name, tasks_file) for m, name, tasks_file in moves if tasks_file != m["tasks_file"]]
+    vacated = {m["tasks_file"].rsplit("/", 1)[0] for m, _, _ in moving}
+    moving_ids = {id(m) for m, _, _ in moving}
+    occupied = {str(m.get("tasks_file")).rsplit("/", 1)[0] for m in index.get("modules", [])
+                if isinstance(m, dict) and id(m) not in moving_ids}
+    for _, _, tasks_file in moving:
+        target = tasks_file.rsplit("/", 1)[0]
+        if target in occupied or (project_root / target).exists() and target not in vacated:
+            print(f"[migrate][ERR] {target} already exists; move it away first.", file=sys.stderr)
+            sys.exit(1)
+    renamed = [(m["name"], name) for m, name, _ in moves]
+    if dry_run or not moves:
+        return renamed
+
+    staged = []
+    for n, (m, _, tasks_file) in enumerate(moving):
+        old_dir = project_root / m["tasks_file"].rsplit("/", 1)[0]
+        if old_dir.exists():
+            temp = project_root / MODULES_DIR / f".migrate-{os.getpid()}-{n}"
+            os.replace(old_dir, temp)
+            staged.append((temp, project_root / tasks_file.rsplit("/", 1)[0]))
+    for temp, new_dir in staged:
+        new_dir.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp, new_dir)
+
+    moved_files = {m["tasks_file"]: tasks_file for m, _, tasks_file in moving}
+    for m, name, tasks_file in moves:
+        if (project_root / tasks_file).exists():
+            with transaction(project_root, tasks_file) as txn:
+                if isinstance(txn.data, dict) and txn.data.get("module") == m["name"]:
+                    txn.data["module"] = name
+        m["name"] = name
+        m["tasks_file"] = tasks_file
+
+    if moved_files and (project_root / PRIORITIES_FILE).exists():
+        with transaction(project_root, PRIORITIES_FILE) as txn:
+            for entry in txn.data.get("queue", []) if isinstance(txn.data, dict) else []:
+                if isinstance(entry, dict) and entry.get("file") in moved_files:
+                    entry["file"] = moved_files[entry["file"]]
+    write_json(index_path, index, FileWriter())
+    return renamed
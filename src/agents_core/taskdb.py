@@ -0,0 +1,231 @@
+"""Derived SQLite index of tasks, refs and queue entries for ``agents query``.
+
+The module ``tasks.json`` files and ``priorities.json`` stay the source of
+truth; ``.agents/cache/tasks.sqlite`` only mirrors them so lookups such as
+"blocked tasks of module X" or "where is task foo:42" do not have to load
+every task file. Before each query ``refresh`` stats the files named by the
+index and re-reads only those whose mtime or size changed since they were
+last loaded, all in one transaction. A database written by another
+agents-core version, or one that cannot be opened, is rebuilt from scratch.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+from agents_core import __version__
+from agents_core.cache import cache_dir
+from agents_core.tasks import PRIORITIES_FILE
+
+DB_NAME = "tasks.sqlite"
+INDEX_FILE = ".agents/index.json"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (path TEXT PRIMARY KEY, module TEXT, mtime_ns INTEGER, size INTEGER);
+CREATE TABLE tasks (tasks_file TEXT, position INTEGER, id TEXT, module TEXT, status TEXT, data TEXT,
+                    PRIMARY KEY (tasks_file, position));
+CREATE INDEX tasks_id ON tasks (id);
+CREATE INDEX tasks_module_status ON tasks (module, status);
+CREATE INDEX tasks_status ON tasks (status);
+CREATE TABLE refs (tasks_file TEXT, task_id TEXT, file TEXT);
+CREATE INDEX refs_file ON refs (file);
+CREATE INDEX refs_tasks_file ON refs (tasks_file);
+CREATE TABLE queue (position INTEGER PRIMARY KEY, task_id TEXT, status TEXT, file TEXT, data TEXT);
+CREATE INDEX queue_task_id ON queue (task_id);
+CREATE INDEX queue_status ON queue (status);
+"""
+
+
+def db_path(project_root: Path) -> Path:
+    return cache_dir(project_root) / DB_NAME
+
+
+def _create(conn):
+    # Statement by statement: executescript() would commit the open transaction.
+    for statement in SCHEMA.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    conn.execute("INSERT INTO meta VALUES ('version', ?)", (__version__,))
+
+
+def _current(conn) -> bool:
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meta'").fetchone():
+        return False
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    return row is not None and row[0] == __version__
+
+
+def connect(project_root: Path) -> sqlite3.Connection:
+    """Opens the database, recreating it if it is stale or unreadable."""
+    path = db_path(project_root)
+    try:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        if _current(conn):
+            return conn
+        conn.close()
+    except sqlite3.DatabaseError:
+        pass
+    # Derived data: replace rather than migrate.
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    if not _current(conn):
+        _create(conn)
+    conn.execute("COMMIT")
+    # Readers then do not wait for a refresh in another process.
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read(project_root: Path, rel: str):
+    try:
+        with open(project_root / rel, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[query][WARN] Skipping {rel}: {e}", file=sys.stderr)
+        return None
+
+
+def _load_tasks(conn, rel, module, doc):
+    conn.execute("DELETE FROM tasks WHERE tasks_file = ?", (rel,))
+    conn.execute("DELETE FROM refs WHERE tasks_file = ?", (rel,))
+    tasks = doc.get("tasks", []) if isinstance(doc, dict) else []
+    conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?)",
+                     [(rel, pos, t.get("id"), module, t.get("status"), json.dumps(t, ensure_ascii=False))
+                      for pos, t in enumerate(tasks) if isinstance(t, dict)])
+    conn.executemany("INSERT INTO refs VALUES (?, ?, ?)",
+                     [(rel, t.get("id"), ref.get("file")) for t in tasks if isinstance(t, dict)
+                      for ref in t.get("refs", []) if isinstance(ref, dict)])
+
+
+def _load_queue(conn, doc):
+    conn.execute("DELETE FROM queue")
+    queue = doc.get("queue", []) if isinstance(doc, dict) else []
+    conn.executemany("INSERT INTO queue VALUES (?, ?, ?, ?, ?)",
+                     [(pos, e.get("task_id"), e.get("status"), e.get("file"), json.dumps(e, ensure_ascii=False))
+                      for pos, e in enumerate(queue) if isinstance(e, dict)])
+
+
+def _wanted(project_root: Path, known):
+    """Maps each file to mirror to its module name (None for non-task files)."""
+    sig = _signature(os.path.join(project_root, INDEX_FILE))
+    if sig is not None and known.get(INDEX_FILE) == (None, *sig):
+        # Index unchanged: the task files it lists are the ones already known.
+        return {rel: mod for rel, (mod, _, _) in known.items()}, sig
+    index_doc = _read(project_root, INDEX_FILE) if sig is not None else None
+    wanted = {INDEX_FILE: None, PRIORITIES_FILE: None}
+    for mod in (index_doc or {}).get("modules", []):
+        wanted.setdefault(mod["tasks_file"], mod["name"])
+    return wanted, sig
+
+
+def refresh(conn, project_root: Path) -> int:
+    """Brings the database in line with the JSON files.
+
+    Returns:
+        The number of task and priorities files that were (re)loaded or
+        dropped.
+    """
+    changed = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        known = {row[0]: (row[1], row[2], row[3]) for row in conn.execute("SELECT * FROM files")}
+        wanted, index_sig = _wanted(project_root, known)
+        wanted.setdefault(PRIORITIES_FILE, None)
+        # Plain strings: pathlib joins would cost more than the stat calls.
+        root = str(project_root)
+        for rel in known.keys() - wanted.keys():
+            conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+            _load_tasks(conn, rel, None, None)
+            changed += 1
+        for rel, module in wanted.items():
+            sig = index_sig if rel == INDEX_FILE else _signature(os.path.join(root, rel))
+            # A missing file keeps its row, with a NULL signature, so that it is
+            # still wanted while the index is unchanged and is loaded once restored.
+            row = (module, *(sig or (None, None)))
+            if known.get(rel) == row:
+                continue
+            if rel == PRIORITIES_FILE:
+                _load_queue(conn, _read(project_root, rel) if sig is not None else None)
+            elif rel != INDEX_FILE:
+                _load_tasks(conn, rel, module, _read(project_root, rel) if sig is not None else None)
+            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (rel, *row))
+            changed += rel != INDEX_FILE and (sig is not None or rel in known)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return changed
+
+
+def _below(column, path):
+    """SQL condition and parameters: ``column`` equals ``path`` or lies below it.
+
+    "Below" is the half-open range [path + "/", path + "0"), since "0"
+    follows "/"; unlike LIKE, a range can use the column's index.
+    """
+    prefix = path.rstrip("/")
+    return f"({column} = ? OR ({column} >= ? AND {column} < ?))", [prefix, prefix + "/", prefix + "0"]
+
+
+def query(project_root: Path, module=None, status=None, task_id=None, ref=None, queue=False, refresh_db=True):
+    """Looks tasks (or queue entries) up in the derived database.
+
+    Args:
+        project_root: The root directory of the project.
+        module: Only tasks of the module with this index name.
+        status: Only tasks or entries with this status.
+        task_id: Only the task or entry with this id.
+        ref: Only tasks with a ref to this file or to a file below this
+            directory.
+        queue: Query ``priorities.json`` queue entries instead of tasks;
+            ``module`` and ``ref`` do not apply.
+        refresh_db: Refresh from changed JSON files first.
+
+    Returns:
+        Task dicts extended with ``module`` and ``tasks_file`` (as
+        ``tasks.list_tasks`` returns them) ordered by tasks file and position,
+        or queue entries in queue order.
+    """
+    conn = connect(project_root)
+    try:
+        if refresh_db:
+            refresh(conn, project_root)
+        where, params = [], []
+        if queue:
+            for column, value in (("task_id", task_id), ("status", status)):
+                if value is not None:
+                    where.append(f"{column} = ?")
+                    params.append(value)
+            sql = "SELECT data FROM queue"
+            order = " ORDER BY position"
+        else:
+            for column, value in (("t.module", module), ("t.status", status), ("t.id", task_id)):
+                if value is not None:
+                    where.append(f"{column} = ?")
+                    params.append(value)
+            if ref is not None:
+                cond, ref_params = _below("file", ref)
+                where.append(f"(t.tasks_file, t.id) IN (SELECT tasks_file, task_id FROM refs WHERE {cond})")
+                params += ref_params
+            sql = "SELECT t.data, t.module, t.tasks_file FROM tasks t"
+            order = " ORDER BY t.tasks_file, t.position"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = conn.execute(sql + order, params).fetchall()
+    finally:
+        conn.close()
+    if queue:
+        return [json.loads(data) for (data,) in rows]
+    return [dict(json.loads(data), module=mod, tasks_file=rel) for data, mod, rel in rows]
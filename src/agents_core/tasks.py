@@ -0,0 +1,158 @@
+"""Task queries over the module ``tasks.json`` files listed in the index."""
+
+import json
+from pathlib import Path
+
+PRIORITIES_FILE = ".agents/priorities.json"
+
+
+def read_json(path):
+    """Loads a JSON file, raising on failure (unlike ``scan.load_json``)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_tasks(project_root: Path, module=None, status=None, task_id=None, load=read_json):
+    """Returns the tasks matching every given filter.
+
+    Args:
+        project_root: The root directory of the project.
+        module: Only tasks of the module with this index name.
+        status: Only tasks with this status.
+        task_id: Only the task with this id.
+        load: Callable used to read JSON files, so callers may cache them.
+
+    Returns:
+        A list of task dicts, each extended with the ``module`` name and
+        ``tasks_file`` it came from.
+    """
+    index_path = project_root / ".agents" / "index.json"
+    if not index_path.exists():
+        return []
+    idx = load(index_path)
+
+    found = []
+    for mod in idx.get("modules", []):
+        if module is not None and mod.get("name") != module:
+            continue
+        tasks_path = project_root / mod["tasks_file"]
+        if not tasks_path.exists():
+            continue
+        for task in load(tasks_path).get("tasks", []):
+            if status is not None and task.get("status") != status:
+                continue
+            if task_id is not None and task.get("id") != task_id:
+                continue
+            found.append(dict(task, module=mod["name"], tasks_file=mod["tasks_file"]))
+    return found
+
+
+def _modules(project_root: Path, module=None):
+    index_path = project_root / ".agents" / "index.json"
+    if not index_path.exists():
+        return []
+    mods = read_json(index_path).get("modules", [])
+    return [m for m in mods if module is None or m.get("name") == module]
+
+
+def _start(task, agent):
+    task["status"] = "doing"
+    if agent:
+        task["claimed_by"] = agent
+
+
+def _claim_in_file(project_root: Path, mod, agent, task_id=None, skip=frozenset()):
+    """Claims ``task_id`` (or the first claimable todo task) in one tasks file.
+
+    Returns:
+        ``(claimed, status)``: the claimed task or None, and the status that
+        ``task_id`` has in the file (None if it is not there).
+    """
+    from agents_core.locks import transaction
+
+    if not (project_root / mod["tasks_file"]).exists():
+        return None, None
+    with transaction(project_root, mod["tasks_file"]) as txn:
+        for task in txn.data.get("tasks", []):
+            if task_id is not None and task.get("id") != task_id:
+                continue
+            if task.get("status") != "todo" or task.get("id") in skip:
+                if task_id is not None:
+                    return None, task.get("status")
+                continue
+            _start(task, agent)
+            return dict(task, module=mod["name"], tasks_file=mod["tasks_file"]), "todo"
+    return None, None
+
+
+def claim_next(project_root: Path, agent=None, module=None):
+    """Atomically moves the next ``todo`` task to ``doing``.
+
+    Ready entries of the ``priorities.json`` queue come first, in the
+    order of its ``policy`` (see ``schedule.Scheduler``); then ``todo``
+    tasks of the module task files that the queue does not list. A queue
+    entry whose task is no longer ``todo`` in its tasks file takes that
+    status in the queue and is passed over.
+    Every file is changed under its lock (priorities before tasks files, so
+    concurrent claims cannot deadlock), so two agents never claim the same
+    task.
+
+    Args:
+        project_root: The root directory of the project.
+        agent: Optional name recorded as ``claimed_by``.
+        module: Only claim tasks of the module with this index name.
+
+    Returns:
+        The claimed task, extended with ``module`` and ``tasks_file``, or
+        None if nothing is claimable.
+    """
+    from agents_core.locks import transaction
+    from agents_core.schedule import from_priorities
+
+    mods = _modules(project_root, module)
+    by_file = {m["tasks_file"]: m for m in mods}
+    queued = set()
+
+    if (project_root / PRIORITIES_FILE).exists():
+        with transaction(project_root, PRIORITIES_FILE) as txn:
+            scheduler = from_priorities(txn.data)
+            queued = set(scheduler.ids)
+            stale = True
+            while stale:
+                stale = False
+                for entry in scheduler.ready():
+                    mod = by_file.get(entry.get("file"))
+                    if mod is None and module is not None:
+                        continue
+                    claimed, status = None, None
+                    if mod is not None:
+                        claimed, status = _claim_in_file(project_root, mod, agent, entry["task_id"])
+                    if claimed is None and status is not None:
+                        # Finishing a task may make others ready, so look again.
+                        scheduler.set_status(entry["task_id"], status)
+                        stale = True
+                        break
+                    _start(entry, agent)
+                    return claimed or dict(entry, id=entry["task_id"], module=mod["name"] if mod else None,
+                                           tasks_file=entry.get("file"))
+
+    for mod in mods:
+        claimed, _ = _claim_in_file(project_root, mod, agent, skip=queued)
+        if claimed is not None:
+            return claimed
+    return None
+
+
+def ready_tasks(project_root: Path, limit=None, load=read_json):
+    """Returns the scheduler over the ``priorities.json`` queue and its ready entries.
+
+    Each entry is extended with its ``depth`` and ``critical_path``. Without
+    a priorities file the scheduler is None and the list empty.
+    """
+    from agents_core.schedule import from_priorities
+
+    path = project_root / PRIORITIES_FILE
+    if not path.exists():
+        return None, []
+    scheduler = from_priorities(load(path))
+    return scheduler, [scheduler.describe(e) for e in scheduler.ready(limit)]
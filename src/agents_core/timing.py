@@ -0,0 +1,170 @@
+"""Wall-clock timings, counters and the ``--timings``/``--profile`` report.
+
+A ``Timings`` records how long each named stage of a run took, plus
+counters (directories listed, files validated, bytes written, ...) and the
+calls and time spent in subprocesses such as git. Commands time their
+stages with their own ``Timings``; code that runs deep inside a command
+(the walker, the validator, ``FileWriter``, ``GitRepo``) reports through
+the module-level ``count``, ``stage`` and ``subprocess_call`` helpers,
+which record into the ``Timings`` installed by ``instrument`` and do
+nothing otherwise.
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# The Timings collecting the current command's report, if instrumented.
+_active = None
+
+
+class Timings:
+    """Records stage durations, counters and subprocess time, in order."""
+
+    def __init__(self):
+        self.stages = []
+        self.counters = {}
+        self.subprocesses = {}
+        # Git calls may be accounted from a worker thread and the event loop at once.
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the enclosed block as stage ``name``.
+
+        The stage is recorded even if the block raises or exits, so a run that
+        aborts still reports where its time went.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def count(self, name: str, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def subprocess_call(self, name: str, seconds: float):
+        """Accounts one finished call of the external program ``name``."""
+        with self._lock:
+            calls, total = self.subprocesses.get(name, (0, 0.0))
+            self.subprocesses[name] = (calls + 1, total + seconds)
+
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.stages)
+
+    def summary(self) -> str:
+        """Formats the stages as ``name 12.3ms, ..., total 45.6ms``."""
+        parts = [f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.stages]
+        parts.append(f"total {self.total() * 1000:.1f}ms")
+        return ", ".join(parts)
+
+    def report(self) -> dict:
+        """Returns the recorded data as a JSON-serializable dict."""
+        return {
+            "stages": [{"name": name, "ms": round(seconds * 1000, 3)} for name, seconds in self.stages],
+            "total_ms": round(self.total() * 1000, 3),
+            "counters": dict(self.counters),
+            "subprocesses": {name: {"calls": calls, "ms": round(seconds * 1000, 3)}
+                             for name, (calls, seconds) in self.subprocesses.items()},
+        }
+
+
+def active():
+    """Returns the ``Timings`` installed by ``instrument``, or None."""
+    return _active
+
+
+def count(name: str, n=1):
+    """Adds ``n`` to counter ``name`` of the instrumented command, if any."""
+    if _active is not None:
+        _active.count(name, n)
+
+
+def subprocess_call(name: str, seconds: float):
+    if _active is not None:
+        _active.subprocess_call(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Like ``Timings.stage`` on the instrumented command; a no-op otherwise."""
+    if _active is None:
+        yield
+    else:
+        with _active.stage(name):
+            yield
+
+
+def _max_rss_kib():
+    """Returns the peak resident set size in KiB, or None where it is unknown."""
+    try:
+        import resource
+    except ImportError:
+        # ``resource`` is Unix-only.
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+@contextmanager
+def instrument(command: str, report_path=None, profile_path=None, trace_memory: bool = False):
+    """Collects a report for the enclosed command and writes it on exit.
+
+    The report is written even when the command fails or calls
+    ``sys.exit``, since slow failing runs are the ones worth looking at.
+
+    Args:
+        command: Name of the command, recorded in the report.
+        report_path: File for the JSON report; ``"-"`` for stderr, None to
+            skip the report.
+        profile_path: If given, the command runs under ``cProfile`` and the
+            stats are dumped here (read them with ``python -m pstats``).
+        trace_memory: Record the peak of Python allocations with
+            ``tracemalloc`` (slows the command down noticeably).
+    """
+    global _active
+    timings = _active = Timings()
+    profiler = None
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if profile_path is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+    start = time.perf_counter()
+    exit_code = 0
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield timings
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+        raise
+    except BaseException:
+        exit_code = 1
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        _active = None
+        report = {"command": command, "exit": exit_code, "wall_ms": round(wall * 1000, 3), **timings.report()}
+        if trace_memory:
+            report["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        rss = _max_rss_kib()
+        if rss is not None:
+            report["max_rss_kib"] = rss
+        if report_path is not None:
+            text = json.dumps(report, indent=2) + "\n"
+            if report_path == "-":
+                sys.stderr.write(text)
+            else:
+                with open(report_path, "w", encoding="utf-8") as f:
+                    f.write(text)
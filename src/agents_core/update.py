@@ -1,139 +1,205 @@
 """Module for post-session update logic."""
 
+import asyncio
 import datetime
+import functools
 import json
 import logging
-import subprocess
 import sys
-import time
 from pathlib import Path
 
-from agents_core.scan import scan
+from agents_core.discovery import DirCache
+from agents_core.gitops import PUSH_RETRIES, GitError, GitRepo, in_scope, push_with_retry
+from agents_core.ignore import load_ignore_rules
+from agents_core.scan import build_index, discover_modules, dump_json, merge_modules, missing_task_files
+from agents_core import timing
+from agents_core.timing import Timings
+from agents_core.validate import INDEX_FILE, print_report, validate_project
+from agents_core.writer import FileWriter
+
+AGENTS_DIR = ".agents"
+PRETTY_INDEX_FILE = ".agents/index.pretty.json"
 
-# Configure logging to match Google standards
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s: %(message)s',
-    stream=sys.stdout
-)
 logger = logging.getLogger(__name__)
 
-def run_command(cmd: list, cwd: Path, abort_on_error: bool = True) -> subprocess.CompletedProcess:
-    """Runs a shell command and returns the result.
-    
+def configure_logging():
+    """Configures logging to match Google standards.
+
+    Called when an update runs rather than at import time, so importing this
+    module has no side effects on the root logger.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(levelname)s: %(message)s',
+        stream=sys.stdout
+    )
+
+def _read_bytes(path: Path):
+    """Returns the file's bytes, or None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def sync_control_plane(project_root: Path, use_cache: bool = True, timings=None) -> list:
+    """Refreshes, validates and writes the index and task files in one pass.
+
+    Equivalent to ``scan --refresh-index`` followed by ``validate`` and the
+    pretty index snapshot, but every file is read at most once and the
+    validated content is the in-memory content about to be written. Files
+    are written only when their bytes change.
+
     Args:
-        cmd: List of command arguments.
-        cwd: Working directory.
-        abort_on_error: Whether to exit on error.
-        
+        project_root: The root directory of the project.
+        use_cache: Whether discovery and validation may reuse their caches.
+        timings: Optional ``Timings`` that receives one entry per stage.
+
     Returns:
-        The result of the command.
+        The relative paths that were written; unchanged files are skipped.
     """
-    try:
-        result = subprocess.run(
-            cmd,
-            cwd=cwd,
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        return result
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Command failed: {' '.join(cmd)}")
-        if e.stdout:
-            logger.error(f"STDOUT: {e.stdout}")
-        if e.stderr:
-            logger.error(f"STDERR: {e.stderr}")
-        if abort_on_error:
-            sys.exit(1)
-        return e
+    if timings is None:
+        timings = Timings()
+    if not (project_root / ".agents").exists():
+        logger.error(".agents directory not found. Run 'agents init' first.")
+        sys.exit(1)
+
+    with timings.stage("load"):
+        old_index = _read_bytes(project_root / INDEX_FILE)
+        old_pretty = _read_bytes(project_root / PRETTY_INDEX_FILE)
+        existing_index = {}
+        if old_index is not None:
+            try:
+                existing_index = json.loads(old_index.decode("utf-8"))
+            except ValueError as e:
+                logger.error(f"Failed to read {INDEX_FILE}: {e}")
+                sys.exit(1)
+        ignore = load_ignore_rules(project_root)
+
+    with timings.stage("discover"):
+        cache = DirCache.load(project_root, ignore) if use_cache else None
+        mods = discover_modules(project_root, ignore, cache)
+        if cache is not None:
+            cache.save(project_root)
+
+    with timings.stage("merge"):
+        final_mods = merge_modules(mods, existing_index)
+        index_bytes = dump_json(build_index(final_mods, existing_index, ignore))
+        new_tasks = missing_task_files(project_root, final_mods)
+
+    with timings.stage("validate"):
+        report = validate_project(project_root, use_cache=use_cache,
+                                  documents=dict(new_tasks, **{INDEX_FILE: index_bytes}))
+        print_report(report)
+
+    writer = FileWriter()
+    with timings.stage("write"):
+        # The index and new task files are written even if validation failed,
+        # as a separate scan would have; the snapshot only for a valid tree.
+        outputs = [(INDEX_FILE, index_bytes, old_index)]
+        outputs += [(rel, content, None) for rel, content in new_tasks.items()]
+        if report["ok"]:
+            # The snapshot uses the same formatting as the index itself.
+            outputs.append((PRETTY_INDEX_FILE, index_bytes, old_pretty))
+        for rel, content, old in outputs:
+            path = project_root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Content read during "load" is compared without a second read.
+            if writer.write(path, content, current=old):
+                logger.info(f"Wrote {rel}")
+        logger.info(f"Control-plane files: {writer.summary()}")
 
-def update(project_root: Path):
+    if not report["ok"]:
+        sys.exit(1)
+    return [path.relative_to(project_root).as_posix() for path in writer.written]
+
+def update(project_root: Path, use_cache: bool = True, paths=None):
     """Integrates post-session update logic.
     
     Args:
         project_root: The root directory of the project.
+        use_cache: Whether module discovery may reuse the directory cache.
+        paths: Paths the session touched, staged together with ``.agents/``.
+            By default every changed path reported by git is staged.
     """
-    logger.info("Validating tooling...")
-    # Check for git
-    run_command(["git", "rev-parse", "--is-inside-work-tree"], project_root)
-    
+    configure_logging()
+    # Under --timings the stages go into the command's report as well.
+    timings = timing.active() or Timings()
+    repo = GitRepo(project_root)
+    try:
+        asyncio.run(_update(project_root, use_cache, paths, timings, repo))
+    except GitError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    finally:
+        logger.info(f"Timings: {timings.summary()}")
+        logger.info(f"Git: {repo.summary()}")
+
+def _commit_local(project_root: Path, use_cache: bool, paths, timings: Timings, repo: GitRepo, status) -> bool:
+    """Refreshes the control plane, then stages and commits; returns True if committed."""
     logger.info("Running repo scan + validation...")
-    # 1. Refresh index
-    scan(project_root, refresh_index=True)
-    # 2. Validate
-    scan(project_root, validate_only=True)
-    
-    logger.info("Snapshotting ROADMAP (OVERVIEW.md pointers)...")
-    index_path = project_root / ".agents" / "index.json"
-    pretty_index_path = project_root / ".agents" / "index.pretty.json"
-    
-    if index_path.exists():
-        try:
-            with open(index_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            with open(pretty_index_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-                f.write("\n")
-        except Exception as e:
-            logger.error(f"Failed to create pretty index: {e}")
-            sys.exit(1)
+    written = sync_control_plane(project_root, use_cache=use_cache, timings=timings)
     
     logger.info("Git add/commit...")
-    run_command(["git", "add", "-A"], project_root)
-    
-    # Check for changes
-    diff_result = subprocess.run(
-        ["git", "diff", "--cached", "--quiet"],
-        cwd=project_root
-    )
-    
-    if diff_result.returncode != 0:
-        ts = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-        commit_msg = f"chore(agent): post-session update @ {ts}"
-        run_command(["git", "commit", "-m", commit_msg, "-m", "Runbook: agents update"], project_root)
-    else:
-        logger.info("No changes to commit.")
-    
-    # Push with basic retry
-    retries = 3
-    for i in range(1, retries + 1):
-        push_result = subprocess.run(
-            ["git", "push"],
-            cwd=project_root,
-            capture_output=True,
-            text=True
-        )
-        
-        if push_result.returncode == 0:
-            logger.info("Pushed successfully.")
-            return
-
-        logger.warning(f"Push failed (attempt {i}/{retries}).")
-        
-        # Check if behind
-        status_result = subprocess.run(
-            ["git", "status", "-sb"],
-            cwd=project_root,
-            capture_output=True,
-            text=True
-        )
-        if "[behind" in status_result.stdout:
-            logger.info("Remote has new commits. Attempting 'git pull --rebase --autostash'...")
-            pull_result = subprocess.run(
-                ["git", "pull", "--rebase", "--autostash"],
-                cwd=project_root
-            )
-            if pull_result.returncode == 0:
-                logger.info("Rebase completed. Retrying push immediately...")
-                continue
-            else:
-                logger.error("Automatic rebase failed. Resolve conflicts and rerun the script.")
-                sys.exit(1)
-        
-        if i < retries:
-            logger.info("Retrying in 3s...")
-            time.sleep(3)
-            
-    logger.error(f"Push failed after {retries} attempts.")
-    sys.exit(1)
+    with timings.stage("commit"):
+        # Status paths are relative to the work-tree top, ours to the project.
+        agents_dir = repo.top_path(AGENTS_DIR)
+        scope = [agents_dir] + [repo.top_path(p) for p in paths or []]
+        changed = [entry for entry in status.entries if paths is None or in_scope(entry.path, scope)]
+        to_stage = {p for entry in changed for p in entry.paths()} | {repo.top_path(p) for p in written}
+        if to_stage:
+            # The control-plane directory is staged whole, so deletions there count.
+            repo.stage([agents_dir] + sorted(p for p in to_stage if not in_scope(p, [agents_dir])))
+        # The status predates staging: rewritten files may now match HEAD again.
+        committed = (bool(to_stage) or any(entry.staged for entry in status.entries)) and repo.has_staged_changes()
+        if committed:
+            ts = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+            commit_msg = f"chore(agent): post-session update @ {ts}"
+            repo.commit(commit_msg, "Runbook: agents update")
+        else:
+            logger.info("No changes to commit.")
+    return committed
+
+async def _update(project_root: Path, use_cache: bool, paths, timings: Timings, repo: GitRepo):
+    logger.info("Validating tooling...")
+    with timings.stage("git-status"):
+        # One status call checks for a work tree and reports branch and changes.
+        status = repo.status()
+    if any(entry.unmerged for entry in status.entries):
+        logger.error("Unmerged paths in the work tree. Resolve conflicts and rerun.")
+        sys.exit(1)
+
+    # Fetch in the background while the scan, validation and commit run, so
+    # the network round trip overlaps local work instead of following it.
+    fetch = asyncio.ensure_future(repo.fetch()) if status.upstream is not None else None
+    try:
+        loop = asyncio.get_event_loop()
+        committed = await loop.run_in_executor(
+            None, functools.partial(_commit_local, project_root, use_cache, paths, timings, repo, status))
+        with timings.stage("fetch-wait"):
+            fetched = await fetch if fetch is not None else None
+    finally:
+        if fetch is not None and not fetch.done():
+            fetch.cancel()
+
+    with timings.stage("push"):
+        if fetched is not None and fetched.returncode == 0:
+            # None while the upstream ref does not exist yet: then just push.
+            counts = repo.ahead_behind()
+        else:
+            if fetched is not None:
+                logger.warning("git fetch failed; pushing without it.")
+            # Without a fetch, only the status taken before the commit is known.
+            counts = (status.ahead + (1 if committed else 0), 0)
+        if counts is not None:
+            # Skip the push when nothing is ahead; otherwise rebase if needed, push once.
+            ahead, behind = counts
+            if ahead == 0:
+                logger.info("Nothing to push.")
+                return
+            if behind:
+                logger.info(f"Remote has {behind} new commit(s). Rebasing before push...")
+                repo.rebase_onto_upstream()
+        if not push_with_retry(repo, logger):
+            logger.error(f"Push failed after {PUSH_RETRIES} attempts.")
+            sys.exit(1)
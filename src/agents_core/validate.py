@@ -0,0 +1,389 @@
+"""Project-wide validation engine.
+
+Validates ``index.json``, ``priorities.json`` and every module ``tasks.json``
+and collects every error with its file and JSON pointer instead of stopping
+at the first one. Task files are spread across a process pool when there
+are enough of them to amortize the pool's startup cost.
+
+Passing results are remembered in ``.agents/cache/validation.json`` by
+content hash, so a file that has not changed since it last passed is only
+hashed, not parsed or validated. The cache is keyed by a digest of the
+bundled schemas, so any schema change invalidates all of it.
+
+Task files of ``STREAM_THRESHOLD`` bytes or more are never loaded whole:
+they are read with ``jsonstream`` and each task is checked on its own
+against the task item subschema, so memory stays bounded by the largest
+task. The errors are the same as for the loaded document.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from importlib.resources import files
+from pathlib import Path
+
+from agents_core import jsonstream, schemagen
+from agents_core import scan as _scan
+from agents_core import timing
+from agents_core.cache import load_cache, save_cache
+
+INDEX_FILE = ".agents/index.json"
+PRIORITIES_FILE = ".agents/priorities.json"
+
+# Below this many task files a process pool costs more than it saves.
+PARALLEL_THRESHOLD = 64
+
+# Task files handed to a worker per round trip.
+BATCH_SIZE = 32
+
+CACHE_NAME = "validation.json"
+
+# Task files at least this large are validated task by task from a stream.
+STREAM_THRESHOLD = 16 << 20
+
+TASK_ITEMS = "/properties/tasks/items"
+
+# Passing keys and streaming threshold of a pool worker, installed by _init_worker.
+_worker_passed = frozenset()
+_worker_stream_threshold = STREAM_THRESHOLD
+
+
+def json_pointer(path) -> str:
+    """Formats a jsonschema error path as an RFC 6901 JSON pointer."""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in path)
+
+
+def _error(file: str, pointer: str, message: str, schema=None) -> dict:
+    return {"file": file, "pointer": pointer, "schema": schema, "message": message}
+
+
+def collect_errors(instance, schema_name: str, file: str):
+    """Returns every schema violation in ``instance`` as error dicts.
+
+    Bundled schemas are checked with their generated validator from
+    ``schemagen``; anything it cannot compile goes through ``jsonschema``.
+    """
+    check = schemagen.bundled_validator(schema_name)
+    if check is not None:
+        found = check(instance)
+    else:
+        validator = _scan.get_validator(schema_name)
+        found = [(e.absolute_path, e.message) for e in validator.iter_errors(instance)]
+    return _format_errors(found, schema_name, file)
+
+
+def _format_errors(found, schema_name: str, file: str):
+    """Turns ``(path, message)`` pairs into error dicts, ordered by path."""
+    # Array indices sort numerically, before any property name at the same depth.
+    found.sort(key=lambda e: [(isinstance(p, str), p) for p in e[0]])
+    return [_error(file, json_pointer(path), message, schema_name) for path, message in found]
+
+
+@lru_cache(maxsize=None)
+def schemas_digest() -> str:
+    """Returns a digest over every bundled schema file."""
+    h = hashlib.sha256()
+    schema_pkg = files("agents_core.resources.schemas")
+    for item in sorted(schema_pkg.iterdir(), key=lambda i: i.name):
+        if item.is_file() and item.name.endswith(".json"):
+            h.update(item.name.encode("utf-8") + b"\0" + item.read_bytes() + b"\0")
+    return h.hexdigest()
+
+
+def _read(project_root: Path, rel: str):
+    """Reads a file, returning ``(raw_bytes, errors)``."""
+    try:
+        with open(project_root / rel, "rb") as f:
+            return f.read(), []
+    except FileNotFoundError:
+        return None, [_error(rel, "", "file not found")]
+    except OSError as e:
+        return None, [_error(rel, "", f"failed to read: {e}")]
+
+
+def _read_resident(project_root: Path, rel: str, files):
+    """Reads and parses a file through a ``serve.FileCache``.
+
+    Returns:
+        ``(raw_bytes, data, errors)``, reported like ``_read`` and ``_parse``.
+    """
+    path = project_root / rel
+    try:
+        raw = files.read(path)
+    except FileNotFoundError:
+        return None, None, [_error(rel, "", "file not found")]
+    except OSError as e:
+        return None, None, [_error(rel, "", f"failed to read: {e}")]
+    try:
+        return raw, files.load(path), []
+    except ValueError as e:
+        return raw, None, [_error(rel, "", f"failed to read: {e}")]
+
+
+def _parse(raw: bytes, rel: str):
+    """Decodes JSON, returning ``(data, errors)``."""
+    try:
+        return json.loads(raw.decode("utf-8")), []
+    except ValueError as e:
+        return None, [_error(rel, "", f"failed to read: {e}")]
+
+
+def _check(rel: str, raw: bytes, data, schema_name: str, passed):
+    """Validates parsed data unless its content hash already passed.
+
+    Returns:
+        An ``(errors, passing_key)`` tuple; ``passing_key`` is set when the
+        file is valid so the caller can record it in the cache.
+    """
+    key = f"{schema_name}:{hashlib.sha256(raw).hexdigest()}"
+    if key in passed:
+        return [], key
+    if data is None:
+        data, errors = _parse(raw, rel)
+        if errors:
+            return errors, None
+    errors = collect_errors(data, schema_name, rel)
+    return errors, None if errors else key
+
+
+def _file_digest(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _check_stream(project_root: Path, rel: str, passed):
+    """Like ``_check`` for a task file, but reads and validates it task by task.
+
+    The document minus its tasks is checked against the whole schema and
+    each task against the item subschema, with its errors moved under
+    ``/tasks/<index>``.
+
+    Returns:
+        An ``(errors, passing_key)`` tuple, or None when the schema cannot
+        be checked piecewise.
+    """
+    schema_name = "tasks.schema.json"
+    check_rest = schemagen.bundled_validator(schema_name)
+    check_task = schemagen.bundled_validator(schema_name, TASK_ITEMS)
+    if check_rest is None or check_task is None:
+        return None
+    path = project_root / rel
+    found = []
+    rest = {}
+    try:
+        key = f"{schema_name}:{_file_digest(path)}"
+        if key in passed:
+            return [], key
+        with open(path, "r", encoding="utf-8") as f:
+            for where, value in jsonstream.iter_members(f, "tasks"):
+                if len(where) == 2:
+                    found.extend((where + task_path, message) for task_path, message in check_task(value))
+                elif where:
+                    rest[where[0]] = value
+                else:
+                    rest = value
+    except FileNotFoundError:
+        return [_error(rel, "", "file not found")], None
+    except (OSError, ValueError) as e:
+        return [_error(rel, "", f"failed to read: {e}")], None
+    found.extend(check_rest(rest))
+    errors = _format_errors(found, schema_name, rel)
+    return errors, None if errors else key
+
+
+def _streams(project_root: Path, rel: str, schema_name: str, stream_threshold) -> bool:
+    if schema_name != "tasks.schema.json" or stream_threshold is None:
+        return False
+    try:
+        return os.stat(project_root / rel).st_size >= stream_threshold
+    except OSError:
+        return False
+
+
+def _check_file(project_root: Path, rel: str, schema_name: str, passed, documents=None,
+                stream_threshold=STREAM_THRESHOLD, files=None):
+    if documents and rel in documents:
+        return _check(rel, documents[rel], None, schema_name, passed)
+    if _streams(project_root, rel, schema_name, stream_threshold):
+        result = _check_stream(project_root, rel, passed)
+        if result is not None:
+            timing.count("files_streamed")
+            return result
+    if files is not None:
+        raw, data, errors = _read_resident(project_root, rel, files)
+        if errors:
+            return errors, None
+        return _check(rel, raw, data, schema_name, passed)
+    raw, errors = _read(project_root, rel)
+    if raw is None:
+        return errors, None
+    return _check(rel, raw, None, schema_name, passed)
+
+
+def validate_file(project_root: Path, rel: str, schema_name: str):
+    """Validates one file; unreadable files are reported, not raised."""
+    return _check_file(project_root, rel, schema_name, frozenset())[0]
+
+
+def _init_worker(passed, stream_threshold):
+    global _worker_passed, _worker_stream_threshold
+    _worker_passed = passed
+    _worker_stream_threshold = stream_threshold
+
+
+def _validate_batch(project_root: str, rels):
+    root = Path(project_root)
+    return [_check_file(root, rel, "tasks.schema.json", _worker_passed, stream_threshold=_worker_stream_threshold)
+            for rel in rels]
+
+
+def _validate_tasks(project_root: Path, task_files, jobs, passed, documents=None,
+                    stream_threshold=STREAM_THRESHOLD, files=None):
+    if documents:
+        # In-memory documents are checked here; only files on disk go to the pool.
+        results = [_check_file(project_root, rel, "tasks.schema.json", passed, documents)
+                   for rel in task_files if rel in documents]
+        task_files = [rel for rel in task_files if rel not in documents]
+        return results + _validate_tasks(project_root, task_files, jobs, passed, stream_threshold=stream_threshold,
+                                         files=files)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(task_files) < PARALLEL_THRESHOLD:
+        return [_check_file(project_root, rel, "tasks.schema.json", passed, stream_threshold=stream_threshold,
+                            files=files)
+                for rel in task_files]
+
+    results = {}
+    pooled = task_files
+    if files is not None:
+        # Worker processes cannot see resident files, so those are checked
+        # here and only the files the cache does not hold go to the pool.
+        pooled = []
+        for rel in task_files:
+            if files.holds(project_root / rel):
+                results[rel] = _check_file(project_root, rel, "tasks.schema.json", passed,
+                                           stream_threshold=stream_threshold, files=files)
+            else:
+                pooled.append(rel)
+    batches = [pooled[i:i + BATCH_SIZE] for i in range(0, len(pooled), BATCH_SIZE)]
+    if batches:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(batches)),
+                                 initializer=_init_worker, initargs=(passed, stream_threshold)) as pool:
+            for batch, batch_result in zip(batches, pool.map(_validate_batch, [str(project_root)] * len(batches),
+                                                             batches)):
+                results.update(zip(batch, batch_result))
+    return [results[rel] for rel in task_files]
+
+
+def validate_project(project_root: Path, jobs=None, use_cache: bool = True, documents=None,
+                     stream_threshold=STREAM_THRESHOLD, refs: bool = False, files=None) -> dict:
+    """Validates all control-plane files of a project.
+
+    Args:
+        project_root: The root directory of the project.
+        jobs: Worker processes for task files (default: CPU count).
+        use_cache: Whether files that passed before with identical content
+            may be skipped.
+        documents: Optional ``{relative path: bytes}`` of content to validate
+            in place of what is on disk, e.g. files about to be written.
+        stream_threshold: Size in bytes from which task files are validated
+            task by task from a stream; 0 streams all of them, None none.
+        refs: Also report dangling references to files, lines and tasks
+            (see ``refcheck``); these are checked against the files on disk.
+        files: Optional ``serve.FileCache`` through which files below the
+            stream threshold are read and parsed, so a long-running caller
+            keeps them resident between runs. Resident task files are then
+            checked in this process and only the others go to the pool.
+
+    Returns:
+        A report dict with ``ok``, ``files_checked``, ``cached``,
+        ``error_count`` and ``errors``; each error carries ``file``,
+        ``pointer``, ``schema`` and ``message``.
+    """
+    passed = frozenset()
+    if use_cache:
+        cached = load_cache(project_root, CACHE_NAME, schemas_digest())
+        if isinstance(cached, list):
+            passed = frozenset(cached)
+
+    errors = []
+    results = []
+    task_files = []
+
+    documents = documents or {}
+    if INDEX_FILE in documents or (project_root / INDEX_FILE).exists():
+        idx = None
+        if INDEX_FILE not in documents and files is not None:
+            raw, idx, read_errors = _read_resident(project_root, INDEX_FILE, files)
+        else:
+            raw, read_errors = (documents[INDEX_FILE], []) if INDEX_FILE in documents \
+                else _read(project_root, INDEX_FILE)
+        errors.extend(read_errors)
+        if raw is not None and idx is None and not read_errors:
+            # The index is always parsed: it lists the task files.
+            idx, parse_errors = _parse(raw, INDEX_FILE)
+            errors.extend(parse_errors)
+        if idx is not None:
+            results.append(_check(INDEX_FILE, raw, idx, "index.schema.json", passed))
+            modules = idx.get("modules", []) if isinstance(idx, dict) else []
+            # Entries without a usable tasks_file are reported by the schema.
+            for mod in modules if isinstance(modules, list) else []:
+                tasks_file = mod.get("tasks_file") if isinstance(mod, dict) else None
+                if isinstance(tasks_file, str):
+                    task_files.append(tasks_file)
+        files_checked = 1
+    else:
+        files_checked = 0
+
+    results.extend(_validate_tasks(project_root, task_files, jobs, passed, documents, stream_threshold, files))
+    files_checked += len(task_files)
+
+    if PRIORITIES_FILE in documents or (project_root / PRIORITIES_FILE).exists():
+        files_checked += 1
+        results.append(_check_file(project_root, PRIORITIES_FILE, "priorities.schema.json", passed, documents,
+                                   files=files))
+
+    new_passed = []
+    for file_errors, key in results:
+        errors.extend(file_errors)
+        if key is not None:
+            new_passed.append(key)
+    if refs:
+        from agents_core.refcheck import check_refs
+        errors.extend(check_refs(project_root, task_files, jobs))
+    if use_cache and set(new_passed) != passed:
+        save_cache(project_root, CACHE_NAME, schemas_digest(), sorted(set(new_passed)))
+
+    cached = sum(1 for _, key in results if key in passed)
+    timing.count("files_validated", files_checked - cached)
+    timing.count("files_cached", cached)
+    return {
+        "ok": not errors,
+        "files_checked": files_checked,
+        "cached": cached,
+        "error_count": len(errors),
+        "errors": errors,
+    }
+
+
+def print_report(report: dict, fmt: str = "text"):
+    """Prints a validation report as text lines or as one JSON document."""
+    if fmt == "json":
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return
+    for e in report["errors"]:
+        location = f"{e['file']}:{e['pointer']}" if e["pointer"] else e["file"]
+        print(f"[validate][ERR] {location}: {e['message']}", file=sys.stderr)
+    if report["ok"]:
+        print(f"[validate] OK ({report['files_checked']} files, {report.get('cached', 0)} unchanged)")
+    else:
+        bad_files = len({e["file"] for e in report["errors"]})
+        print(f"[validate] {report['error_count']} error(s) in {bad_files} of "
+              f"{report['files_checked']} file(s)", file=sys.stderr)
@@ -0,0 +1,407 @@
+"""Watch mode for ``agents scan --watch``.
+
+Keeps an in-memory model of the module set and rewrites
+``.agents/index.json`` (plus any new ``tasks.json``) only when a directory
+gains its first code file or loses its last one. On Linux the model is
+maintained from inotify events, debounced and applied in batches; elsewhere
+the tree is re-polled with an in-memory ``DirCache`` so that each poll costs
+one ``stat`` per unchanged directory. If inotify cannot watch the whole tree
+(typically once ``fs.inotify.max_user_watches`` is used up), watch mode
+warns and switches to polling rather than serve an index that misses
+changes.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from agents_core.discovery import DISCOVERY_ROOTS, DirCache, _is_code_file, _list_dir, iter_code_dirs
+from agents_core.ignore import load_ignore_rules
+from agents_core.scan import assign_modules, build_index, ensure_task_files, load_json, merge_modules, write_json
+
+# inotify(7) constants.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_DIR_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+# A directory that vanished or cannot be read is not missing a watch.
+_UNWATCHABLE = (errno.ENOENT, errno.ENOTDIR, errno.EACCES)
+
+
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    @staticmethod
+    def available() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+            return hasattr(libc, "inotify_init1")
+        except OSError:
+            return False
+
+    def add(self, path: str, mask: int):
+        """Returns the watch descriptor, or None if ``path`` is gone or unreadable.
+
+        Raises:
+            OSError: If the watch could not be added otherwise, e.g. with
+                ``ENOSPC`` when the per-user watch limit is reached.
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd >= 0:
+            return wd
+        err = ctypes.get_errno()
+        if err in _UNWATCHABLE:
+            return None
+        raise OSError(err, os.strerror(err), path)
+
+    def remove(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float):
+        """Returns ``(wd, mask, name)`` events, waiting at most ``timeout``."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Node:
+    __slots__ = ("path", "rel", "ignore", "is_link", "has_code", "children", "wd")
+
+    def __init__(self, path, rel, ignore, is_link):
+        self.path = path
+        self.rel = rel
+        # Matcher that applies to this directory's own entries.
+        self.ignore = ignore
+        self.is_link = is_link
+        self.has_code = False
+        self.children = {}
+        self.wd = None
+
+
+class InotifyWatcher:
+    """Maintains the code-directory model from inotify events.
+
+    Building the model and applying events raise ``OSError`` when a
+    directory cannot be watched (see ``_Inotify.add``).
+    """
+
+    def __init__(self, project_root: Path, debounce: float = 0.2, max_delay: float = 2.0):
+        self.project_root = project_root
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._inotify = _Inotify()
+        try:
+            self._build()
+        except OSError:
+            self._inotify.close()
+            raise
+
+    def _build(self):
+        self.ignore = load_ignore_rules(self.project_root)
+        self.nodes = {}
+        self._by_wd = {}
+        root = str(self.project_root)
+        self._root_wd = self._inotify.add(root, _DIR_MASK)
+        for rel in DISCOVERY_ROOTS:
+            path = os.path.join(root, rel)
+            if os.path.isdir(path) and not self.ignore.is_ignored(rel, True):
+                # Discovery roots are always descended, even through a symlink.
+                self._register(path, rel, self.ignore, False)
+
+    def _register(self, path, rel, ignore, is_link):
+        stack = [(path, rel, ignore, is_link)]
+        while stack:
+            path, rel, ignore, is_link = stack.pop()
+            node = _Node(path, rel, ignore, is_link)
+            self.nodes[rel] = node
+            # Symlinked directories are classified but never descended.
+            if not is_link:
+                # Watch before listing so no entry created in between is missed.
+                node.wd = self._inotify.add(path, _DIR_MASK)
+                if node.wd is not None:
+                    self._by_wd[node.wd] = rel
+            code_files, subdirs, child_ignore, _ = _list_dir(path, rel, ignore)
+            node.has_code = bool(code_files)
+            if is_link:
+                continue
+            for sub_path, sub_rel, sub_link in subdirs:
+                node.children[sub_rel.rsplit("/", 1)[-1]] = sub_rel
+                stack.append((sub_path, sub_rel, child_ignore, sub_link))
+
+    def _unregister(self, rel):
+        stack = [rel]
+        while stack:
+            node = self.nodes.pop(stack.pop(), None)
+            if node is None:
+                continue
+            if node.wd is not None and self._by_wd.get(node.wd) == node.rel:
+                del self._by_wd[node.wd]
+                self._inotify.remove(node.wd)
+            stack.extend(node.children.values())
+
+    def _refresh(self, rel):
+        node = self.nodes[rel]
+        code_files, subdirs, child_ignore, _ = _list_dir(node.path, rel, node.ignore)
+        node.has_code = bool(code_files)
+        current = {sub_rel.rsplit("/", 1)[-1]: (sub_path, sub_rel, is_link)
+                   for sub_path, sub_rel, is_link in subdirs}
+        for name in list(node.children):
+            if name not in current:
+                self._unregister(node.children.pop(name))
+        for name, (sub_path, sub_rel, is_link) in current.items():
+            if name in node.children:
+                if is_link or self._same_dir(self.nodes[sub_rel]):
+                    continue
+                # Deleted and recreated, or replaced, since it was registered.
+                self._unregister(sub_rel)
+            node.children[name] = sub_rel
+            self._register(sub_path, sub_rel, child_ignore, is_link)
+
+    def _same_dir(self, node) -> bool:
+        """Checks that ``node`` still watches the directory now at its path.
+
+        Adding a watch for an inode that is already watched returns its
+        existing descriptor, so a different one means a new directory, and
+        a dropped descriptor means the old one is gone.
+        """
+        wd = self._inotify.add(node.path, _DIR_MASK)
+        if wd is None:
+            return node.wd is None
+        return wd == node.wd and self._by_wd.get(wd) == node.rel
+
+    def _rebuild(self, rel):
+        node = self.nodes[rel]
+        self._unregister(rel)
+        self._register(node.path, rel, node.ignore, node.is_link)
+
+    def apply(self, events):
+        """Applies a batch of raw inotify events to the model."""
+        dirty, rebuild, full = set(), set(), False
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                full = True
+                continue
+            if wd == self._root_wd:
+                if name in DISCOVERY_ROOTS or name == ".gitignore":
+                    full = True
+                continue
+            rel = self._by_wd.get(wd)
+            if rel is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._by_wd[wd]
+                continue
+            if name == ".gitignore":
+                rebuild.add(rel)
+            elif mask & IN_ISDIR or _is_code_file(name):
+                # Plain writes and non-code files cannot change the module set.
+                if not mask & IN_CLOSE_WRITE:
+                    dirty.add(rel)
+                # A directory appearing under a known name replaces that subtree.
+                child = self.nodes[rel].children.get(name) if mask & IN_ISDIR else None
+                if child is not None and mask & (IN_CREATE | IN_MOVED_TO):
+                    rebuild.add(child)
+
+        if full:
+            for rel in [r for r in DISCOVERY_ROOTS if r in self.nodes]:
+                self._unregister(rel)
+            self._inotify.remove(self._root_wd)
+            self._build()
+            return
+        for rel in sorted(rebuild, key=len):
+            if rel in self.nodes:
+                self._rebuild(rel)
+        for rel in sorted(dirty - rebuild, key=len):
+            if rel in self.nodes:
+                self._refresh(rel)
+
+    def wait(self, timeout: float) -> bool:
+        """Waits for one debounced batch of events and applies it.
+
+        Returns:
+            True if any events were processed.
+        """
+        batch = self._inotify.read(timeout)
+        if not batch:
+            return False
+        first = time.monotonic()
+        while time.monotonic() - first < self.max_delay:
+            more = self._inotify.read(self.debounce)
+            if not more:
+                break
+            batch.extend(more)
+        self.apply(batch)
+        return True
+
+    def code_dirs(self):
+        """Returns code directories in the same order as ``iter_code_dirs``."""
+        out = []
+        for top in DISCOVERY_ROOTS:
+            if top in self.nodes:
+                self._collect(self.nodes[top], out)
+        return out
+
+    def _collect(self, parent, out):
+        # Same order as discovery._walk: a directory's children in name
+        # order, before any of their own children.
+        children = [self.nodes[parent.children[name]] for name in sorted(parent.children)]
+        out.extend(child.rel for child in children if child.has_code)
+        for child in children:
+            if not child.is_link:
+                self._collect(child, out)
+
+    def close(self):
+        self._inotify.close()
+
+
+class PollingWatcher:
+    """Re-polls the tree, listing only directories whose mtime changed."""
+
+    def __init__(self, project_root: Path, interval: float = 1.0):
+        self.project_root = project_root
+        self.interval = interval
+        self._cache = DirCache()
+        self._dirs = self._poll()
+
+    def _poll(self):
+        ignore = load_ignore_rules(self.project_root)
+        self.ignore = ignore
+        if ignore.fingerprint != self._cache.key:
+            self._cache = DirCache(key=ignore.fingerprint)
+        cache = DirCache(self._cache.new, ignore.fingerprint)
+        dirs = [str(p).replace(os.sep, "/") for p in iter_code_dirs(self.project_root, ignore, cache)]
+        self._cache = cache
+        return dirs
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(timeout)
+        dirs = self._poll()
+        changed = dirs != self._dirs
+        self._dirs = dirs
+        return changed
+
+    def code_dirs(self):
+        return list(self._dirs)
+
+    def close(self):
+        pass
+
+
+class IndexSync:
+    """Writes the index and task files when the module set changes."""
+
+    def __init__(self, project_root: Path):
+        self.project_root = project_root
+        self.index_path = project_root / ".agents" / "index.json"
+        self._last = None
+        if self.index_path.exists():
+            existing = load_json(self.index_path)
+            self._last = sorted(m["path"].replace(os.sep, "/") for m in existing.get("modules", []))
+
+    def update(self, code_dirs, ignore) -> bool:
+        """Rewrites the index if ``code_dirs`` differs from the last write."""
+        key = sorted(code_dirs)
+        if key == self._last:
+            return False
+        self._last = key
+        existing = load_json(self.index_path) if self.index_path.exists() else {}
+        final_mods = merge_modules(assign_modules(Path(p) for p in code_dirs), existing)
+        write_json(self.index_path, build_index(final_mods, existing, ignore))
+        ensure_task_files(self.project_root, final_mods)
+        print(f"[watch] updated {self.index_path} ({len(final_mods)} modules)")
+        return True
+
+
+def _fall_back(project_root: Path, interval: float, error: OSError) -> PollingWatcher:
+    hint = " (raise fs.inotify.max_user_watches)" if error.errno == errno.ENOSPC else ""
+    print(f"[watch][WARN] inotify cannot watch the tree: {error}{hint}; polling every {interval}s instead",
+          file=sys.stderr)
+    return PollingWatcher(project_root, interval=interval)
+
+
+def open_watcher(project_root: Path, interval: float = 1.0, debounce: float = 0.2, polling: bool = False):
+    """Returns an inotify watcher where it can watch the tree, else a polling one."""
+    if not polling and _Inotify.available():
+        try:
+            watcher = InotifyWatcher(project_root, debounce=debounce)
+        except OSError as e:
+            return _fall_back(project_root, interval, e)
+        print("[watch] using inotify")
+        return watcher
+    print(f"[watch] polling every {interval}s")
+    return PollingWatcher(project_root, interval=interval)
+
+
+def watch(project_root: Path, interval: float = 1.0, debounce: float = 0.2, polling: bool = False):
+    """Runs until interrupted, keeping the index in sync with the tree.
+
+    Args:
+        project_root: The root directory of the project.
+        interval: Polling period, and the idle wake-up period for inotify.
+        debounce: Quiet time that closes an inotify event batch.
+        polling: Force the polling backend even where inotify is available.
+    """
+    if not (project_root / ".agents").exists():
+        print("[scan][ERR] .agents directory not found. Run 'agents init' first.", file=sys.stderr)
+        sys.exit(1)
+
+    watcher = open_watcher(project_root, interval, debounce, polling)
+    sync = IndexSync(project_root)
+    sync.update(watcher.code_dirs(), watcher.ignore)
+    try:
+        while True:
+            try:
+                changed = watcher.wait(interval)
+            except OSError as e:
+                if not isinstance(watcher, InotifyWatcher):
+                    raise
+                watcher.close()
+                watcher = _fall_back(project_root, interval, e)
+                changed = True
+            if changed:
+                sync.update(watcher.code_dirs(), watcher.ignore)
+    except KeyboardInterrupt:
+        print("[watch] stopped")
+    finally:
+        watcher.close()
@@ -0,0 +1,70 @@
+"""Change-detecting writes for control-plane files.
+
+Rewriting a file with identical content still bumps its mtime, which wakes
+editor and build watchers and makes ``git add`` re-hash it. ``FileWriter``
+compares the new bytes with what is already on disk and skips the write
+when they are identical, keeping count of what it wrote and skipped.
+"""
+
+import os
+from pathlib import Path
+
+from agents_core import timing
+
+# Default for ``current``: the caller has not read the file.
+_UNREAD = object()
+
+
+def _unchanged(path: Path, data: bytes, current) -> bool:
+    if current is not _UNREAD:
+        return current == data
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    # A size mismatch settles it without reading the file.
+    if st.st_size != len(data):
+        return False
+    try:
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+class FileWriter:
+    """Writes files atomically, skipping those whose bytes would not change."""
+
+    def __init__(self):
+        self.written = []
+        self.skipped = []
+
+    def write(self, path, data: bytes, current=_UNREAD) -> bool:
+        """Writes ``data`` to ``path`` unless it already holds those bytes.
+
+        Args:
+            path: The file to write; its parent directory must exist.
+            data: The complete new content.
+            current: The file's content if the caller already read it, or
+                None if it is known not to exist. By default the file on disk
+                is compared.
+
+        Returns:
+            True if the file was written, False if the write was skipped.
+        """
+        path = Path(path)
+        if _unchanged(path, data, current):
+            self.skipped.append(path)
+            timing.count("files_unchanged")
+            return False
+        tmp = Path(str(path) + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        tmp.replace(path)
+        self.written.append(path)
+        timing.count("files_written")
+        timing.count("bytes_written", len(data))
+        return True
+
+    def summary(self) -> str:
+        return f"{len(self.written)} written, {len(self.skipped)} unchanged"
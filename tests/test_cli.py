@@ -0,0 +1,82 @@
+import unittest
+import json
+import os
+import pstats
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+
+SRC = Path(__file__).parent.parent / "src"
+
+# Runs the CLI with the given argv and reports which heavy modules got loaded.
+PROBE = """
+import logging, sys
+from agents_core import cli
+sys.argv = ["agents"] + sys.argv[1:]
+try:
+    cli.main()
+except SystemExit:
+    pass
+print("LOADED", " ".join(m for m in ("jsonschema", "referencing", "agents_core.update", "agents_core.serve")
+                        if m in sys.modules), "HANDLERS", len(logging.getLogger().handlers), file=sys.stderr)
+"""
+
+class TestCliStartup(unittest.TestCase):
+    """Tests that subcommands only import what they use."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        (self.project_root / ".agents").mkdir()
+        (self.project_root / "src" / "a").mkdir(parents=True)
+        (self.project_root / "src" / "a" / "main.py").touch()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def probe(self, *argv):
+        env = dict(os.environ, PYTHONPATH=str(SRC), AGENTS_NO_DAEMON="1")
+        proc = subprocess.run([sys.executable, "-c", PROBE, *argv], cwd=self.project_root, env=env,
+                              capture_output=True, text=True)
+        line = [l for l in proc.stderr.splitlines() if l.startswith("LOADED")][-1]
+        loaded, handlers = line[len("LOADED"):].split("HANDLERS")
+        return set(loaded.split()), int(handlers)
+
+    def test_help_is_light(self):
+        """Tests that --help loads no subcommand handler or jsonschema."""
+        loaded, handlers = self.probe("--help")
+        self.assertEqual(loaded, set())
+        self.assertEqual(handlers, 0)
+
+    def test_scan_does_not_import_jsonschema(self):
+        """Tests that refreshing the index, as init does, never loads jsonschema."""
+        loaded, _ = self.probe("scan", "--refresh-index")
+        self.assertEqual(loaded, set())
+        self.assertTrue((self.project_root / ".agents" / "index.json").is_file())
+
+    def test_timings_and_profile(self):
+        """Tests the --timings report and --profile dump of a subcommand."""
+        env = dict(os.environ, PYTHONPATH=str(SRC), AGENTS_NO_DAEMON="1")
+        report_path, profile_path = self.project_root / "report.json", self.project_root / "scan.prof"
+        subprocess.run([sys.executable, "-m", "agents_core.cli", "scan", "--refresh-index",
+                        "--timings", str(report_path), "--profile", str(profile_path)],
+                       cwd=self.project_root, env=env, check=True, capture_output=True)
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual((report["command"], report["exit"]), ("scan", 0))
+        self.assertEqual([s["name"] for s in report["stages"]], ["load", "discover", "merge", "write"])
+        self.assertEqual(report["counters"]["dirs_listed"], 2)
+        self.assertEqual(report["counters"]["files_written"], 2)
+        self.assertGreater(report["counters"]["bytes_written"], 0)
+        self.assertIn("scan", {func[2] for func in pstats.Stats(str(profile_path)).stats})
+
+    def test_importing_update_leaves_logging_alone(self):
+        """Tests that update.py no longer configures logging at import time."""
+        env = dict(os.environ, PYTHONPATH=str(SRC))
+        code = "import logging, agents_core.update; print(len(logging.getLogger().handlers))"
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True).stdout
+        self.assertEqual(out.strip(), "0")
+
+if __name__ == "__main__":
+    unittest.main()
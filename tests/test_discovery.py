@@ -0,0 +1,264 @@
+import unittest
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import shutil
+import subprocess
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.discovery import DirCache, iter_code_dirs, iter_git_code_dirs
+from agents_core.ignore import load_ignore_rules
+from agents_core.scan import discover_modules, scan
+
+
+def rglob_code_dirs(project_root: Path):
+    """Reference implementation: the original rglob-based discovery."""
+    found = []
+    for rel in ["src", "app", "apps", "packages", "services", "modules"]:
+        p = project_root / rel
+        if p.exists():
+            for path in p.rglob("*"):
+                if path.is_dir():
+                    has_code = any(fn.suffix in {".py",".ts",".tsx",".js",".jsx",".go",".rs",".swift",".kt",".java"}
+                                   for fn in path.iterdir() if fn.is_file())
+                    if has_code:
+                        found.append(path.relative_to(project_root))
+    return found
+
+
+class TestDiscovery(unittest.TestCase):
+    """Unit tests for the agents_core.discovery walker.
+
+    The walker must report exactly the directories the original
+    rglob-based implementation found.
+    """
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def touch(self, rel):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def test_matches_rglob_reference(self):
+        """Tests that the walker finds the same directories as rglob."""
+        for rel in [
+            "src/a/main.py",
+            "src/a/b/c/deep.go",
+            "src/a/b/README.md",
+            "src/utils/x.ts",
+            "src/a/utils/y.rs",
+            "src/.hidden/z.py",
+            "src/only_hidden/.py",
+            "src/no_code/notes.txt",
+            "apps/web/index.tsx",
+            "apps/web/components/Button.jsx",
+            "packages/lib/Main.java",
+            "services/api/Server.kt",
+            "modules/ios/App.swift",
+        ]:
+            self.touch(rel)
+        (self.project_root / "src" / "empty").mkdir()
+        (self.project_root / "app").write_text("not a directory")
+
+        expected = rglob_code_dirs(self.project_root)
+        actual = list(iter_code_dirs(self.project_root))
+        self.assertEqual(sorted(actual), sorted(expected))
+        self.assertNotIn(Path("src/only_hidden"), actual)
+        self.assertNotIn(Path("src/a/b"), actual)
+
+    def test_symlinked_dirs_are_classified_not_followed(self):
+        """Tests that symlinked directories are reported but not descended."""
+        self.touch("vendor/pkg/lib.py")
+        self.touch("vendor/pkg/inner/mod.py")
+        (self.project_root / "src").mkdir()
+        os.symlink(self.project_root / "vendor" / "pkg", self.project_root / "src" / "link")
+
+        actual = list(iter_code_dirs(self.project_root))
+        self.assertEqual(sorted(actual), sorted(rglob_code_dirs(self.project_root)))
+        self.assertEqual(actual, [Path("src/link")])
+
+    def test_discover_modules_slug_collisions(self):
+        """Tests that colliding directory names get unique, path-derived slugs."""
+        self.touch("src/one/utils/a.py")
+        self.touch("src/two/utils/b.py")
+
+        mods = discover_modules(self.project_root)
+        names = sorted(m["name"] for m in mods)
+        self.assertEqual(names, ["one-utils", "two-utils"])
+
+
+class TestDirCache(unittest.TestCase):
+    """Unit tests for the persisted directory cache used by incremental scans."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        (self.project_root / ".agents").mkdir()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def touch(self, rel):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def age_tree(self):
+        """Backdates every mtime so cache entries are outside the racy window."""
+        past = 1_000_000_000
+        for dirpath, dirnames, filenames in os.walk(self.project_root):
+            for name in filenames + dirnames:
+                os.utime(os.path.join(dirpath, name), (past, past))
+            os.utime(dirpath, (past, past))
+
+    def walk(self):
+        ignore = load_ignore_rules(self.project_root)
+        cache = DirCache.load(self.project_root, ignore)
+        paths = sorted(str(p) for p in iter_code_dirs(self.project_root, ignore, cache))
+        cache.save(self.project_root)
+        return paths, cache
+
+    def test_unchanged_tree_is_not_listed(self):
+        """Tests that a second walk over an unchanged tree only hits the cache."""
+        self.touch("src/a/main.py")
+        self.touch("src/a/b/util.py")
+        self.touch("src/c/notes.md")
+        self.age_tree()
+
+        first, cache = self.walk()
+        self.assertEqual(cache.hits, 0)
+
+        with patch("agents_core.discovery.os.scandir") as mock_scandir:
+            second, cache = self.walk()
+        mock_scandir.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(cache.hits, 4)
+
+    def test_changed_directories_are_relisted(self):
+        """Tests that added and removed entries are picked up."""
+        self.touch("src/a/main.py")
+        self.touch("src/c/notes.md")
+        self.age_tree()
+        first, _ = self.walk()
+        self.assertEqual(first, ["src/a"])
+
+        self.touch("src/c/new.go")
+        (self.project_root / "src" / "a" / "main.py").unlink()
+        second, cache = self.walk()
+        self.assertEqual(second, ["src/c"])
+        self.assertEqual(cache.misses, 2)
+
+    def test_nested_gitignore_change_invalidates_subtree(self):
+        """Tests that editing a nested .gitignore re-filters its subtree."""
+        self.touch("src/pkg/gen/out.py")
+        self.touch("src/pkg/core/core.py")
+        (self.project_root / "src" / "pkg" / ".gitignore").write_text("# nothing\n")
+        self.age_tree()
+        first, _ = self.walk()
+        self.assertEqual(first, ["src/pkg/core", "src/pkg/gen"])
+
+        (self.project_root / "src" / "pkg" / ".gitignore").write_text("gen/\n")
+        second, _ = self.walk()
+        self.assertEqual(second, ["src/pkg/core"])
+
+    def test_root_rules_and_version_invalidate_cache(self):
+        """Tests that root ignore rules and the package version key the cache."""
+        self.touch("src/a/main.py")
+        self.age_tree()
+        self.walk()
+
+        (self.project_root / ".gitignore").write_text("a/\n")
+        paths, cache = self.walk()
+        self.assertEqual(paths, [])
+        self.assertEqual(cache.hits, 0)
+
+        with patch("agents_core.cache.__version__", "0.0.0-other"):
+            _, cache = self.walk()
+        self.assertEqual(cache.hits, 0)
+
+    def test_scan_no_cache(self):
+        """Tests that scan writes the cache by default and skips it on request."""
+        self.touch("src/a/main.py")
+        cache_file = self.project_root / ".agents" / "cache" / DirCache.NAME
+
+        scan(self.project_root, refresh_index=True, use_cache=False)
+        self.assertFalse(cache_file.exists())
+
+        scan(self.project_root, refresh_index=True)
+        self.assertTrue(cache_file.is_file())
+        self.assertEqual((cache_file.parent / ".gitignore").read_text(), "*\n")
+
+@unittest.skipIf(shutil.which("git") is None, "git not available")
+class TestGitSource(unittest.TestCase):
+    """Unit tests for git-index-backed discovery."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        subprocess.run(["git", "init", "-q"], cwd=self.project_root, check=True)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def touch(self, rel):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def git_add(self):
+        subprocess.run(["git", "add", "-A"], cwd=self.project_root, check=True)
+
+    def test_matches_filesystem_walker(self):
+        """Tests that a clean checkout yields the same modules from both sources."""
+        for rel in [
+            "src/b/x.py",
+            "src/a/main.py",
+            "src/a/utils/u.py",
+            "src/b/utils/v.ts",
+            "src/gen/out.py",
+            "src/docs/readme.md",
+            "apps/web/src/index.tsx",
+            "packages/lib/lib.rs",
+        ]:
+            self.touch(rel)
+        (self.project_root / "src" / ".gitignore").write_text("gen/\n")
+        self.git_add()
+
+        fs_mods = discover_modules(self.project_root)
+        git_mods = discover_modules(self.project_root, source="git")
+        self.assertEqual(git_mods, fs_mods)
+        self.assertNotIn("src/gen", [m["path"] for m in git_mods])
+
+    def test_untracked_files(self):
+        """Tests that untracked output is skipped unless explicitly requested."""
+        self.touch("src/a/main.py")
+        self.git_add()
+        self.touch("src/build_out/gen.py")
+        self.touch("src/scratch/tmp.py")
+        (self.project_root / ".gitignore").write_text("scratch/\n")
+
+        tracked = [str(p) for p in iter_git_code_dirs(self.project_root)]
+        self.assertEqual(tracked, ["src/a"])
+        untracked = [str(p) for p in iter_git_code_dirs(self.project_root, include_untracked=True)]
+        self.assertEqual(untracked, ["src/a", "src/build_out"])
+
+    def test_not_a_checkout(self):
+        """Tests that scan exits when the root is not a git checkout."""
+        shutil.rmtree(self.project_root / ".git")
+        self.touch("src/a/main.py")
+        with self.assertRaises(SystemExit):
+            discover_modules(self.project_root, source="git")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+import asyncio
+import os
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+import logging
+from unittest.mock import MagicMock, patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.gitops import GitRepo, Status, backoff_delay, in_scope, push_with_retry
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1", "GIT_CONFIG_GLOBAL": os.devnull,
+}
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+class GitTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.env = patch.dict(os.environ, GIT_ENV)
+        self.env.start()
+        self.test_dir = TemporaryDirectory()
+        self.tmp = Path(self.test_dir.name)
+        self.remote = self.tmp / "remote.git"
+        git(self.tmp, "init", "-q", "--bare", "-b", "main", str(self.remote))
+        self.work = self.clone("work")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+        self.env.stop()
+
+    def clone(self, name):
+        path = self.tmp / name
+        git(self.tmp, "clone", "-q", str(self.remote), name)
+        git(path, "checkout", "-q", "-B", "main")
+        return path
+
+    def commit_file(self, repo, rel, text):
+        (repo / rel).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel).write_text(text)
+        git(repo, "add", rel)
+        git(repo, "commit", "-q", "-m", f"edit {rel}")
+
+
+class TestStatus(GitTestCase):
+    """Unit tests for porcelain v2 status parsing."""
+
+    def test_parses_branch_and_entries(self):
+        """Tests branch tracking, modified, renamed and untracked entries."""
+        self.commit_file(self.work, "a.txt", "a")
+        self.commit_file(self.work, "old name.txt", "b")
+        git(self.work, "push", "-q", "-u", "origin", "main")
+        self.commit_file(self.work, "c.txt", "c")
+        (self.work / "a.txt").write_text("changed")
+        git(self.work, "mv", "old name.txt", "new name.txt")
+        (self.work / "new dir").mkdir()
+        (self.work / "new dir" / "x").write_text("x")
+
+        status = GitRepo(self.work).status()
+
+        self.assertEqual(status.branch, "main")
+        self.assertEqual(status.upstream, "origin/main")
+        self.assertEqual((status.ahead, status.behind), (1, 0))
+        entries = {e.path: e for e in status.entries}
+        self.assertEqual(entries["a.txt"].xy, ".M")
+        self.assertFalse(entries["a.txt"].staged)
+        self.assertEqual(entries["new name.txt"].orig_path, "old name.txt")
+        self.assertTrue(entries["new name.txt"].staged)
+        self.assertEqual(entries["new dir/"].xy, "??")
+
+    def test_parse_without_upstream(self):
+        """Tests a fresh branch without an upstream or commits."""
+        status = Status.parse(b"# branch.oid (initial)\0# branch.head main\0? x\0")
+        self.assertIsNone(status.upstream)
+        self.assertEqual([e.path for e in status.entries], ["x"])
+
+
+class TestGitRepo(GitTestCase):
+    """Unit tests for scoped staging and call accounting."""
+
+    def test_stage_is_scoped_from_a_subdirectory(self):
+        """Tests that only the given top-relative paths are staged."""
+        project = self.work / "proj"
+        (project / ".agents").mkdir(parents=True)
+        (project / ".agents" / "index.json").write_text("{}")
+        (project / "keep*.txt").write_text("literal name")
+        (project / "keep-out.txt").write_text("not staged")
+
+        repo = GitRepo(project)
+        self.assertEqual(repo.prefix, "proj/")
+        repo.stage([repo.top_path(".agents"), repo.top_path("keep*.txt")])
+
+        staged = git(self.work, "diff", "--cached", "--name-only").split("\n")
+        self.assertEqual([p for p in staged if p], ["proj/.agents/index.json", "proj/keep*.txt"])
+        self.assertEqual(repo.calls, 1)
+        self.assertGreater(repo.elapsed, 0)
+
+    def test_has_staged_changes(self):
+        """Tests that staging a file back to its committed content counts as no change."""
+        repo = GitRepo(self.work)
+        (self.work / "a.txt").write_text("one")
+        repo.stage(["a.txt"])
+        self.assertTrue(repo.has_staged_changes())
+        repo.commit("add a")
+        (self.work / "a.txt").write_text("two")
+        repo.stage(["a.txt"])
+        self.assertTrue(repo.has_staged_changes())
+        (self.work / "a.txt").write_text("one")
+        repo.stage(["a.txt"])
+        self.assertFalse(repo.has_staged_changes())
+
+    def test_push_with_retry_rebases_when_behind(self):
+        """Tests that a rejected push is rebased and retried without sleeping."""
+        self.commit_file(self.work, "a.txt", "a")
+        git(self.work, "push", "-q", "-u", "origin", "main")
+        other = self.clone("other")
+        self.commit_file(other, "b.txt", "b")
+        git(other, "push", "-q")
+        self.commit_file(self.work, "c.txt", "c")
+
+        sleeps = []
+        ok = push_with_retry(GitRepo(self.work), logging.getLogger("test"), sleep=sleeps.append)
+
+        self.assertTrue(ok)
+        self.assertEqual(sleeps, [])
+        self.assertEqual(git(self.remote, "log", "--format=%s", "main").split("\n")[:2], ["edit c.txt", "edit b.txt"])
+
+    def test_fetch_then_rebase_onto_upstream(self):
+        """Tests that a fetched upstream is measured and rebased onto locally."""
+        self.assertIsNone(GitRepo(self.work).ahead_behind())
+        self.commit_file(self.work, "a.txt", "a")
+        git(self.work, "push", "-q", "-u", "origin", "main")
+        other = self.clone("other")
+        self.commit_file(other, "b.txt", "b")
+        git(other, "push", "-q")
+        self.commit_file(self.work, "c.txt", "c")
+
+        repo = GitRepo(self.work)
+        self.assertEqual(repo.ahead_behind(), (1, 0))
+        self.assertEqual(asyncio.run(repo.fetch()).returncode, 0)
+        self.assertEqual(repo.ahead_behind(), (1, 1))
+        repo.rebase_onto_upstream()
+        self.assertEqual(repo.ahead_behind(), (1, 0))
+        self.assertEqual(repo.push().returncode, 0)
+        self.assertEqual(repo.calls, 6)
+
+    def test_push_with_retry_backs_off(self):
+        """Tests exponential backoff when pushing keeps failing."""
+        git(self.work, "remote", "set-url", "origin", str(self.tmp / "missing.git"))
+        self.commit_file(self.work, "a.txt", "a")
+        sleeps = []
+        ok = push_with_retry(GitRepo(self.work), logging.getLogger("test"), retries=3,
+                             sleep=sleeps.append, rand=lambda: 1.0)
+        self.assertFalse(ok)
+        self.assertEqual(sleeps, [1.0, 2.0])
+
+
+class TestPushAccounting(unittest.TestCase):
+    """Unit tests for how push_with_retry counts attempts."""
+
+    def test_rebases_do_not_use_up_retries(self):
+        """Tests that rejections because the remote moved only count as rebases."""
+        repo = MagicMock()
+        behind = MagicMock(returncode=1, stderr=b" ! [rejected] main -> main (fetch first)")
+        repo.push.side_effect = [behind, behind, behind, MagicMock(returncode=0)]
+        repo.pull_rebase.return_value = MagicMock(returncode=0)
+        sleeps = []
+        self.assertTrue(push_with_retry(repo, logging.getLogger("test"), retries=1, sleep=sleeps.append))
+        self.assertEqual(repo.pull_rebase.call_count, 3)
+        self.assertEqual(sleeps, [])
+
+        repo.push.side_effect = [behind] * 3
+        repo.pull_rebase.reset_mock()
+        self.assertFalse(push_with_retry(repo, logging.getLogger("test"), retries=1, max_rebases=2))
+        self.assertEqual(repo.pull_rebase.call_count, 2)
+
+
+class TestHelpers(unittest.TestCase):
+    """Unit tests for path scoping and backoff."""
+
+    def test_in_scope(self):
+        """Tests directory-prefix matching."""
+        self.assertTrue(in_scope(".agents/index.json", [".agents"]))
+        self.assertTrue(in_scope("src/a.py", [".agents", "src/"]))
+        self.assertFalse(in_scope(".agentsfoo", [".agents"]))
+
+    def test_backoff_delay(self):
+        """Tests the delay doubles, is capped and keeps half of it fixed."""
+        self.assertEqual(backoff_delay(1, rand=lambda: 0.0), 0.5)
+        self.assertEqual(backoff_delay(3, rand=lambda: 1.0), 4.0)
+        self.assertEqual(backoff_delay(10, cap=30.0, rand=lambda: 0.0), 15.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.ignore import load_ignore_rules, parse_rules
+from agents_core.scan import scan, discover_modules
+
+def matches(pattern, path, is_dir=False):
+    """Returns the decision of a single gitignore pattern for path."""
+    for regex, negate, dir_only in reversed(parse_rules(pattern)):
+        if dir_only and not is_dir:
+            continue
+        if regex.match(path):
+            return not negate
+    return None
+
+class TestIgnoreRules(unittest.TestCase):
+    """Unit tests for the agents_core.ignore module.
+
+    These tests cover gitignore pattern semantics and verify that
+    discovery prunes ignored subtrees and records the rules it used.
+    """
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        self.agents_dir = self.project_root / ".agents"
+        self.agents_dir.mkdir()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def touch(self, rel):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def test_pattern_semantics(self):
+        """Tests anchoring, wildcards, directory-only and negation."""
+        self.assertTrue(matches("build", "src/a/build", True))
+        self.assertTrue(matches("/build", "build", True))
+        self.assertIsNone(matches("/build", "src/build", True))
+        self.assertTrue(matches("gen/", "src/gen", True))
+        self.assertIsNone(matches("gen/", "src/gen", False))
+        self.assertTrue(matches("*.py", "src/x.py"))
+        self.assertIsNone(matches("src/*.py", "src/a/x.py"))
+        self.assertTrue(matches("src/**/x.py", "src/a/b/x.py"))
+        self.assertTrue(matches("src/**/x.py", "src/x.py"))
+        self.assertTrue(matches("**/fixtures", "a/b/fixtures", True))
+        self.assertTrue(matches("vendor/**", "vendor/a/b", True))
+        self.assertTrue(matches("mod[0-9]", "src/mod7", True))
+        self.assertFalse(matches("*.py\n!keep.py", "keep.py"))
+        self.assertIsNone(matches("# comment", "# comment"))
+
+    def test_builtin_excludes_are_pruned(self):
+        """Tests that built-in deny list entries are never descended into."""
+        self.touch("src/app/main.py")
+        self.touch("src/app/node_modules/left-pad/index.js")
+        self.touch("src/.venv/lib/site.py")
+        self.touch("src/app/__pycache__/main.py")
+        self.touch("packages/lib/target/debug/build.rs")
+
+        paths = [m["path"] for m in discover_modules(self.project_root)]
+        self.assertEqual(paths, ["src/app"])
+
+    def test_gitignore_and_agents_ignore(self):
+        """Tests nested .gitignore files and the .agents/ignore override."""
+        self.touch("src/keep/main.py")
+        self.touch("src/generated/out.py")
+        self.touch("src/pkg/proto/gen.go")
+        self.touch("src/pkg/core/core.go")
+        self.touch("src/scratch/tmp.py")
+        self.touch("src/dist/real.py")
+        (self.project_root / ".gitignore").write_text("generated/\n/src/scratch\n")
+        (self.project_root / "src" / "pkg" / ".gitignore").write_text("proto\n")
+        (self.agents_dir / "ignore").write_text("!dist/\n")
+
+        ignore = load_ignore_rules(self.project_root)
+        paths = sorted(m["path"] for m in discover_modules(self.project_root, ignore))
+        self.assertEqual(paths, ["src/dist", "src/keep", "src/pkg/core"])
+        self.assertEqual(ignore.summary()["files"], [".agents/ignore", ".gitignore", "src/pkg/.gitignore"])
+
+    def test_child_matchers_leave_parent_untouched(self):
+        """Tests that deriving a child matcher does not change the parent's rules."""
+        (self.project_root / ".gitignore").write_text("*.log\n")
+        (self.project_root / "a").mkdir()
+        (self.project_root / "a" / ".gitignore").write_text("gen/\n")
+
+        root = load_ignore_rules(self.project_root)
+        sources = root._sources
+        child = root.with_gitignore("a", self.project_root / "a" / ".gitignore")
+        self.assertEqual(root._sources, sources)
+        self.assertEqual(child._sources, sources + ("a/.gitignore",))
+        self.assertFalse(root.is_ignored("a/gen", True))
+        self.assertTrue(child.is_ignored("a/gen", True))
+        self.assertEqual(root.summary()["files"], [".gitignore", "a/.gitignore"])
+
+    def test_ignored_code_files_do_not_count(self):
+        """Tests that a directory whose only code files are ignored is skipped."""
+        self.touch("src/a/gen_pb.py")
+        self.touch("src/b/real.py")
+        (self.project_root / ".gitignore").write_text("*_pb.py\n")
+
+        paths = [m["path"] for m in discover_modules(self.project_root)]
+        self.assertEqual(paths, ["src/b"])
+
+    def test_scan_records_ignore_rules(self):
+        """Tests that scan writes the ignore rules into index.json."""
+        self.touch("src/app/main.py")
+        (self.project_root / ".gitignore").write_text("*.log\n")
+
+        scan(self.project_root, refresh_index=True)
+
+        with open(self.agents_dir / "index.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertIn("node_modules/", data["ignore"]["builtin"])
+        self.assertEqual(data["ignore"]["files"], [".gitignore"])
+
+        scan(self.project_root, validate_only=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import json
+import os
 from pathlib import Path
 from tempfile import TemporaryDirectory
 import sys
@@ -85,5 +86,15 @@ class TestInstallLogic(unittest.TestCase):
         # Verify it was restored
         self.assertTrue(schema_to_delete.is_file())
 
+    def test_install_rerun_skips_identical_files(self):
+        """Tests that a second install does not rewrite unchanged schemas."""
+        install(self.project_root)
+        schema = self.project_root / ".agents" / "schemas" / "tasks.schema.json"
+        os.utime(schema, ns=(1, 1))
+
+        install(self.project_root)
+
+        self.assertEqual(schema.stat().st_mtime_ns, 1)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+import io
+import json
+import unittest
+from pathlib import Path
+import sys
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.jsonstream import iter_members
+
+# Windows small enough that every value and token straddles a chunk boundary.
+CHUNK_SIZES = [1, 2, 3, 7, 64, 1 << 16]
+
+
+def reassemble(text, chunk_size):
+    doc = {}
+    for path, value in iter_members(io.StringIO(text), "tasks", chunk_size):
+        if not path:
+            return value
+        if len(path) == 1:
+            doc[path[0]] = value
+        else:
+            doc[path[0]].append(value)
+    return doc
+
+
+class TestJsonStream(unittest.TestCase):
+    """Unit tests for agents_core.jsonstream.
+
+    The streamed members must reassemble to what ``json.loads`` returns,
+    and malformed documents must fail with ``json``'s own messages.
+    """
+
+    def test_values_match_json(self):
+        """Tests that streamed documents reassemble to the json.loads result."""
+        docs = [
+            "{}", " { } ", "[]", "12345", '"tasks"', "null",
+            '{"tasks": []}',
+            '{"tasks": 5, "module": "m"}',
+            '{"module": "m", "tasks": [1, 22, 1e5, -0.5, true, null, "\\u00e9\\n", {"x": [1, {"y": []}]}], "b": "tasks"}',
+            json.dumps({"module": "m", "tasks": [{"id": f"m:{i}", "notes": ["é" * i]} for i in range(50)]}, indent=2),
+        ]
+        for text in docs:
+            for chunk_size in CHUNK_SIZES:
+                self.assertEqual(reassemble(text, chunk_size), json.loads(text), (text, chunk_size))
+
+    def test_items_are_yielded_one_by_one(self):
+        """Tests the paths yielded for the streamed array."""
+        paths = [path for path, _ in iter_members(io.StringIO('{"a": 1, "tasks": [{}, {}], "b": 2}'), "tasks")]
+        self.assertEqual(paths, [("a",), ("tasks",), ("tasks", 0), ("tasks", 1), ("b",)])
+
+    def test_errors_match_json(self):
+        """Tests that syntax errors carry json's message and position."""
+        docs = ["", "{", '{"a" 1}', '{"a": 1,}', '{"tasks": [1,]}', '{"tasks": [1 2]}', '{"a": 1} x',
+                '{"a":\n  [1,\n  tru]}', '{"tasks": [1,\n "unterminated]}', '{"a": 1}\n\n}', "{1: 2}"]
+        for text in docs:
+            with self.assertRaises(ValueError) as expected:
+                json.loads(text)
+            for chunk_size in CHUNK_SIZES:
+                with self.assertRaises(ValueError, msg=(text, chunk_size)) as got:
+                    reassemble(text, chunk_size)
+                self.assertEqual(str(got.exception), str(expected.exception), (text, chunk_size))
+
+
+    def test_errors_do_not_read_ahead(self):
+        """Tests that a syntax error mid-file is raised without reading the rest."""
+        text = '{"tasks": [1, 2, x, ' + ", ".join(["3"] * 100000) + "]}"
+        f = io.StringIO(text)
+        with self.assertRaises(ValueError) as expected:
+            json.loads(text)
+        with self.assertRaises(ValueError) as got:
+            list(iter_members(f, "tasks", 64))
+        self.assertEqual(str(got.exception), str(expected.exception))
+        self.assertLess(f.tell(), 1024)
+
+if __name__ == "__main__":
+    unittest.main()
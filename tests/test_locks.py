@@ -0,0 +1,75 @@
+import unittest
+import errno
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.locks import RevisionConflict, lock_path, transaction
+
+class TestTransaction(unittest.TestCase):
+    """Unit tests for the agents_core.locks module."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        self.rel = ".agents/priorities.json"
+        self.path = self.project_root / self.rel
+        self.path.parent.mkdir(parents=True)
+        self.path.write_text(json.dumps({"queue": []}), encoding="utf-8")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def read(self):
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+    def test_change_bumps_revision(self):
+        """Tests that a changed document is written with the next revision."""
+        with transaction(self.project_root, self.rel) as txn:
+            self.assertEqual(txn.revision, 0)
+            txn.data["queue"].append({"task_id": "a:1"})
+        self.assertTrue(txn.written)
+        self.assertEqual(self.read(), {"queue": [{"task_id": "a:1"}], "revision": 1})
+        self.assertTrue(lock_path(self.project_root, self.rel).exists())
+
+    def test_unchanged_or_failed_blocks_do_not_write(self):
+        """Tests that no-op blocks and exceptions leave the file alone."""
+        before = self.path.read_bytes()
+        with transaction(self.project_root, self.rel) as txn:
+            pass
+        self.assertFalse(txn.written)
+        with self.assertRaises(KeyError):
+            with transaction(self.project_root, self.rel) as txn:
+                txn.data["queue"].append({"task_id": "a:1"})
+                raise KeyError("boom")
+        self.assertEqual(self.path.read_bytes(), before)
+
+    def test_expected_revision(self):
+        """Tests the compare-and-swap check against the file's revision."""
+        with transaction(self.project_root, self.rel, expected_revision=0) as txn:
+            txn.data["queue"].append({"task_id": "a:1"})
+        with self.assertRaises(RevisionConflict) as cm:
+            with transaction(self.project_root, self.rel, expected_revision=0):
+                self.fail("block must not run on a stale revision")
+        self.assertEqual((cm.exception.expected, cm.exception.actual), (0, 1))
+        # The lock was released: a transaction at the current revision succeeds.
+        with transaction(self.project_root, self.rel, expected_revision=1) as txn:
+            txn.data["queue"] = []
+        self.assertEqual(self.read()["revision"], 2)
+
+    def test_platform_without_fcntl(self):
+        """Tests that locking fails with a clear error where fcntl is missing."""
+        with patch.dict(sys.modules, {"fcntl": None}):
+            with self.assertRaises(OSError) as cm:
+                with transaction(self.project_root, self.rel):
+                    self.fail("block must not run without a lock")
+        self.assertEqual(cm.exception.errno, errno.ENOTSUP)
+        self.assertIn("unsupported on this platform", str(cm.exception))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+import json
+import os
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+SRC = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from agents_core.merge import ATTRIBUTES, MergeConflict, merge_documents, merge_driver, register_merge_driver
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1", "GIT_CONFIG_GLOBAL": os.devnull,
+    # The registered driver runs 'python -m agents_core.cli' from this tree.
+    "PYTHONPATH": str(SRC),
+}
+
+def task(task_id, status="todo", **extra):
+    return dict({"id": task_id, "title": task_id, "status": status, "acceptance": [], "impl": {"steps": []},
+                 "refs": []}, **extra)
+
+def tasks_doc(*tasks, updated_at="2024-01-01T00:00:00Z"):
+    return {"module": "api", "updated_at": updated_at, "tasks": list(tasks)}
+
+def git(cwd, *args, check=True):
+    return subprocess.run(["git", *args], cwd=cwd, check=check, capture_output=True, text=True)
+
+class TestMergeDocuments(unittest.TestCase):
+    """Unit tests for the structural three-way merge."""
+
+    def test_concurrent_task_additions_and_edits(self):
+        """Tests that tasks merge by id and the later updated_at and revision win."""
+        base = tasks_doc(task("api:1"), task("api:2"))
+        ours = tasks_doc(task("api:1", "done"), task("api:2"), task("api:3"), updated_at="2024-01-02T00:00:00Z")
+        theirs = tasks_doc(task("api:1"), task("api:2", "doing"), task("api:4"), updated_at="2024-01-03T00:00:00Z")
+        ours["revision"], theirs["revision"] = 3, 5
+        merged = merge_documents(base, ours, theirs)
+        self.assertEqual([(t["id"], t["status"]) for t in merged["tasks"]],
+                         [("api:1", "done"), ("api:2", "doing"), ("api:3", "todo"), ("api:4", "todo")])
+        self.assertEqual(merged["updated_at"], "2024-01-03T00:00:00Z")
+        self.assertEqual(merged["revision"], 5)
+
+    def test_placeholder_stamps_give_way_to_timestamps(self):
+        """Tests that stamps compare as times and a placeholder never beats a real one."""
+        base = tasks_doc()
+        stamp = "2024-01-02T00:00:00Z"
+        for ours, theirs in (("scan", stamp), (stamp, "scan")):
+            merged = merge_documents(base, tasks_doc(updated_at=ours), tasks_doc(updated_at=theirs))
+            self.assertEqual(merged["updated_at"], stamp)
+        # An earlier wall-clock string can be the later instant.
+        merged = merge_documents(base, tasks_doc(updated_at="2024-01-02T01:00:00+02:00"),
+                                 tasks_doc(updated_at="2024-01-01T23:30:00Z"))
+        self.assertEqual(merged["updated_at"], "2024-01-01T23:30:00Z")
+        with self.assertRaises(MergeConflict):
+            merge_documents(base, tasks_doc(updated_at="scan"), tasks_doc(updated_at="bootstrap"))
+
+    def test_deletion_and_string_sets(self):
+        """Tests unchanged deletions apply and string arrays merge as sets."""
+        base = tasks_doc(task("api:1", acceptance=["a"]), task("api:2"))
+        ours = tasks_doc(task("api:1", acceptance=["a", "b"]))
+        theirs = tasks_doc(task("api:1", acceptance=["c"]), task("api:2"))
+        merged = merge_documents(base, ours, theirs)
+        self.assertEqual(merged["tasks"], [task("api:1", acceptance=["b", "c"])])
+
+    def test_index_and_queue_records(self):
+        """Tests modules merge by name and the priority queue by task_id."""
+        mod = lambda name: {"name": name, "path": f"src/{name}", "tasks_file": f".agents/modules/{name}/tasks.json"}
+        base = {"modules": [mod("a")], "queue": [{"task_id": "a:1", "priority": 1}]}
+        ours = {"modules": [mod("a"), mod("b")], "queue": [{"task_id": "a:1", "priority": 2}]}
+        theirs = {"modules": [mod("a"), mod("c")], "queue": [{"task_id": "a:1", "priority": 1},
+                                                             {"task_id": "c:1", "priority": 3}]}
+        merged = merge_documents(base, ours, theirs)
+        self.assertEqual([m["name"] for m in merged["modules"]], ["a", "b", "c"])
+        self.assertEqual(merged["queue"], [{"task_id": "a:1", "priority": 2}, {"task_id": "c:1", "priority": 3}])
+
+    def test_conflicts(self):
+        """Tests that the same field changed two ways, or edit vs delete, conflicts."""
+        base = tasks_doc(task("api:1"))
+        with self.assertRaises(MergeConflict) as cm:
+            merge_documents(base, tasks_doc(task("api:1", "done")), tasks_doc(task("api:1", "blocked")))
+        self.assertEqual(cm.exception.path, ("tasks", 0, "status"))
+        with self.assertRaises(MergeConflict):
+            merge_documents(base, tasks_doc(), tasks_doc(task("api:1", "done")))
+
+
+class TestMergeDriver(unittest.TestCase):
+    """Tests the git-facing driver and its registration."""
+
+    def setUp(self):
+        self.env = patch.dict(os.environ, GIT_ENV)
+        self.env.start()
+        self.test_dir = TemporaryDirectory()
+        self.tmp = Path(self.test_dir.name)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+        self.env.stop()
+
+    def write(self, name, obj):
+        path = self.tmp / name
+        path.write_text(json.dumps(obj, indent=2) + "\n")
+        return path
+
+    def test_driver_falls_back_to_text_merge(self):
+        """Tests that a structural conflict leaves conflict markers and fails."""
+        base = self.write("base", tasks_doc(task("api:1")))
+        ours = self.write("ours", tasks_doc(task("api:1", "done")))
+        theirs = self.write("theirs", tasks_doc(task("api:1", "blocked")))
+        self.assertNotEqual(merge_driver(base, ours, theirs), 0)
+        self.assertIn("<<<<<<< ours", ours.read_text())
+
+    def test_concurrent_updates_rebase_cleanly(self):
+        """Tests that two clones adding different tasks rebase without conflicts."""
+        remote = self.tmp / "remote.git"
+        git(self.tmp, "init", "-q", "--bare", "-b", "main", str(remote))
+        clones = []
+        for name in ("one", "two"):
+            git(self.tmp, "clone", "-q", str(remote), name)
+            clones.append(self.tmp / name)
+            git(clones[-1], "checkout", "-q", "-B", "main")
+        one, two = clones
+
+        tasks_rel = ".agents/modules/api/tasks.json"
+        (one / tasks_rel).parent.mkdir(parents=True)
+        (one / tasks_rel).write_text(json.dumps(tasks_doc(task("api:1")), indent=2) + "\n")
+        self.assertTrue(register_merge_driver(one))
+        git(one, "add", "-A")
+        git(one, "commit", "-q", "-m", "bootstrap")
+        git(one, "push", "-q", "-u", "origin", "main")
+        git(two, "pull", "-q", "origin", "main")
+        git(two, "branch", "-q", "--set-upstream-to=origin/main")
+        self.assertTrue(register_merge_driver(two))
+
+        for clone, new_id in ((one, "api:2"), (two, "api:3")):
+            doc = json.loads((clone / tasks_rel).read_text())
+            doc["tasks"].append(task(new_id))
+            (clone / tasks_rel).write_text(json.dumps(doc, indent=2) + "\n")
+            git(clone, "commit", "-q", "-am", f"add {new_id}")
+        git(one, "push", "-q")
+
+        result = git(two, "pull", "-q", "--rebase", check=False)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        merged = json.loads((two / tasks_rel).read_text())
+        self.assertEqual([t["id"] for t in merged["tasks"]], ["api:1", "api:2", "api:3"])
+
+    def test_register_is_idempotent(self):
+        """Tests that registration adds the attribute lines once."""
+        git(self.tmp, "init", "-q")
+        (self.tmp / ".gitattributes").write_text("*.png binary")
+        register_merge_driver(self.tmp)
+        register_merge_driver(self.tmp)
+        lines = (self.tmp / ".gitattributes").read_text().splitlines()
+        self.assertEqual(lines[0], "*.png binary")
+        self.assertEqual([l for l in lines if "merge=" in l], ATTRIBUTES)
+        self.assertIn("merge-driver", git(self.tmp, "config", "merge.agents-json.driver").stdout)
+        with TemporaryDirectory() as not_a_repo:
+            self.assertFalse(register_merge_driver(Path(not_a_repo)))
+
+if __name__ == "__main__":
+    unittest.main()
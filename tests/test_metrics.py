@@ -0,0 +1,140 @@
+import unittest
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core import metrics
+from agents_core.discovery import DirCache
+from agents_core.ignore import load_ignore_rules
+from agents_core.metrics import MetricsCollector, count_lines
+from agents_core.scan import discover_modules, merge_modules, scan
+from agents_core.validate import validate_project
+
+
+class TestMetrics(unittest.TestCase):
+    """Unit tests for the per-module metrics gathered by the discovery walk.
+
+    Metrics must come from the walk's own listings, and a cached re-scan
+    must only read files whose mtime or size changed.
+    """
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        (self.project_root / ".agents").mkdir()
+        self.write("src/app/main.py", "a\nb\nc\n")
+        self.write("src/app/util.py", "x = 1")
+        self.write("src/app/view.ts", "1\n2\n")
+        self.write("src/app/README.md", "not code\n")
+        self.write("src/lib/lib.go", "package lib\n")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write(self, rel, text):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    def age_tree(self):
+        """Backdates every mtime so cache entries are outside the racy window."""
+        past = 1_000_000_000
+        for dirpath, dirnames, filenames in os.walk(self.project_root):
+            for name in filenames + dirnames:
+                os.utime(os.path.join(dirpath, name), (past, past))
+            os.utime(dirpath, (past, past))
+
+    def measure(self, lines=True, sample_bytes=metrics.SAMPLE_BYTES, use_cache=True, source="fs"):
+        ignore = load_ignore_rules(self.project_root)
+        cache = DirCache.load(self.project_root, ignore) if use_cache else None
+        mods = discover_modules(self.project_root, ignore, cache, source,
+                                metrics=MetricsCollector(lines, sample_bytes))
+        if cache is not None:
+            cache.save(self.project_root)
+        return {m["path"]: m["metrics"] for m in mods}
+
+    def test_counts_per_language(self):
+        """Tests files, bytes and lines per language of each module."""
+        self.assertEqual(self.measure(use_cache=False)["src/app"], {
+            "files": 3, "bytes": 15, "lines": 6,
+            "languages": {"python": {"files": 2, "bytes": 11, "lines": 4},
+                          "typescript": {"files": 1, "bytes": 4, "lines": 2}},
+        })
+        self.assertEqual(self.measure(lines=False, use_cache=False)["src/lib"],
+                         {"files": 1, "bytes": 12, "languages": {"go": {"files": 1, "bytes": 12}}})
+
+    def test_ignored_files_are_not_counted(self):
+        """Tests that files excluded by .gitignore do not count."""
+        self.write(".gitignore", "util.py\n")
+        self.assertEqual(self.measure(use_cache=False)["src/app"]["languages"]["python"],
+                         {"files": 1, "bytes": 6, "lines": 3})
+
+    def test_rescan_reads_only_changed_files(self):
+        """Tests that a cached re-scan lists nothing and recounts only edited files."""
+        self.age_tree()
+        first = self.measure()
+        with patch("agents_core.discovery.os.scandir") as mock_scandir, \
+                patch("agents_core.metrics.count_lines", wraps=count_lines) as mock_count:
+            self.assertEqual(self.measure(), first)
+        mock_scandir.assert_not_called()
+        mock_count.assert_not_called()
+
+        # An in-place edit leaves the directory mtime alone but not the file's.
+        self.write("src/app/util.py", "x = 1\ny = 2\n")
+        with patch("agents_core.discovery.os.scandir") as mock_scandir, \
+                patch("agents_core.metrics.count_lines", wraps=count_lines) as mock_count:
+            second = self.measure()
+        mock_scandir.assert_not_called()
+        self.assertEqual([c.args[0] for c in mock_count.call_args_list],
+                         [os.path.join(str(self.project_root), "src/app", "util.py")])
+        self.assertEqual(second["src/app"]["languages"]["python"], {"files": 2, "bytes": 18, "lines": 5})
+
+    def test_cache_without_records_is_relisted(self):
+        """Tests that a cache written without metrics is refreshed once metrics are asked for."""
+        self.age_tree()
+        ignore = load_ignore_rules(self.project_root)
+        cache = DirCache.load(self.project_root, ignore)
+        discover_modules(self.project_root, ignore, cache)
+        cache.save(self.project_root)
+        self.assertEqual(self.measure(), self.measure(use_cache=False))
+
+    def test_large_modules_are_sampled(self):
+        """Tests that line counts of modules above the threshold are estimated from some files."""
+        for i in range(40):
+            self.write(f"src/big/f{i:02}.py", "line\n" * 100)
+        exact = self.measure(use_cache=False)["src/big"]
+        with patch("agents_core.metrics.count_lines", wraps=count_lines) as mock_count:
+            sampled = self.measure(sample_bytes=5000, use_cache=False)["src/big"]
+        self.assertEqual(mock_count.call_count, 10 + 4)
+        self.assertTrue(sampled.pop("sampled"))
+        self.assertEqual(sampled, exact)
+        self.assertNotIn("sampled", self.measure(sample_bytes=5000, use_cache=False)["src/app"])
+
+    @unittest.skipIf(shutil.which("git") is None, "git is not installed")
+    def test_git_source_matches_walk(self):
+        """Tests that modules discovered from git ls-files get the same metrics."""
+        subprocess.run(["git", "init", "-q"], cwd=self.project_root, check=True)
+        subprocess.run(["git", "add", "src"], cwd=self.project_root, check=True)
+        self.assertEqual(self.measure(source="git"), self.measure(use_cache=False))
+
+    def test_scan_writes_valid_index(self):
+        """Tests that scan --metrics stores metrics that later scans keep."""
+        scan(self.project_root, refresh_index=True, lines=True)
+        index_path = self.project_root / ".agents" / "index.json"
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        self.assertEqual(index["modules"][0]["metrics"]["lines"], 6)
+        self.assertEqual(validate_project(self.project_root, jobs=1)["errors"], [])
+
+        self.assertEqual(merge_modules(discover_modules(self.project_root), index), index["modules"])
+
+
+if __name__ == "__main__":
+    unittest.main()
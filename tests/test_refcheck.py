@@ -0,0 +1,141 @@
+import unittest
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core import refcheck
+from agents_core.refcheck import check_refs, count_lines
+from agents_core.validate import validate_project
+
+
+def task(task_id, refs=(), steps=()):
+    return {"id": task_id, "title": "t", "status": "todo", "acceptance": [],
+            "impl": {"steps": list(steps)}, "refs": list(refs)}
+
+
+class TestRefcheck(unittest.TestCase):
+    """Unit tests for agents_core.refcheck (``agents validate --refs``).
+
+    These tests verify that every dangling file, line and task reference
+    is reported at its pointer, and that each source file is read once.
+    """
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        self.write_text("src/a.py", "one\ntwo\nthree\n")
+        self.write_text("src/b.py", "no newline at end")
+        (self.project_root / "src/pkg").mkdir()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write_text(self, rel, text):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    def write(self, rel, obj):
+        self.write_text(rel, json.dumps(obj))
+
+    def write_project(self, modules, queue=()):
+        """Writes ``{name: [tasks]}`` as module task files plus index and priorities."""
+        entries = []
+        for name, tasks in modules.items():
+            tasks_file = f".agents/modules/{name}/tasks.json"
+            entries.append({"name": name, "path": f"src/{name}", "tasks_file": tasks_file})
+            self.write(tasks_file, {"module": name, "updated_at": "scan", "tasks": tasks})
+        self.write(".agents/index.json", {"version": 1, "generated_at": "scan", "modules": entries, "docs": []})
+        self.write(".agents/priorities.json", {"version": 1, "updated_at": "scan", "policy": {"strategy": "x"},
+                                               "queue": list(queue)})
+        return [e["tasks_file"] for e in entries]
+
+    def located(self, errors):
+        return {(e["file"], e["pointer"]) for e in errors}
+
+    def test_count_lines(self):
+        """Tests that a final line without newline still counts."""
+        self.assertEqual(count_lines(self.project_root / "src/a.py"), 3)
+        self.assertEqual(count_lines(self.project_root / "src/b.py"), 1)
+        self.write_text("empty.txt", "")
+        self.assertEqual(count_lines(self.project_root / "empty.txt"), 0)
+
+    def test_valid_references(self):
+        """Tests that references to existing files, lines and tasks pass."""
+        task_files = self.write_project({
+            "a": [task("a:1", refs=[{"file": "src/a.py", "line": 1, "end_line": 3}, {"file": "src/pkg"},
+                                    {"file": "./src/b.py", "line": 1}],
+                       steps=[{"type": "modify", "file": "src/a.py", "desc": "d"},
+                              {"type": "create", "file": "src/new.py", "desc": "d"}])],
+            "b": [task("b:1")],
+        }, queue=[{"task_id": "b:1", "file": ".agents/modules/b/tasks.json", "blocked_by": ["a:1"]}])
+        self.assertEqual(check_refs(self.project_root, task_files, jobs=1), [])
+
+    def test_dangling_references(self):
+        """Tests that every kind of dangling reference is reported."""
+        task_files = self.write_project({
+            "a": [task("a:1", refs=[{"file": "src/missing.py"}, {"file": "src/a.py", "line": 4},
+                                    {"file": "src/a.py", "line": 3, "end_line": 2},
+                                    {"file": "src/pkg", "line": 1}],
+                       steps=[{"type": "delete", "file": "src/gone.py", "desc": "d"}])],
+        }, queue=[{"task_id": "a:1", "file": ".agents/modules/x/tasks.json"},
+                  {"task_id": "a:9", "file": ".agents/modules/a/tasks.json", "blocked_by": ["a:1", "z:1"]},
+                  {"task_id": "a:1", "file": "src/a.py"}])
+        errors = check_refs(self.project_root, task_files, jobs=1)
+        tasks_file = ".agents/modules/a/tasks.json"
+        self.assertEqual(self.located(errors), {
+            (tasks_file, "/tasks/0/refs/0/file"),
+            (tasks_file, "/tasks/0/refs/1/line"),
+            (tasks_file, "/tasks/0/refs/2/end_line"),
+            (tasks_file, "/tasks/0/refs/3/file"),
+            (tasks_file, "/tasks/0/impl/steps/0/file"),
+            (".agents/priorities.json", "/queue/0/file"),
+            (".agents/priorities.json", "/queue/1/task_id"),
+            (".agents/priorities.json", "/queue/1/blocked_by/1"),
+            (".agents/priorities.json", "/queue/2/file"),
+        })
+        self.assertIn("line 4 is past the end of 'src/a.py' (3 lines)", [e["message"] for e in errors])
+
+    def test_each_file_read_once(self):
+        """Tests that many refs to one file share a single lookup and line count."""
+        refs = [{"file": "src/a.py", "line": n % 3 + 1} for n in range(200)] + [{"file": "src/./a.py"}]
+        task_files = self.write_project({f"m{i}": [task(f"m{i}:1", refs=refs)] for i in range(5)})
+        with patch("agents_core.refcheck.count_lines", wraps=count_lines) as mock_count:
+            self.assertEqual(check_refs(self.project_root, task_files, jobs=4), [])
+        self.assertEqual(mock_count.call_count, 1)
+
+    def test_parallel_matches_serial(self):
+        """Tests that the process pool reports the same errors as a serial run."""
+        task_files = self.write_project({f"m{i}": [task(f"m{i}:1", refs=[{"file": f"src/m{i}.py"}])]
+                                         for i in range(6)})
+        serial = check_refs(self.project_root, task_files, jobs=1)
+        with patch("agents_core.refcheck.PARALLEL_THRESHOLD", 0), patch("agents_core.refcheck.BATCH_SIZE", 2):
+            parallel = check_refs(self.project_root, task_files, jobs=2)
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(parallel, serial)
+
+    def test_streamed_task_files(self):
+        """Tests that very large task files are read as a stream."""
+        task_files = self.write_project({"a": [task("a:1", refs=[{"file": "src/missing.py"}])]})
+        with patch("agents_core.refcheck.STREAM_THRESHOLD", 0), \
+                patch("agents_core.jsonstream.iter_members", wraps=refcheck.jsonstream.iter_members) as mock_iter:
+            errors = check_refs(self.project_root, task_files, jobs=1)
+        self.assertTrue(mock_iter.called)
+        self.assertEqual(self.located(errors), {(".agents/modules/a/tasks.json", "/tasks/0/refs/0/file")})
+
+    def test_validate_project_refs(self):
+        """Tests that validate_project adds reference errors only when asked."""
+        self.write_project({"a": [task("a:1", refs=[{"file": "src/missing.py"}])]})
+        self.assertTrue(validate_project(self.project_root, jobs=1)["ok"])
+        report = validate_project(self.project_root, jobs=1, refs=True)
+        self.assertFalse(report["ok"])
+        self.assertEqual(report["errors"][0]["message"], "'src/missing.py' does not exist")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import json
+import os
 from pathlib import Path
 from tempfile import TemporaryDirectory
 import sys
@@ -8,7 +9,9 @@ from unittest.mock import patch
 # Add src to path to import agents_core
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from agents_core.scan import scan, discover_modules, ensure_task_files
+from agents_core.scan import (
+    scan, discover_modules, ensure_task_files, get_validator, load_schema, validate_against_schema
+)
 
 class TestScanLogic(unittest.TestCase):
     """Unit tests for the agents_core.scan module.
@@ -97,7 +100,19 @@ class TestScanLogic(unittest.TestCase):
             data = json.load(f)
             self.assertEqual(data["module"], "test_mod")
 
-    @patch("agents_core.scan.validate")
+    def test_scan_refresh_skips_unchanged_index(self):
+        """Tests that refreshing an up-to-date index does not rewrite it."""
+        (self.project_root / "src" / "mod_a").mkdir(parents=True)
+        (self.project_root / "src" / "mod_a" / "main.py").touch()
+        scan(self.project_root, refresh_index=True)
+        index_path = self.agents_dir / "index.json"
+        os.utime(index_path, ns=(1, 1))
+
+        scan(self.project_root, refresh_index=True)
+
+        self.assertEqual(index_path.stat().st_mtime_ns, 1)
+
+    @patch("agents_core.schemagen.bundled_validator")
     def test_scan_validate_only(self, mock_validate):
         """Tests the validation-only mode."""
         index_path = self.agents_dir / "index.json"
@@ -110,8 +125,24 @@ class TestScanLogic(unittest.TestCase):
             
         # Should call validate once for index
         # (It would also call for priorities and task files if they existed/were referenced)
+        mock_validate.return_value.return_value = []
         scan(self.project_root, validate_only=True)
-        self.assertTrue(mock_validate.called)
+        mock_validate.assert_any_call("index.schema.json")
+
+    def test_validator_is_cached(self):
+        """Tests that each schema's validator is built and checked only once."""
+        get_validator.cache_clear()
+        with patch("agents_core.scan.load_schema", wraps=load_schema) as mock_load:
+            for _ in range(3):
+                validate_against_schema({"module": "m", "updated_at": "scan", "tasks": []}, "tasks.schema.json")
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertIs(get_validator("tasks.schema.json"), get_validator("tasks.schema.json"))
+
+    def test_validate_against_schema_rejects_invalid(self):
+        """Tests that cached validators still report invalid instances."""
+        with patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                validate_against_schema({"module": "m", "tasks": []}, "tasks.schema.json")
 
 if __name__ == "__main__":
     unittest.main()
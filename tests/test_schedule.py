@@ -0,0 +1,81 @@
+import unittest
+import random
+from pathlib import Path
+import sys
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.schedule import Scheduler, from_priorities
+
+def entry(task_id, status="todo", blocked_by=(), **extra):
+    return dict({"task_id": task_id, "title": task_id, "file": "x", "priority": 1, "status": status,
+                 "blocked_by": list(blocked_by)}, **extra)
+
+def ids(entries):
+    return [e["task_id"] for e in entries]
+
+class TestScheduler(unittest.TestCase):
+    """Unit tests for the agents_core.schedule module."""
+
+    def test_critical_path_first(self):
+        """Tests that the head of the longest unfinished chain comes first."""
+        queue = [entry("short"), entry("a"), entry("b", blocked_by=["a"]), entry("c", blocked_by=["b"]),
+                 entry("d", blocked_by=["short"])]
+        s = Scheduler(queue, {"strategy": "critical_path_first"})
+        self.assertEqual(ids(s.ready()), ["a", "short"])
+        self.assertEqual(s.critical_path, [2, 3, 2, 1, 1])
+        self.assertEqual(s.depth, [0, 0, 1, 2, 1])
+        # Another strategy keeps queue order.
+        self.assertEqual(ids(Scheduler(queue, {"strategy": "manual"}).ready()), ["short", "a"])
+
+    def test_tie_breakers(self):
+        """Tests that tie-breakers order entries with equal critical paths."""
+        queue = [entry("low", value=1), entry("high", value=5), entry("risky", risk=3, value=0)]
+        s = from_priorities({"policy": {"strategy": "critical_path_first", "tie_breakers": ["risk", "value"]},
+                             "queue": queue})
+        self.assertEqual(ids(s.ready()), ["risky", "high", "low"])
+        self.assertEqual(ids(s.ready(limit=2)), ["risky", "high"])
+
+    def test_cycles_and_missing(self):
+        """Tests that cycles and unknown prerequisites never become ready."""
+        queue = [entry("a", blocked_by=["b"]), entry("b", blocked_by=["a"]), entry("c", blocked_by=["b"]),
+                 entry("self", blocked_by=["self"]), entry("orphan", blocked_by=["gone"]), entry("ok")]
+        s = Scheduler(queue)
+        self.assertEqual(sorted(map(sorted, s.cycles())), [["a", "b"], ["self"]])
+        self.assertEqual(s.stuck(), ["a", "b", "c", "self"])
+        self.assertEqual(s.missing, [("orphan", "gone")])
+        self.assertEqual(ids(s.ready()), ["ok"])
+        self.assertIsNone(s.describe(queue[2])["critical_path"])
+
+    def test_set_status_updates_incrementally(self):
+        """Tests readiness and critical paths after status changes."""
+        queue = [entry("a"), entry("b", blocked_by=["a"]), entry("c", blocked_by=["a", "b"])]
+        s = Scheduler(queue)
+        s.set_status("a", "doing")
+        self.assertEqual(ids(s.ready()), [])
+        s.set_status("a", "done")
+        self.assertEqual(ids(s.ready()), ["b"])
+        self.assertEqual(s.critical_path, [2, 2, 1])
+        s.set_status("b", "done")
+        self.assertEqual(ids(s.ready()), ["c"])
+        s.set_status("a", "todo")
+        self.assertEqual(ids(s.ready()), ["a"])
+        with self.assertRaises(KeyError):
+            s.set_status("nope", "done")
+
+    def test_incremental_matches_rebuild(self):
+        """Tests random status changes against schedulers built from scratch."""
+        rng = random.Random(7)
+        queue = [entry(f"t{i}", rng.choice(["todo", "done"]),
+                       [f"t{rng.randrange(i)}" for _ in range(rng.randint(0, 3))] if i else [])
+                 for i in range(300)]
+        s = Scheduler(queue, {"tie_breakers": ["dependency_depth"]})
+        for _ in range(200):
+            s.set_status(f"t{rng.randrange(300)}", rng.choice(["todo", "doing", "done"]))
+            fresh = Scheduler(queue, {"tie_breakers": ["dependency_depth"]})
+            self.assertEqual(s.critical_path, fresh.critical_path)
+            self.assertEqual(ids(s.ready()), ids(fresh.ready()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import copy
+import random
+import unittest
+from pathlib import Path
+import sys
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from jsonschema import Draft7Validator
+
+from agents_core import scan
+from agents_core.schemagen import Unsupported, bundled_validator, compile_schema
+
+SCHEMAS = ["index.schema.json", "priorities.schema.json", "tasks.schema.json"]
+
+VALID = {
+    "index.schema.json": {
+        "version": 1, "generated_at": "2024-01-01T00:00:00Z",
+        "modules": [{"name": "a", "path": "packages/a", "tasks_file": ".agents/modules/a/tasks.json",
+                     "docs": [{"file": "packages/a/README.md"}]}],
+        "docs": [{"file": "README.md", "title": "Readme"}],
+        "ignore": {"builtin": ["node_modules"], "files": [".gitignore"]},
+    },
+    "priorities.schema.json": {
+        "version": 1, "updated_at": "bootstrap", "revision": 3,
+        "policy": {"strategy": "critical_path_first", "tie_breakers": ["risk"]},
+        "queue": [{"task_id": "a:1", "title": "Do it", "priority": 1, "file": ".agents/modules/a/tasks.json", "status": "todo",
+                   "blocked_by": ["a:2"], "claimed_by": "agent-1"}],
+    },
+    "tasks.schema.json": {
+        "module": "a", "updated_at": "scan", "revision": 0,
+        "tasks": [{
+            "id": "a:1", "title": "Do it", "status": "doing", "claimed_by": "agent-1",
+            "acceptance": ["tests pass"],
+            "impl": {"steps": [{"type": "modify", "file": "packages/a/x.py", "desc": "change"}]},
+            "refs": [{"file": "packages/a/x.py", "line": 1, "end_line": 3}],
+            "notes": ["n"],
+        }],
+    },
+}
+
+# Values swapped in by the mutator; they cover every JSON type plus the
+# int/float/bool corner cases where type checks tend to differ.
+REPLACEMENTS = [None, True, False, 0, 1, -1, 1.0, 2.5, -0.5, "", "todo", "bootstrap", "x" * 3, [], ["a"], [1],
+                {}, {"file": "f"}, {"unexpected": 1}]
+
+
+def expected_errors(schema_name, instance):
+    validator = Draft7Validator(scan.load_schema(schema_name), registry=scan.get_registry())
+    return [(tuple(e.absolute_path), e.message) for e in validator.iter_errors(instance)]
+
+
+def _containers(node, path=()):
+    yield path, node
+    children = node.items() if isinstance(node, dict) else enumerate(node) if isinstance(node, list) else ()
+    for key, value in children:
+        yield from _containers(value, path + (key,))
+
+
+def mutate(doc, rng):
+    """Returns a copy of ``doc`` with one to three random edits."""
+    doc = copy.deepcopy(doc)
+    for _ in range(rng.randint(1, 3)):
+        path, node = rng.choice(list(_containers(doc)))
+        if isinstance(node, dict) and node and rng.random() < 0.5:
+            key = rng.choice(list(node))
+            if rng.random() < 0.5:
+                del node[key]
+            else:
+                node[key] = copy.deepcopy(rng.choice(REPLACEMENTS))
+        elif isinstance(node, dict):
+            node[rng.choice(["extra", "other", "1"])] = 1
+        elif isinstance(node, list) and node:
+            node[rng.randrange(len(node))] = copy.deepcopy(rng.choice(REPLACEMENTS))
+        elif isinstance(node, list):
+            node.append(copy.deepcopy(rng.choice(REPLACEMENTS)))
+        elif path:
+            parent = doc
+            for key in path[:-1]:
+                parent = parent[key]
+            parent[path[-1]] = copy.deepcopy(rng.choice(REPLACEMENTS))
+    return doc
+
+
+class TestSchemagen(unittest.TestCase):
+    """Differential tests of the generated validators against jsonschema.
+
+    Errors must match exactly: the same messages at the same paths, in
+    the same order.
+    """
+
+    def assertSameErrors(self, schema_name, instance):
+        self.assertEqual(bundled_validator(schema_name)(instance), expected_errors(schema_name, instance),
+                         f"{schema_name}: {instance!r}")
+
+    def test_valid_documents(self):
+        """Test that the sample documents pass both validators."""
+        for name in SCHEMAS:
+            self.assertEqual(expected_errors(name, VALID[name]), [])
+            self.assertEqual(bundled_validator(name)(VALID[name]), [])
+
+    def test_whole_document_replacements(self):
+        """Test that documents of the wrong type fail identically."""
+        for name in SCHEMAS:
+            for value in REPLACEMENTS:
+                self.assertSameErrors(name, value)
+
+    def test_random_mutations(self):
+        """Test that randomly broken documents fail identically."""
+        rng = random.Random(0)
+        for name in SCHEMAS:
+            for _ in range(1500):
+                self.assertSameErrors(name, mutate(VALID[name], rng))
+
+    def test_keywords_outside_bundled_schemas(self):
+        """Test the supported keywords the bundled schemas do not exercise."""
+        schema = {
+            "$schema": "http://json-schema.org/draft-07/schema#",
+            "type": ["object", "null"],
+            "properties": {
+                "any": {"anyOf": [{"type": "integer"}, {"type": "string", "pattern": "^a"}]},
+                "enum": {"enum": [1, "one", None, [1], {"a": True}]},
+                "const": {"const": False},
+                "max": {"maximum": 2},
+                "never": False,
+                "items": {"items": False},
+                "ref": {"$ref": "#/definitions/never"},
+            },
+            "definitions": {"never": False},
+            "additionalProperties": {"type": "string"},
+        }
+        check, _ = compile_schema(schema)
+        validator = Draft7Validator(schema)
+        # additionalProperties visits the extras as a set, so only the
+        # order of errors at equal paths is comparable.
+        for instance in [None, {}, {"any": 1}, {"any": "ab"}, {"any": "b"}, {"any": 1.5}, {"enum": True},
+                         {"enum": 1.0}, {"enum": [True]}, {"enum": {"a": 1}}, {"const": 0}, {"const": False},
+                         {"max": 3}, {"max": True}, {"never": 1}, {"items": [1, 2]}, {"ref": 1}, {"x": 1, "y": "s", "z": None}]:
+            expected = [(tuple(e.absolute_path), e.message) for e in validator.iter_errors(instance)]
+            self.assertEqual(sorted(check(instance), key=lambda e: e[0]), sorted(expected, key=lambda e: e[0]),
+                             instance)
+
+    def test_unsupported_schemas(self):
+        """Test that unsupported features are refused rather than ignored."""
+        for schema in [{"minLength": 1}, {"items": [{"type": "string"}]}, {"$ref": "#"},
+                       {"$schema": "https://json-schema.org/draft/2020-12/schema", "type": "string"},
+                       {"patternProperties": {"^a": {}}, "additionalProperties": False}]:
+            with self.assertRaises(Unsupported, msg=schema):
+                compile_schema(schema)
+        self.assertIsNone(bundled_validator("missing.schema.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import unittest
+import io
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.client import request, socket_path
+from agents_core.serve import Daemon, FileCache, make_server
+from agents_core.validate import _validate_batch
+
+class TestServe(unittest.TestCase):
+    """Unit tests for the agents serve daemon and its client.
+
+    A daemon is started on a background thread for each test and queried
+    through the same client the CLI uses.
+    """
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        agents_dir = self.project_root / ".agents"
+        (agents_dir / "modules" / "core").mkdir(parents=True)
+        (self.project_root / "src" / "core").mkdir(parents=True)
+        (self.project_root / "src" / "core" / "main.py").touch()
+        self.write(".agents/index.json", {
+            "version": 1, "generated_at": "scan", "docs": [],
+            "modules": [{"name": "core", "path": "src/core", "tasks_file": ".agents/modules/core/tasks.json"}]
+        })
+        self.write(".agents/modules/core/tasks.json", {
+            "module": "core", "updated_at": "scan",
+            "tasks": [
+                {"id": "core:1", "title": "A", "status": "todo", "acceptance": [], "impl": {"steps": []}, "refs": []},
+                {"id": "core:2", "title": "B", "status": "done", "acceptance": [], "impl": {"steps": []}, "refs": []}
+            ]
+        })
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+        self.test_dir.cleanup()
+
+    def write(self, rel, obj):
+        with open(self.project_root / rel, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+
+    def age(self, *rels):
+        """Backdates mtimes so cache entries are outside the racy window."""
+        for rel in rels:
+            os.utime(self.project_root / rel, (1_000_000_000, 1_000_000_000))
+
+    def start(self):
+        self.server = make_server(self.project_root)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def test_no_daemon_falls_back(self):
+        """Tests that the client reports no daemon when none is running."""
+        self.assertIsNone(request(self.project_root, "ping"))
+
+    def test_ping_and_tasks(self):
+        """Tests task queries served from the daemon's memory."""
+        self.start()
+        resp = request(self.project_root, "ping")
+        self.assertEqual(resp["result"]["pid"], os.getpid())
+
+        resp = request(self.project_root, "tasks", {"status": "todo"})
+        self.assertEqual([t["id"] for t in resp["result"]], ["core:1"])
+        self.assertEqual(resp["result"][0]["module"], "core")
+
+        # Edits on disk are picked up on the next query.
+        self.write(".agents/modules/core/tasks.json", {"module": "core", "updated_at": "scan", "tasks": []})
+        resp = request(self.project_root, "tasks", {})
+        self.assertEqual(resp["result"], [])
+
+    def test_validate_and_scan(self):
+        """Tests that commands report output and exit codes like in-process runs."""
+        self.start()
+        resp = request(self.project_root, "validate", {"jobs": 1})
+        self.assertEqual(resp["exit"], 0)
+        self.assertIn("[validate] OK", resp["stdout"])
+
+        resp = request(self.project_root, "scan", {"refresh_index": True})
+        self.assertEqual(resp["exit"], 0)
+        with open(self.project_root / ".agents/index.json", "r", encoding="utf-8") as f:
+            self.assertIn("ignore", json.load(f))
+
+        self.write(".agents/modules/core/tasks.json", {"module": "core", "tasks": []})
+        resp = request(self.project_root, "validate", {"jobs": 1})
+        self.assertEqual(resp["exit"], 1)
+        self.assertIn("updated_at", resp["stderr"])
+
+    def test_scan_and_validate_use_resident_files(self):
+        """Tests that scan and validate parse each unchanged file once across requests."""
+        self.age(".agents/index.json", ".agents/modules/core/tasks.json")
+        daemon = Daemon(self.project_root)
+        index = self.project_root / ".agents/index.json"
+        tasks = self.project_root / ".agents/modules/core/tasks.json"
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(daemon._run("validate", {"jobs": 1})[0], 0)
+            parsed = daemon.files.load(index), daemon.files.load(tasks)
+            with patch("agents_core.validate._read") as mock_read:
+                self.assertEqual(daemon._run("validate", {"jobs": 1, "use_cache": False})[0], 0)
+                daemon._run("scan", {})
+        mock_read.assert_not_called()
+        self.assertIs(daemon.files.load(index), parsed[0])
+        self.assertIs(daemon.files.load(tasks), parsed[1])
+
+        self.write(".agents/modules/core/tasks.json", {"module": "core", "tasks": []})
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()) as err:
+            self.assertEqual(daemon._run("validate", {"jobs": 1})[0], 1)
+        self.assertIn("updated_at", err.getvalue())
+
+    def test_validate_pools_files_not_resident(self):
+        """Tests that validate --jobs sends only task files the daemon does not hold to workers."""
+        (self.project_root / ".agents" / "modules" / "web").mkdir()
+        self.write(".agents/modules/web/tasks.json", {"module": "web", "updated_at": "scan", "tasks": []})
+        self.write(".agents/index.json", {
+            "version": 1, "generated_at": "scan", "docs": [],
+            "modules": [{"name": "core", "path": "src/core", "tasks_file": ".agents/modules/core/tasks.json"},
+                        {"name": "web", "path": "src/web", "tasks_file": ".agents/modules/web/tasks.json"}]
+        })
+        self.age(".agents/index.json", ".agents/modules/core/tasks.json", ".agents/modules/web/tasks.json")
+        daemon = Daemon(self.project_root)
+        daemon.files.load(self.project_root / ".agents/modules/core/tasks.json")
+        with patch("agents_core.validate.PARALLEL_THRESHOLD", 0), \
+                patch("agents_core.validate.ProcessPoolExecutor", ThreadPoolExecutor), \
+                patch("agents_core.validate._validate_batch", wraps=_validate_batch) as mock_batch, \
+                redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(daemon._run("validate", {"jobs": 2, "use_cache": False})[0], 0)
+        self.assertIn("3 files", out.getvalue())
+        self.assertEqual([list(c.args[1]) for c in mock_batch.call_args_list], [[".agents/modules/web/tasks.json"]])
+
+    def test_recent_files_are_reread(self):
+        """Tests that a same-size rewrite within the racy window is not served stale."""
+        files = FileCache()
+        path = self.project_root / "data.json"
+        path.write_text('{"a": 1}')
+        self.assertEqual(files.load(path), {"a": 1})
+        st = path.stat()
+        path.write_text('{"a": 2}')
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(files.load(path), {"a": 2})
+
+        self.age("data.json")
+        self.assertIs(files.load(path), files.load(path))
+
+    def test_hung_daemon_falls_back(self):
+        """Tests that a daemon that never answers does not block the client."""
+        path = socket_path(self.project_root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(path)
+            listener.listen(1)
+            self.assertIsNone(request(self.project_root, "ping", timeout=0.1))
+
+    def test_version_mismatch_and_opt_out(self):
+        """Tests that incompatible daemons and AGENTS_NO_DAEMON force in-process work."""
+        self.start()
+        with patch("agents_core.client.__version__", "0.0.0-other"):
+            self.assertIsNone(request(self.project_root, "ping"))
+        with patch.dict(os.environ, {"AGENTS_NO_DAEMON": "1"}):
+            self.assertIsNone(request(self.project_root, "ping"))
+        self.assertIsNone(request(self.project_root, "no-such-op"))
+
+    def test_stale_socket_and_second_daemon(self):
+        """Tests that a stale socket is replaced but a live daemon is not."""
+        path = socket_path(self.project_root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Path(path).touch()
+        self.start()
+        self.assertIsNotNone(request(self.project_root, "ping"))
+        with self.assertRaises(RuntimeError):
+            make_server(self.project_root)
+
+if __name__ == "__main__":
+    unittest.main()
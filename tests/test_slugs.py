@@ -0,0 +1,158 @@
+import unittest
+import json
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.scan import assign_modules, merge_modules
+from agents_core.slugs import migrate, module_slugs, path_digest
+
+
+class TestModuleSlugs(unittest.TestCase):
+    """Unit tests for path-derived module names."""
+
+    def test_shortest_unique_suffix(self):
+        """Tests that names use as much of the path as needed to be unique."""
+        slugs = module_slugs(["src/app", "src/core/utils", "src/web/utils", "lib/web/utils", "tools"])
+        self.assertEqual(slugs, {"src/app": "app", "src/core/utils": "core-utils",
+                                 "src/web/utils": "src-web-utils", "lib/web/utils": "lib-web-utils",
+                                 "tools": "tools"})
+
+    def test_joined_names_that_coincide(self):
+        """Tests that paths joining to the same name get digests appended."""
+        slugs = module_slugs(["p/a-b/c", "q/a/b-c", "r/c", "s/b-c"])
+        self.assertEqual(slugs, {"p/a-b/c": f"a-b-c-{path_digest('p/a-b/c')}",
+                                 "q/a/b-c": f"a-b-c-{path_digest('q/a/b-c')}", "r/c": "r-c", "s/b-c": "s-b-c"})
+
+    def test_path_that_ends_another_path(self):
+        """Tests that a module path another module path ends with still gets a name."""
+        slugs = module_slugs(["src/utils", "packages/web/src/utils", "lib/src/utils"])
+        self.assertEqual(slugs, {"src/utils": "src-utils", "packages/web/src/utils": "web-src-utils",
+                                 "lib/src/utils": "lib-src-utils"})
+        self.assertEqual(module_slugs(["utils", "a/utils"]), {"utils": "utils", "a/utils": "a-utils"})
+
+    def test_independent_of_walk_order(self):
+        """Tests that discovery order does not change any module's name or tasks file."""
+        paths = [Path(f"pkg/m{i % 50}/utils") for i in range(50)] + [Path("pkg/utils"), Path("a/b")]
+        forward = {m["path"]: m for m in assign_modules(paths)}
+        backward = {m["path"]: m for m in assign_modules(reversed(paths))}
+        self.assertEqual(forward, backward)
+        self.assertEqual(len({m["name"] for m in forward.values()}), len(forward))
+
+    def test_many_collisions_scale(self):
+        """Tests that thousands of same-named directories are named in linear time."""
+        paths = [f"services/s{i}/internal/utils" for i in range(20000)]
+        start = time.perf_counter()
+        slugs = module_slugs(paths)
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(slugs["services/s7/internal/utils"], "s7-internal-utils")
+        self.assertEqual(len(set(slugs.values())), len(paths))
+
+
+class TestMergeModules(unittest.TestCase):
+    """Unit tests for merging discovered modules into an existing index by path."""
+
+    def test_new_module_does_not_rename_existing(self):
+        """Tests that a colliding new module leaves the existing entry alone."""
+        existing = {"modules": [{"name": "utils", "path": "core/utils",
+                                 "tasks_file": ".agents/modules/utils/tasks.json", "docs": [{"file": "d.md"}]}]}
+        final = merge_modules(assign_modules([Path("core/utils"), Path("web/utils")]), existing)
+        self.assertEqual(final[0], existing["modules"][0])
+        self.assertEqual(final[1]["name"], "web-utils")
+        self.assertEqual(final[1]["tasks_file"], ".agents/modules/web-utils/tasks.json")
+
+    def test_new_module_avoids_names_in_use(self):
+        """Tests that a new name equal to a kept entry's name gets a digest."""
+        existing = {"modules": [{"name": "utils", "path": "legacy/utils-old", "tasks_file": "t.json"}]}
+        final = merge_modules(assign_modules([Path("legacy/utils-old"), Path("web/utils")]), existing)
+        self.assertEqual([m["name"] for m in final], ["utils", f"utils-{path_digest('web/utils')}"])
+
+    def test_moved_module_keeps_its_tasks(self):
+        """Tests that a module whose directory moved keeps its entry."""
+        existing = {"modules": [{"name": "app", "path": "src/app", "tasks_file": ".agents/modules/app/tasks.json",
+                                 "docs": [{"file": "d.md"}]}]}
+        final = merge_modules(assign_modules([Path("apps/app")]), existing)
+        self.assertEqual(final, [dict(existing["modules"][0], path="apps/app")])
+
+
+class TestMigrate(unittest.TestCase):
+    """Unit tests for migrating an index onto path-derived names."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write(self, rel, obj):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(obj), encoding="utf-8")
+
+    def read(self, rel):
+        return json.loads((self.project_root / rel).read_text(encoding="utf-8"))
+
+    def write_old_index(self, modules):
+        """Writes an index and task files named the old way: ``[(name, path)]``."""
+        entries = []
+        for name, path in modules:
+            tasks_file = f".agents/modules/{name}/tasks.json"
+            entries.append({"name": name, "path": path, "tasks_file": tasks_file})
+            self.write(tasks_file, {"module": name, "updated_at": "scan",
+                                    "tasks": [{"id": f"{name}:1", "title": path}]})
+            (self.project_root / f".agents/modules/{name}/notes.md").write_text(path, encoding="utf-8")
+        self.write(".agents/index.json", {"version": 1, "modules": entries, "docs": []})
+
+    def test_migrates_without_data_loss(self):
+        """Tests that renamed modules carry their whole directory and queue entries along."""
+        # Walk order once made web/utils "utils" and core/utils "utils-2"; the new
+        # names swap which directory is called what.
+        self.write_old_index([("utils", "web/utils"), ("utils-2", "core/utils"), ("app", "src/app")])
+        self.write(".agents/priorities.json", {"version": 1, "revision": 4, "queue": [
+            {"task_id": "utils-2:1", "file": ".agents/modules/utils-2/tasks.json"},
+            {"task_id": "app:1", "file": ".agents/modules/app/tasks.json"}]})
+
+        self.assertEqual(migrate(self.project_root, dry_run=True),
+                         [("utils", "web-utils"), ("utils-2", "core-utils")])
+        self.assertTrue((self.project_root / ".agents/modules/utils-2").is_dir())
+
+        self.assertEqual(len(migrate(self.project_root)), 2)
+        index = self.read(".agents/index.json")
+        self.assertEqual([(m["name"], m["path"], m["tasks_file"]) for m in index["modules"]], [
+            ("web-utils", "web/utils", ".agents/modules/web-utils/tasks.json"),
+            ("core-utils", "core/utils", ".agents/modules/core-utils/tasks.json"),
+            ("app", "src/app", ".agents/modules/app/tasks.json"),
+        ])
+        for m in index["modules"]:
+            doc = self.read(m["tasks_file"])
+            self.assertEqual(doc["module"], m["name"])
+            self.assertEqual(doc["tasks"][0]["title"], m["path"])
+            notes = self.project_root / m["tasks_file"].replace("tasks.json", "notes.md")
+            self.assertEqual(notes.read_text(encoding="utf-8"), m["path"])
+        self.assertEqual(sorted(p.name for p in (self.project_root / ".agents/modules").iterdir()),
+                         ["app", "core-utils", "web-utils"])
+
+        priorities = self.read(".agents/priorities.json")
+        self.assertEqual(priorities["queue"][0], {"task_id": "utils-2:1",
+                                                  "file": ".agents/modules/core-utils/tasks.json"})
+        self.assertEqual(priorities["revision"], 5)
+        self.assertEqual(migrate(self.project_root), [])
+
+    def test_refuses_to_overwrite(self):
+        """Tests that an unrelated directory at a target name stops the migration."""
+        self.write_old_index([("utils", "web/utils"), ("utils-2", "core/utils")])
+        self.write(".agents/modules/core-utils/tasks.json", {"module": "stray"})
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            migrate(self.project_root)
+        self.assertEqual(self.read(".agents/index.json")["modules"][0]["name"], "utils")
+        self.assertEqual(self.read(".agents/modules/core-utils/tasks.json"), {"module": "stray"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import json
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.taskdb import connect, db_path, query, refresh
+from agents_core.tasks import list_tasks
+
+def task(task_id, status="todo", refs=()):
+    return {"id": task_id, "title": task_id, "status": status, "acceptance": [], "impl": {"steps": []},
+            "refs": [{"file": f} for f in refs]}
+
+class TestTaskDB(unittest.TestCase):
+    """Unit tests for the agents_core.taskdb module."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        self.modules = []
+        self.add_module("api", [task("api:1", refs=["src/api/main.py"]), task("api:2", "blocked")])
+        self.add_module("web", [task("web:1", "done", refs=["src/web_ui/app.js"])])
+        self.write(".agents/priorities.json", {"queue": [{"task_id": "api:1", "status": "todo", "file": "x"},
+                                                         {"task_id": "api:2", "status": "blocked", "file": "x"}]})
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write(self, rel, obj):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+        # Make every rewrite visible to the mtime/size check.
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9 * (1 + len(self.modules))))
+
+    def add_module(self, name, tasks):
+        tasks_file = f".agents/modules/{name}/tasks.json"
+        self.modules.append({"name": name, "path": f"src/{name}", "tasks_file": tasks_file})
+        self.write(".agents/index.json", {"modules": self.modules})
+        self.write(tasks_file, {"module": name, "updated_at": "scan", "tasks": tasks})
+
+    def ids(self, **filters):
+        return [t.get("id", t.get("task_id")) for t in query(self.project_root, **filters)]
+
+    def test_queries_match_json(self):
+        """Tests filters, and that results have the shape list_tasks returns."""
+        self.assertEqual(query(self.project_root), list_tasks(self.project_root))
+        self.assertEqual(self.ids(module="api", status="blocked"), ["api:2"])
+        self.assertEqual(query(self.project_root, task_id="web:1")[0]["tasks_file"], ".agents/modules/web/tasks.json")
+        self.assertEqual(self.ids(ref="src/api"), ["api:1"])
+        # LIKE wildcards in the path are literal.
+        self.assertEqual(self.ids(ref="src/web_ui/app.js"), ["web:1"])
+        self.assertEqual(self.ids(ref="src/web%"), [])
+        self.assertEqual(self.ids(queue=True, status="blocked"), ["api:2"])
+
+    def test_incremental_refresh(self):
+        """Tests that only changed, added or removed files are reloaded."""
+        conn = connect(self.project_root)
+        self.assertEqual(refresh(conn, self.project_root), 3)
+        self.assertEqual(refresh(conn, self.project_root), 0)
+
+        self.write(".agents/modules/web/tasks.json", {"module": "web", "updated_at": "scan", "tasks": []})
+        self.add_module("cli", [task("cli:1")])
+        self.assertEqual(refresh(conn, self.project_root), 2)
+        self.modules = self.modules[1:]
+        self.write(".agents/index.json", {"modules": self.modules})
+        self.assertEqual(refresh(conn, self.project_root), 1)
+        conn.close()
+        self.assertEqual(self.ids(), ["cli:1"])
+
+    def test_removed_then_restored_tasks_file(self):
+        """Tests that a tasks file that went missing is loaded again once restored."""
+        path = self.project_root / ".agents/modules/web/tasks.json"
+        moved = self.project_root / "web-tasks.json"
+        self.assertEqual(self.ids(status="done"), ["web:1"])
+        path.rename(moved)
+        self.assertEqual(self.ids(status="done"), [])
+        moved.rename(path)
+        self.assertEqual(self.ids(status="done"), ["web:1"])
+
+    def test_unreadable_or_stale_database_is_rebuilt(self):
+        """Tests that a corrupt database file is replaced."""
+        query(self.project_root)
+        db_path(self.project_root).write_bytes(b"not a database" * 100)
+        self.assertEqual(self.ids(status="todo"), ["api:1"])
+
+if __name__ == "__main__":
+    unittest.main()
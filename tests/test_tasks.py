@@ -0,0 +1,131 @@
+import unittest
+import json
+import multiprocessing
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.tasks import claim_next, list_tasks
+
+def task(task_id, status="todo"):
+    return {"id": task_id, "title": task_id, "status": status, "acceptance": [], "impl": {"steps": []}, "refs": []}
+
+def claim_all(project_root, agent):
+    """Worker for the stress test: claims until nothing is left."""
+    claimed = []
+    while True:
+        found = claim_next(Path(project_root), agent=agent)
+        if found is None:
+            return claimed
+        claimed.append(found["id"])
+
+class TestTasks(unittest.TestCase):
+    """Unit tests for the agents_core.tasks module."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        self.agents_dir = self.project_root / ".agents"
+        modules = []
+        for name, tasks in (("api", [task("api:1"), task("api:2", "blocked")]), ("web", [task("web:1", "done")])):
+            tasks_file = f".agents/modules/{name}/tasks.json"
+            modules.append({"name": name, "path": f"src/{name}", "tasks_file": tasks_file})
+            self.write(tasks_file, {"module": name, "updated_at": "scan", "tasks": tasks})
+        self.write(".agents/index.json", {"version": 1, "generated_at": "scan", "modules": modules, "docs": []})
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write(self, rel, obj):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+
+    def test_list_tasks_filters(self):
+        """Tests module, status and id filters."""
+        self.assertEqual(len(list_tasks(self.project_root)), 3)
+        self.assertEqual([t["id"] for t in list_tasks(self.project_root, module="api")], ["api:1", "api:2"])
+        self.assertEqual([t["id"] for t in list_tasks(self.project_root, status="blocked")], ["api:2"])
+        found = list_tasks(self.project_root, task_id="web:1")
+        self.assertEqual(found[0]["module"], "web")
+        self.assertEqual(found[0]["tasks_file"], ".agents/modules/web/tasks.json")
+
+    def test_list_tasks_without_index(self):
+        """Tests that a project without an index has no tasks."""
+        (self.agents_dir / "index.json").unlink()
+        self.assertEqual(list_tasks(self.project_root), [])
+
+    def read(self, rel):
+        with open(self.project_root / rel, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_claim_next_from_task_files(self):
+        """Tests that claims move todo tasks to doing until none are left."""
+        claimed = claim_next(self.project_root, agent="a1")
+        self.assertEqual((claimed["id"], claimed["status"], claimed["claimed_by"]), ("api:1", "doing", "a1"))
+        self.assertEqual(claimed["module"], "api")
+        doc = self.read(".agents/modules/api/tasks.json")
+        self.assertEqual(doc["tasks"][0]["status"], "doing")
+        self.assertEqual(doc["revision"], 1)
+        self.assertIsNone(claim_next(self.project_root))
+        self.assertIsNone(claim_next(self.project_root, module="web"))
+
+    def test_claim_next_follows_queue(self):
+        """Tests queue order, blocked_by and the matching task-file update."""
+        api = ".agents/modules/api/tasks.json"
+        self.write(api, {"module": "api", "updated_at": "scan", "tasks": [task("api:1"), task("api:3")]})
+        entry = lambda task_id, **extra: dict({"task_id": task_id, "title": task_id, "file": api,
+                                               "priority": 1, "status": "todo"}, **extra)
+        self.write(".agents/priorities.json", {"version": 1, "updated_at": "scan", "policy": {"strategy": "manual"},
+                                               "queue": [entry("api:3", blocked_by=["api:1"]), entry("api:1")]})
+
+        self.assertEqual(claim_next(self.project_root, agent="a1")["id"], "api:1")
+        # api:3 waits for api:1 to be done, and the queue hides it from the task-file fallback.
+        self.assertIsNone(claim_next(self.project_root))
+        prio = self.read(".agents/priorities.json")
+        self.assertEqual([(e["task_id"], e["status"]) for e in prio["queue"]], [("api:3", "todo"), ("api:1", "doing")])
+        self.assertEqual(prio["queue"][1]["claimed_by"], "a1")
+        self.assertEqual(self.read(api)["tasks"][0]["status"], "doing")
+
+    def test_claim_next_skips_tasks_finished_in_file(self):
+        """Tests that queue entries whose task file says doing/done are not claimed again."""
+        api = ".agents/modules/api/tasks.json"
+        self.write(api, {"module": "api", "updated_at": "scan",
+                         "tasks": [task("api:1", "done"), task("api:2", "doing"), task("api:3")]})
+        entry = lambda task_id, **extra: dict({"task_id": task_id, "title": task_id, "file": api,
+                                               "priority": 1, "status": "todo"}, **extra)
+        self.write(".agents/priorities.json", {"version": 1, "updated_at": "scan", "policy": {"strategy": "manual"},
+                                               "queue": [entry("api:1"), entry("api:2"),
+                                                         entry("api:3", blocked_by=["api:1"]), entry("api:4")]})
+
+        claimed = claim_next(self.project_root, agent="a1")
+        self.assertEqual((claimed["id"], claimed["module"]), ("api:3", "api"))
+        prio = self.read(".agents/priorities.json")
+        self.assertEqual([e["status"] for e in prio["queue"]], ["done", "doing", "doing", "todo"])
+        # api:4 is only in the queue; its module is still known from the file.
+        claimed = claim_next(self.project_root, agent="a1")
+        self.assertEqual((claimed["id"], claimed["module"]), ("api:4", "api"))
+        self.assertIsNone(claim_next(self.project_root))
+
+    def test_concurrent_claims_are_exclusive(self):
+        """Stress test: many processes claim every task exactly once."""
+        tasks = [task(f"api:{i}") for i in range(200)]
+        self.write(".agents/modules/api/tasks.json", {"module": "api", "updated_at": "scan", "tasks": tasks})
+        with multiprocessing.get_context("fork").Pool(24) as pool:
+            results = pool.starmap(claim_all, [(str(self.project_root), f"agent{i}") for i in range(24)])
+
+        claimed = [task_id for result in results for task_id in result]
+        self.assertEqual(sorted(claimed), sorted(t["id"] for t in tasks))
+        doc = self.read(".agents/modules/api/tasks.json")
+        self.assertTrue(all(t["status"] == "doing" for t in doc["tasks"]))
+        self.assertEqual(doc["revision"], len(tasks))
+        by_agent = {t["id"]: t["claimed_by"] for t in doc["tasks"]}
+        for i, result in enumerate(results):
+            self.assertTrue(all(by_agent[task_id] == f"agent{i}" for task_id in result))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core import timing
+from agents_core.timing import Timings, instrument
+
+class TestTimings(unittest.TestCase):
+    """Unit tests for the agents_core.timing module."""
+
+    def test_report(self):
+        """Tests stages, counters and subprocess accounting in the report."""
+        timings = Timings()
+        with timings.stage("walk"):
+            timings.count("dirs_listed", 3)
+        timings.count("dirs_listed")
+        timings.subprocess_call("git", 0.25)
+        timings.subprocess_call("git", 0.5)
+        report = timings.report()
+        self.assertEqual([s["name"] for s in report["stages"]], ["walk"])
+        self.assertEqual(report["counters"], {"dirs_listed": 4})
+        self.assertEqual(report["subprocesses"], {"git": {"calls": 2, "ms": 750.0}})
+
+    def test_helpers_without_instrumentation(self):
+        """Tests that the module-level helpers are no-ops when not instrumented."""
+        self.assertIsNone(timing.active())
+        with timing.stage("x"):
+            timing.count("n")
+            timing.subprocess_call("git", 1.0)
+        self.assertIsNone(timing.active())
+
+    def test_instrument_reports_failed_commands(self):
+        """Tests that a command exiting with an error still writes its report."""
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "report.json"
+            with self.assertRaises(SystemExit):
+                with instrument("validate", str(path), trace_memory=True):
+                    with timing.stage("validate"):
+                        timing.count("files_validated", 2)
+                    sys.exit(1)
+            self.assertIsNone(timing.active())
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        self.assertEqual((report["command"], report["exit"]), ("validate", 1))
+        self.assertEqual(report["counters"], {"files_validated": 2})
+        self.assertGreater(report["tracemalloc_peak_bytes"], 0)
+        self.assertGreater(report["max_rss_kib"], 0)
+
+    def test_instrument_without_resource_module(self):
+        """Tests that the report leaves out peak RSS where ``resource`` is missing."""
+        with TemporaryDirectory() as tmp, patch.dict(sys.modules, {"resource": None}):
+            path = Path(tmp) / "report.json"
+            with instrument("scan", str(path)):
+                pass
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        self.assertEqual(report["exit"], 0)
+        self.assertNotIn("max_rss_kib", report)
+
+if __name__ == "__main__":
+    unittest.main()
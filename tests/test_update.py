@@ -1,12 +1,18 @@
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
+import asyncio
+import json
+import time
+from unittest.mock import ANY, AsyncMock, patch, MagicMock
 from pathlib import Path
+from tempfile import TemporaryDirectory
 import sys
 
 # Add src to path to import agents_core
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from agents_core.update import update
+from agents_core.gitops import Status, StatusEntry
+from agents_core.update import sync_control_plane, update
+from agents_core.timing import Timings
 
 class TestUpdateLogic(unittest.TestCase):
     """Unit tests for the agents_core.update module.
@@ -16,97 +22,225 @@ class TestUpdateLogic(unittest.TestCase):
     the project state or interacting with remote repositories.
     """
 
-    @patch("agents_core.update.run_command")
-    @patch("agents_core.update.scan")
-    @patch("agents_core.update.subprocess.run")
-    @patch("builtins.open", new_callable=mock_open, read_data='{"test": "data"}')
-    @patch("agents_core.update.Path.exists")
-    @patch("agents_core.update.time.sleep") # Prevent actual waiting during test execution
-    def test_update_success_flow(self, mock_sleep, mock_exists, mock_file, mock_run, mock_scan, mock_run_cmd):
+    def make_repo(self, mock_repo_cls, entries=(), upstream="origin/main", ahead_behind=(1, 0), push_codes=(0,)):
+        repo = mock_repo_cls.return_value
+        status = Status()
+        status.upstream = upstream
+        status.entries = [StatusEntry(xy, path) for xy, path in entries]
+        repo.status.return_value = status
+        repo.top_path.side_effect = lambda rel: rel
+        repo.push.side_effect = [MagicMock(returncode=code, stderr=b"") for code in push_codes]
+        repo.summary.return_value = "0 call(s)"
+        repo.fetch = AsyncMock(return_value=MagicMock(returncode=0))
+        repo.ahead_behind.return_value = ahead_behind
+        return repo
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    @patch("agents_core.gitops.time.sleep")
+    def test_update_success_flow(self, mock_sleep, mock_sync, mock_repo_cls):
         """Tests the complete successful update flow.
         
         This test simulates a project with changes that need to be committed
         and pushed. It verifies that:
-        1. Tooling validation is performed.
+        1. Work-tree state comes from a single status call.
         2. Repository scanning and schema validation are triggered.
-        3. A pretty-printed index snapshot is created.
-        4. Changed files are staged, committed, and pushed.
+        3. Changed files and the control plane are staged, committed, and pushed.
         """
         project_root = Path("/tmp/fake_project")
-        
-        # Simulate that .agents/index.json exists so snapshotting proceeds
-        mock_exists.side_effect = lambda: True
-        
-        # Simulate 'git diff' finding local changes (returncode=1)
-        mock_diff = MagicMock()
-        mock_diff.returncode = 1
-        
-        # Simulate 'git push' succeeding on the first attempt
-        mock_push = MagicMock()
-        mock_push.returncode = 0
-        
-        # Define the sequence of subprocess.run calls expected in this flow
-        mock_run.side_effect = [mock_diff, mock_push]
+        repo = self.make_repo(mock_repo_cls, entries=[(".M", "src/x.py"), ("??", "notes/")])
+        mock_sync.return_value = [".agents/index.json"]
         
         # Execute the update logic
         update(project_root)
         
-        # Verify that scan() was called for both refreshing the index and validation
-        self.assertEqual(mock_scan.call_count, 2)
-        mock_scan.assert_any_call(project_root, refresh_index=True)
-        mock_scan.assert_any_call(project_root, validate_only=True)
-        
-        # Verify mandatory git validation and staging commands
-        mock_run_cmd.assert_any_call(["git", "rev-parse", "--is-inside-work-tree"], project_root)
-        mock_run_cmd.assert_any_call(["git", "add", "-A"], project_root)
+        # Verify that the index was refreshed and validated in one pipeline run
+        mock_sync.assert_called_once_with(project_root, use_cache=True, timings=ANY)
         
-        # Verify the push command was issued with correct arguments
-        mock_run.assert_any_call(["git", "push"], cwd=project_root, capture_output=True, text=True)
-
-    @patch("agents_core.update.run_command")
-    @patch("agents_core.update.subprocess.run")
-    @patch("agents_core.update.scan")
-    @patch("agents_core.update.time.sleep")
-    def test_update_push_retry(self, mock_sleep, mock_scan, mock_run, mock_run_cmd):
+        repo.status.assert_called_once_with()
+        repo.fetch.assert_awaited_once()
+        repo.stage.assert_called_once_with([".agents", "notes/", "src/x.py"])
+        repo.commit.assert_called_once()
+        repo.rebase_onto_upstream.assert_not_called()
+        repo.push.assert_called_once_with()
+        mock_sleep.assert_not_called()
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    def test_update_scoped_paths(self, mock_sync, mock_repo_cls):
+        """Tests that only .agents/ and the given paths are staged."""
+        repo = self.make_repo(mock_repo_cls, entries=[(".M", "src/x.py"), (".M", "other.py"),
+                                                      (".M", ".agents/modules/a/tasks.json")])
+        mock_sync.return_value = []
+
+        update(Path("/tmp/fake_project"), paths=["src"])
+
+        repo.stage.assert_called_once_with([".agents", "src/x.py"])
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    def test_update_nothing_to_do(self, mock_sync, mock_repo_cls):
+        """Tests that a clean, up-to-date tree neither commits nor pushes."""
+        repo = self.make_repo(mock_repo_cls, ahead_behind=(0, 2))
+        mock_sync.return_value = []
+
+        update(Path("/tmp/fake_project"))
+
+        repo.stage.assert_not_called()
+        repo.rebase_onto_upstream.assert_not_called()
+        repo.commit.assert_not_called()
+        repo.push.assert_not_called()
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    def test_update_changes_that_match_head(self, mock_sync, mock_repo_cls):
+        """Tests that no commit is made when the staged result equals HEAD."""
+        repo = self.make_repo(mock_repo_cls, entries=[(".M", ".agents/index.json")], ahead_behind=(0, 0))
+        repo.has_staged_changes.return_value = False
+        mock_sync.return_value = [".agents/index.json"]
+
+        update(Path("/tmp/fake_project"))
+
+        repo.stage.assert_called_once_with([".agents"])
+        repo.commit.assert_not_called()
+        repo.push.assert_not_called()
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    def test_update_without_fetch_pushes_only_when_ahead(self, mock_sync, mock_repo_cls):
+        """Tests that without a usable fetch the status and the new commit decide the push."""
+        mock_sync.return_value = []
+        repo = self.make_repo(mock_repo_cls)
+        repo.fetch = AsyncMock(return_value=MagicMock(returncode=1))
+        update(Path("/tmp/fake_project"))
+        repo.push.assert_not_called()
+
+        mock_repo_cls.reset_mock()
+        repo = self.make_repo(mock_repo_cls)
+        repo.fetch = AsyncMock(return_value=MagicMock(returncode=1))
+        repo.status.return_value.ahead = 2
+        update(Path("/tmp/fake_project"))
+        repo.push.assert_called_once_with()
+
+        mock_repo_cls.reset_mock()
+        repo = self.make_repo(mock_repo_cls, entries=[(".M", "src/x.py")], upstream=None, push_codes=(0,))
+        update(Path("/tmp/fake_project"))
+        repo.fetch.assert_not_awaited()
+        repo.commit.assert_called_once()
+        repo.push.assert_called_once_with()
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    @patch("agents_core.gitops.time.sleep")
+    def test_update_push_retry(self, mock_sleep, mock_sync, mock_repo_cls):
         """Tests the push retry logic when the initial attempt fails.
         
         This test simulates a scenario where:
-        1. No new changes are detected locally.
-        2. An initial 'git push' fail.
-        3. A check shows the local branch is not behind (no rebase needed).
-        4. A second 'git push' attempt succeeds.
+        1. No new changes are detected locally, but the branch is ahead.
+        2. An initial 'git push' fails for a reason other than being behind.
+        3. The script backs off, and a second 'git push' attempt succeeds.
         """
-        project_root = Path("/tmp/fake_project")
-        
-        # Mock 1: 'git diff --cached' (returncode=0 means no changes to commit)
-        mock_diff = MagicMock()
-        mock_diff.returncode = 0
-        
-        # Mock 2: First 'git push' failure (e.g., transient network issue)
-        mock_push_fail = MagicMock()
-        mock_push_fail.returncode = 1
-        
-        # Mock 3: 'git status -sb' to check relationship with remote
-        mock_status = MagicMock()
-        mock_status.stdout = "## main" # Simulates a clean status, not behind
-        
-        # Mock 4: Second 'git push' success
-        mock_push_success = MagicMock()
-        mock_push_success.returncode = 0
-        
-        # Configure the mock to return these values in order
-        mock_run.side_effect = [mock_diff, mock_push_fail, mock_status, mock_push_success]
-        
-        # Skip index file handling for this test case
-        with patch("agents_core.update.Path.exists", return_value=False):
-             update(project_root)
+        repo = self.make_repo(mock_repo_cls, push_codes=(1, 0))
+        mock_sync.return_value = []
+
+        update(Path("/tmp/fake_project"))
         
-        # Validate that 'git push' was retried
-        push_calls = [call for call in mock_run.call_args_list if call.args[0] == ["git", "push"]]
-        self.assertEqual(len(push_calls), 2)
+        # Validate that 'git push' was retried without a rebase
+        self.assertEqual(repo.push.call_count, 2)
+        repo.pull_rebase.assert_not_called()
         
         # Ensure the script waited (slept) before retrying the failed push
         self.assertEqual(mock_sleep.call_count, 1)
+        self.assertTrue(0.5 <= mock_sleep.call_args.args[0] <= 1.0)
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    def test_update_rebases_before_single_push(self, mock_sync, mock_repo_cls):
+        """Tests that a branch found behind after the fetch is rebased, then pushed once."""
+        repo = self.make_repo(mock_repo_cls, entries=[(".M", "src/x.py")], ahead_behind=(1, 3))
+        mock_sync.return_value = []
+
+        update(Path("/tmp/fake_project"))
+
+        repo.rebase_onto_upstream.assert_called_once_with()
+        repo.push.assert_called_once_with()
+        repo.pull_rebase.assert_not_called()
+
+    @patch("agents_core.update.GitRepo")
+    @patch("agents_core.update.sync_control_plane")
+    def test_update_overlaps_fetch_with_local_work(self, mock_sync, mock_repo_cls):
+        """Tests that the fetch is already running while the scan runs."""
+        repo = self.make_repo(mock_repo_cls)
+        events = []
+
+        async def slow_fetch():
+            events.append("fetch-start")
+            await asyncio.sleep(0.2)
+            events.append("fetch-end")
+            return MagicMock(returncode=0)
+
+        def sync(*args, **kwargs):
+            time.sleep(0.05)
+            events.append("sync")
+            return []
+
+        repo.fetch = slow_fetch
+        mock_sync.side_effect = sync
+
+        update(Path("/tmp/fake_project"))
+
+        self.assertEqual(events, ["fetch-start", "sync", "fetch-end"])
+
+class TestSyncControlPlane(unittest.TestCase):
+    """Tests the in-memory refresh/validate/write pipeline used by update."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        (self.project_root / ".agents").mkdir()
+        for rel in ("src/a/main.py", "src/b/lib.go"):
+            (self.project_root / rel).parent.mkdir(parents=True)
+            (self.project_root / rel).touch()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_writes_index_tasks_and_snapshot(self):
+        """Tests the first run creates every file and the snapshot matches the index."""
+        timings = Timings()
+        written = sync_control_plane(self.project_root, timings=timings)
+        self.assertEqual(sorted(written), [".agents/index.json", ".agents/index.pretty.json",
+                                           ".agents/modules/a/tasks.json", ".agents/modules/b/tasks.json"])
+        index = (self.project_root / ".agents/index.json").read_bytes()
+        self.assertEqual((self.project_root / ".agents/index.pretty.json").read_bytes(), index)
+        self.assertEqual([m["name"] for m in json.loads(index)["modules"]], ["a", "b"])
+        self.assertEqual([name for name, _ in timings.stages], ["load", "discover", "merge", "validate", "write"])
+
+    def test_unchanged_tree_reads_once_and_writes_nothing(self):
+        """Tests a rerun reads each control-plane file at most once and writes none."""
+        sync_control_plane(self.project_root)
+        real_open = open
+        opened = []
+
+        def counting_open(file, *args, **kwargs):
+            opened.append(Path(file).relative_to(self.project_root).as_posix())
+            return real_open(file, *args, **kwargs)
+
+        with patch("builtins.open", side_effect=counting_open):
+            written = sync_control_plane(self.project_root, use_cache=False)
+        self.assertEqual(written, [])
+        for rel in (".agents/index.json", ".agents/index.pretty.json",
+                    ".agents/modules/a/tasks.json", ".agents/modules/b/tasks.json"):
+            self.assertEqual(opened.count(rel), 1, rel)
+
+    def test_invalid_task_file_skips_snapshot(self):
+        """Tests that a validation failure exits without writing the snapshot."""
+        sync_control_plane(self.project_root)
+        (self.project_root / ".agents/index.pretty.json").unlink()
+        (self.project_root / ".agents/modules/a/tasks.json").write_text('{"module": "a"}')
+        with self.assertRaises(SystemExit):
+            sync_control_plane(self.project_root)
+        self.assertFalse((self.project_root / ".agents/index.pretty.json").exists())
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,192 @@
+import unittest
+import io
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.validate import collect_errors, json_pointer, print_report, validate_project
+
+def tasks_doc(module, status="todo"):
+    return {
+        "module": module,
+        "updated_at": "scan",
+        "tasks": [{
+            "id": f"{module}:1",
+            "title": "Do it",
+            "status": status,
+            "acceptance": [],
+            "impl": {"steps": []},
+            "refs": []
+        }]
+    }
+
+class TestValidateProject(unittest.TestCase):
+    """Unit tests for the agents_core.validate engine.
+
+    These tests verify that every error is collected with its file and
+    JSON pointer and that the parallel path agrees with the serial one.
+    """
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        self.agents_dir = self.project_root / ".agents"
+        self.agents_dir.mkdir()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write(self, rel, obj):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+
+    def write_project(self, n_modules, bad=()):
+        modules = []
+        for i in range(n_modules):
+            name = f"mod{i}"
+            tasks_file = f".agents/modules/{name}/tasks.json"
+            modules.append({"name": name, "path": f"src/{name}", "tasks_file": tasks_file})
+            self.write(tasks_file, tasks_doc(name, "wip" if i in bad else "todo"))
+        self.write(".agents/index.json", {
+            "version": 1, "generated_at": "scan", "modules": modules, "docs": []
+        })
+
+    def test_valid_project(self):
+        """Tests that a consistent project reports no errors."""
+        self.write_project(3)
+        report = validate_project(self.project_root, jobs=1)
+        self.assertTrue(report["ok"])
+        self.assertEqual(report["files_checked"], 4)
+
+    def test_collects_all_errors(self):
+        """Tests that errors in several files are all reported with pointers."""
+        self.write_project(4, bad={1, 3})
+        (self.project_root / ".agents/modules/mod2/tasks.json").unlink()
+        self.write(".agents/priorities.json", {"version": 0, "updated_at": "scan", "policy": {"strategy": "x"}, "queue": []})
+
+        report = validate_project(self.project_root, jobs=1)
+        self.assertFalse(report["ok"])
+        located = {(e["file"], e["pointer"]) for e in report["errors"]}
+        self.assertIn((".agents/modules/mod1/tasks.json", "/tasks/0/status"), located)
+        self.assertIn((".agents/modules/mod3/tasks.json", "/tasks/0/status"), located)
+        self.assertIn((".agents/modules/mod2/tasks.json", ""), located)
+        self.assertIn((".agents/priorities.json", "/version"), located)
+        self.assertEqual(report["error_count"], 4)
+
+    def test_parallel_matches_serial(self):
+        """Tests that the process pool yields the same report as serial runs."""
+        self.write_project(10, bad={2, 7})
+        serial = validate_project(self.project_root, jobs=1, use_cache=False)
+        with patch("agents_core.validate.PARALLEL_THRESHOLD", 0), patch("agents_core.validate.BATCH_SIZE", 3):
+            parallel = validate_project(self.project_root, jobs=2, use_cache=False)
+            self.assertEqual(parallel, serial)
+
+            # Workers receive the passing set and skip unchanged files too.
+            validate_project(self.project_root, jobs=2)
+            cached = validate_project(self.project_root, jobs=2)
+        self.assertEqual(cached["cached"], 9)
+        self.assertEqual(cached["errors"], serial["errors"])
+
+    def test_unchanged_files_are_not_revalidated(self):
+        """Tests that passing files are skipped until their content changes."""
+        self.write_project(3, bad={2})
+        first = validate_project(self.project_root, jobs=1)
+        self.assertEqual(first["cached"], 0)
+
+        with patch("agents_core.validate.collect_errors", wraps=collect_errors) as mock_collect:
+            second = validate_project(self.project_root, jobs=1)
+        # Only the failing tasks file is validated again.
+        self.assertEqual(mock_collect.call_count, 1)
+        self.assertEqual(second["cached"], 3)
+        self.assertEqual(second["errors"], first["errors"])
+
+        self.write(".agents/modules/mod0/tasks.json", tasks_doc("mod0", "wip"))
+        third = validate_project(self.project_root, jobs=1)
+        self.assertEqual(third["error_count"], 2)
+
+    def test_schema_change_invalidates_cache(self):
+        """Tests that a different schema digest discards all cached results."""
+        self.write_project(2)
+        validate_project(self.project_root, jobs=1)
+        with patch("agents_core.validate.schemas_digest", return_value="other"):
+            report = validate_project(self.project_root, jobs=1)
+        self.assertEqual(report["cached"], 0)
+
+    def test_json_report(self):
+        """Tests the machine-readable report format."""
+        self.write_project(1, bad={0})
+        report = validate_project(self.project_root, jobs=1)
+        out = io.StringIO()
+        with patch("sys.stdout", out):
+            print_report(report, "json")
+        data = json.loads(out.getvalue())
+        self.assertEqual(data["error_count"], 1)
+        self.assertEqual(data["errors"][0]["schema"], "tasks.schema.json")
+
+    def test_streaming_matches_whole_file(self):
+        """Tests that task-by-task streaming reports exactly the whole-file errors."""
+        self.write_project(4, bad={1})
+        doc = tasks_doc("mod2")
+        doc["extra"] = True
+        doc["tasks"] += [{"id": 7, "status": "done", "acceptance": "x", "impl": {"steps": [{}]}, "refs": [{"line": 0}]}] * 12
+        self.write(".agents/modules/mod2/tasks.json", doc)
+        (self.project_root / ".agents/modules/mod3/tasks.json").write_text('{"module": "mod3", "tasks": [1,]}')
+
+        whole = validate_project(self.project_root, jobs=1, use_cache=False, stream_threshold=None)
+        with patch("agents_core.jsonstream.CHUNK_SIZE", 16):
+            streamed = validate_project(self.project_root, jobs=1, use_cache=False, stream_threshold=0)
+        self.assertEqual(streamed, whole)
+        self.assertIn({"file": ".agents/modules/mod2/tasks.json", "pointer": "/tasks/10/impl/steps/0",
+                       "schema": "tasks.schema.json", "message": "'type' is a required property"}, whole["errors"])
+
+        # Passing streamed files are cached like any other.
+        validate_project(self.project_root, jobs=1, stream_threshold=0)
+        self.assertEqual(validate_project(self.project_root, jobs=1, stream_threshold=0)["cached"], 2)
+
+    def test_streaming_memory_is_bounded(self):
+        """Tests that a large task file is not held in memory as a whole."""
+        import tracemalloc
+
+        doc = tasks_doc("big")
+        doc["tasks"] = [dict(doc["tasks"][0], id=f"big:{i}", notes=["n" * 500]) for i in range(4000)]
+        self.write(".agents/index.json", {"version": 1, "generated_at": "scan", "docs": [], "modules": [
+            {"name": "big", "path": "src/big", "tasks_file": ".agents/modules/big/tasks.json"}]})
+        self.write(".agents/modules/big/tasks.json", doc)
+        size = (self.project_root / ".agents/modules/big/tasks.json").stat().st_size
+        del doc
+
+        validate_project(self.project_root, jobs=1, use_cache=False, stream_threshold=0)  # warm up imports
+        tracemalloc.start()
+        try:
+            report = validate_project(self.project_root, jobs=1, use_cache=False, stream_threshold=0)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertTrue(report["ok"])
+        self.assertLess(peak, size / 4)
+
+    def test_errors_in_numeric_order(self):
+        """Tests that errors of /tasks/2 come before those of /tasks/10."""
+        doc = tasks_doc("mod0")
+        doc["tasks"] = [dict(doc["tasks"][0], id=f"mod0:{i}", status="wip") for i in range(12)]
+        self.write(".agents/index.json", {"version": 1, "generated_at": "scan", "docs": [], "modules": [
+            {"name": "mod0", "path": "src/mod0", "tasks_file": ".agents/modules/mod0/tasks.json"}]})
+        self.write(".agents/modules/mod0/tasks.json", doc)
+        for threshold in (None, 0):
+            report = validate_project(self.project_root, jobs=1, use_cache=False, stream_threshold=threshold)
+            self.assertEqual([e["pointer"] for e in report["errors"]], [f"/tasks/{i}/status" for i in range(12)])
+
+    def test_json_pointer_escaping(self):
+        """Tests RFC 6901 escaping of path segments."""
+        self.assertEqual(json_pointer(["a/b", "m~n", 0]), "/a~1b/m~0n/0")
+        self.assertEqual(json_pointer([]), "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+import errno
+import json
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+from unittest.mock import MagicMock, patch
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.discovery import iter_code_dirs
+from agents_core.ignore import load_ignore_rules
+from agents_core.watch import IndexSync, InotifyWatcher, PollingWatcher, _Inotify, open_watcher
+
+class WatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.project_root = Path(self.test_dir.name)
+        (self.project_root / ".agents").mkdir()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def touch(self, rel):
+        path = self.project_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def expected(self):
+        ignore = load_ignore_rules(self.project_root)
+        return [str(p) for p in iter_code_dirs(self.project_root, ignore)]
+
+    def drain(self, watcher):
+        """Processes event batches until the watcher goes quiet."""
+        processed = False
+        while watcher.wait(0.2):
+            processed = True
+        return processed
+
+
+@unittest.skipUnless(_Inotify.available(), "inotify not available")
+class TestInotifyWatcher(WatchTestCase):
+    """Unit tests for the inotify-backed module model."""
+
+    def setUp(self):
+        super().setUp()
+        self.touch("src/a/main.py")
+        self.touch("src/b/readme.md")
+        self.touch("src/b/c/lib.go")
+        self.watcher = InotifyWatcher(self.project_root, debounce=0.05)
+
+    def tearDown(self):
+        self.watcher.close()
+        super().tearDown()
+
+    def test_initial_model_matches_walker(self):
+        """Tests that the model starts out identical to a full walk."""
+        self.assertEqual(self.watcher.code_dirs(), self.expected())
+
+    def test_tracks_created_and_deleted_modules(self):
+        """Tests that first/last code files and new subtrees are tracked."""
+        self.touch("src/b/util.ts")
+        self.touch("src/new/deep/er/x.rs")
+        self.touch("src/new/node_modules/pkg/index.js")
+        (self.project_root / "src" / "a" / "main.py").unlink()
+        self.assertTrue(self.drain(self.watcher))
+        self.assertEqual(self.watcher.code_dirs(), self.expected())
+        self.assertEqual(self.watcher.code_dirs(), ["src/b", "src/b/c", "src/new/deep/er"])
+
+        shutil.rmtree(self.project_root / "src" / "new")
+        self.drain(self.watcher)
+        self.assertEqual(self.watcher.code_dirs(), self.expected())
+
+    def test_gitignore_change_rebuilds_subtree(self):
+        """Tests that a new .gitignore prunes the matching directories."""
+        (self.project_root / "src" / "b" / ".gitignore").write_text("c/\n")
+        self.drain(self.watcher)
+        self.assertEqual(self.watcher.code_dirs(), ["src/a"])
+
+    def test_recreated_directory_is_watched_again(self):
+        """Tests that a directory deleted and recreated within one batch is tracked."""
+        shutil.rmtree(self.project_root / "src" / "a")
+        self.touch("src/a/x.py")
+        self.drain(self.watcher)
+        self.assertEqual(self.watcher.code_dirs(), ["src/a", "src/b/c"])
+
+        (self.project_root / "src" / "a" / "x.py").unlink()
+        self.touch("src/a/y.go")
+        self.drain(self.watcher)
+        self.assertEqual(self.watcher.code_dirs(), self.expected())
+
+        shutil.move(str(self.project_root / "src" / "a"), str(self.project_root / "old"))
+        (self.project_root / "src" / "a").mkdir()
+        self.drain(self.watcher)
+        self.assertEqual(self.watcher.code_dirs(), ["src/b/c"])
+
+    def test_non_code_files_are_ignored(self):
+        """Tests that writing non-code files does not touch the model."""
+        with patch.object(self.watcher, "_refresh") as mock_refresh:
+            (self.project_root / "src" / "a" / "notes.txt").write_text("x")
+            (self.project_root / "src" / "a" / "main.py").write_text("print(1)")
+            self.drain(self.watcher)
+        mock_refresh.assert_not_called()
+
+
+    def test_add_reports_watch_limit(self):
+        """Tests that a failed watch raises unless the directory is simply gone."""
+        inotify = _Inotify()
+        try:
+            self.assertIsNone(inotify.add(str(self.project_root / "missing"), 0x100))
+            with patch.object(inotify, "_libc", MagicMock(**{"inotify_add_watch.return_value": -1})), \
+                    patch("agents_core.watch.ctypes.get_errno", return_value=errno.ENOSPC):
+                with self.assertRaises(OSError) as raised:
+                    inotify.add(str(self.project_root), 0x100)
+            self.assertEqual(raised.exception.errno, errno.ENOSPC)
+        finally:
+            inotify.close()
+
+    def test_unwatchable_new_directory_raises(self):
+        """Tests that a new directory that cannot be watched surfaces instead of going stale."""
+        limit = OSError(errno.ENOSPC, "No space left on device")
+        with patch.object(self.watcher._inotify, "add", side_effect=limit):
+            self.touch("src/new/x.py")
+            with self.assertRaises(OSError):
+                self.drain(self.watcher)
+
+    def test_falls_back_to_polling(self):
+        """Tests that watch mode polls, with a warning, when the tree cannot be watched."""
+        limit = OSError(errno.ENOSPC, "No space left on device")
+        with patch("agents_core.watch._Inotify.add", side_effect=limit), \
+                patch("sys.stderr") as mock_stderr, patch("sys.stdout"):
+            watcher = open_watcher(self.project_root)
+        self.assertIsInstance(watcher, PollingWatcher)
+        self.assertIn("max_user_watches", "".join(c.args[0] for c in mock_stderr.write.call_args_list))
+        self.assertEqual(watcher.code_dirs(), self.expected())
+
+
+class TestPollingWatcher(WatchTestCase):
+    """Unit tests for the stat-polling fallback."""
+
+    def test_detects_changes(self):
+        """Tests that polling reports changes only when the module set changes."""
+        self.touch("src/a/main.py")
+        watcher = PollingWatcher(self.project_root)
+        self.assertEqual(watcher.code_dirs(), ["src/a"])
+        self.assertFalse(watcher.wait(0))
+
+        self.touch("src/b/x.py")
+        self.assertTrue(watcher.wait(0))
+        self.assertEqual(watcher.code_dirs(), self.expected())
+
+
+class TestIndexSync(WatchTestCase):
+    """Unit tests for index maintenance in watch mode."""
+
+    def test_writes_only_on_change(self):
+        """Tests that the index and task files are written when modules change."""
+        self.touch("src/a/main.py")
+        ignore = load_ignore_rules(self.project_root)
+        sync = IndexSync(self.project_root)
+
+        self.assertTrue(sync.update(["src/a"], ignore))
+        self.assertFalse(sync.update(["src/a"], ignore))
+        self.assertTrue((self.project_root / ".agents/modules/a/tasks.json").is_file())
+
+        self.assertTrue(sync.update(["src/a", "src/b"], ignore))
+        with open(self.project_root / ".agents/index.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual([m["name"] for m in data["modules"]], ["a", "b"])
+
+        # A fresh sync picks up the state already on disk.
+        self.assertFalse(IndexSync(self.project_root).update(["src/b", "src/a"], ignore))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+
+# Add src to path to import agents_core
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents_core.writer import FileWriter
+
+class TestFileWriter(unittest.TestCase):
+    """Unit tests for the agents_core.writer module."""
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.path = Path(self.test_dir.name) / "index.json"
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_skips_identical_content(self):
+        """Tests that rewriting the same bytes leaves the file and its mtime alone."""
+        writer = FileWriter()
+        self.assertTrue(writer.write(self.path, b"{}\n"))
+        os.utime(self.path, ns=(1, 1))
+        self.assertFalse(writer.write(self.path, b"{}\n"))
+        self.assertEqual(self.path.stat().st_mtime_ns, 1)
+        self.assertEqual(writer.summary(), "1 written, 1 unchanged")
+
+    def test_writes_changed_content(self):
+        """Tests that same-size and different-size changes are both written."""
+        writer = FileWriter()
+        writer.write(self.path, b"{}\n")
+        self.assertTrue(writer.write(self.path, b"[]\n"))
+        self.assertTrue(writer.write(self.path, b"[1]\n"))
+        self.assertEqual(self.path.read_bytes(), b"[1]\n")
+        self.assertFalse(Path(str(self.path) + ".tmp").exists())
+
+    def test_current_content_is_trusted(self):
+        """Tests that content the caller already read replaces the disk comparison."""
+        writer = FileWriter()
+        self.assertTrue(writer.write(self.path, b"a", current=None))
+        self.assertFalse(writer.write(self.path, b"b", current=b"b"))
+        self.assertEqual(self.path.read_bytes(), b"a")
+
+if __name__ == "__main__":
+    unittest.main()